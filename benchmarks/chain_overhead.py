@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+"""Measure the per-document overhead of building the analysis chain on every call versus reusing it.
+
+A fake chat model answers instantly, so the numbers are pure LangChain and prompt-rendering overhead.
+
+    python benchmarks/chain_overhead.py --calls 2000
+"""
+import argparse
+import asyncio
+import json
+import time
+from unittest.mock import patch
+
+from langchain_core.language_models.fake_chat_models import FakeListChatModel
+from langchain_core.prompts import PromptTemplate
+
+from gideon.agents.renamer import DocumentAnalyzer, format_topics_list
+from gideon.models.document import TOPIC_LIST
+from gideon.models.schema import DOCUMENT_INFO_SCHEMA
+
+RESPONSE = json.dumps({"authors": ["Alice Smith"], "year": "2022", "title": "A Study", "topic": "Mathematics"})
+CONTENT = "A Study on Testing\nAlice Smith\nAbstract\nWe study testing."
+
+
+async def rebuild_per_call(analyzer: DocumentAnalyzer, llm, calls: int, invoke: bool) -> float:
+    """What analyze did before: compose the chain and render the topic list for every document."""
+    template = PromptTemplate.from_template(analyzer.analysis_prompt.template)
+    start = time.perf_counter()
+    for _ in range(calls):
+        chain = template | llm | analyzer.json_parser
+        inputs = {"content": CONTENT, "topics_formatted": format_topics_list(TOPIC_LIST)}
+        if invoke:
+            await chain.ainvoke(inputs)
+    return time.perf_counter() - start
+
+
+async def reuse_chain(analyzer: DocumentAnalyzer, calls: int, invoke: bool) -> float:
+    start = time.perf_counter()
+    for _ in range(calls):
+        chain = await analyzer.llm_service.create_chain(
+            analyzer.analysis_prompt, analyzer.json_parser, schema=DOCUMENT_INFO_SCHEMA
+        )
+        if invoke:
+            await chain.ainvoke({"content": CONTENT})
+    return time.perf_counter() - start
+
+
+async def main(calls: int) -> None:
+    llm = FakeListChatModel(responses=[RESPONSE])
+    with patch("gideon.llm.ollama.ChatOllama", return_value=llm):
+        analyzer = DocumentAnalyzer(service_config={"model": "fake"})
+
+    print(f"calls: {calls}")
+    with patch("gideon.utils.logging.log_message"):
+        for label, invoke in (("per-document setup", False), ("setup + ainvoke", True)):
+            rebuild = await rebuild_per_call(analyzer, llm, calls, invoke)
+            reuse = await reuse_chain(analyzer, calls, invoke)
+            print(
+                f"{label:20} rebuild {rebuild / calls * 1e6:8.1f} us/call   "
+                f"reuse {reuse / calls * 1e6:8.1f} us/call"
+            )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--calls", type=int, default=2000)
+    asyncio.run(main(parser.parse_args().calls))
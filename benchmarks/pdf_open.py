@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+"""Compare eager and lazy (memory-mapped) PDF opening on large files.
+
+Each measurement runs in a fresh process so peak RSS is per file and per mode.
+
+    python benchmarks/pdf_open.py path/to/book.pdf another.pdf
+    python benchmarks/pdf_open.py --generate 1000 --payload-kb 256
+"""
+import argparse
+import io
+import mmap
+import multiprocessing
+import os
+import resource
+import tempfile
+import time
+import tracemalloc
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+from pathlib import Path
+
+from PyPDF2 import PdfReader
+
+from gideon.services.pdf_extractor import iter_lazy_pages
+from gideon.utils.synthetic_pdf import write_pdf
+
+
+class CountingStream:
+    """Proxy a binary stream and count the bytes PdfReader pulls out of it."""
+
+    def __init__(self, stream):
+        self._stream = stream
+        self.bytes_read = 0
+
+    def read(self, size=-1):
+        data = self._stream.read(size)
+        self.bytes_read += len(data)
+        return data
+
+    def readline(self, size=-1):
+        data = self._stream.readline(size)
+        self.bytes_read += len(data)
+        return data
+
+    def seek(self, offset, whence=0):
+        return self._stream.seek(offset, whence)
+
+    def tell(self):
+        return self._stream.tell()
+
+
+def measure(path: str, mode: str, max_pages: int) -> dict:
+    tracemalloc.start()
+    start = time.perf_counter()
+    with open(path, "rb") as pdf_file:
+        if mode == "eager":
+            # What PdfReader(path) does internally: read the whole file into memory
+            stream = CountingStream(pdf_file)
+            reader = PdfReader(io.BytesIO(stream.read()))
+            pages = reader.pages
+            text = [page.extract_text() for page in islice(pages, max_pages)]
+        else:
+            with mmap.mmap(pdf_file.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                stream = CountingStream(mapped)
+                reader = PdfReader(stream)
+                text = [page.extract_text() for page in islice(iter_lazy_pages(reader), max_pages)]
+                del reader
+    elapsed = time.perf_counter() - start
+    traced_peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return {
+        "seconds": elapsed,
+        "bytes_read": stream.bytes_read,
+        "traced_peak": traced_peak,
+        "max_rss_kb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+        "chars": sum(len(page or "") for page in text),
+    }
+
+
+def generate_pdf(path: Path, pages: int, payload_kb: int) -> None:
+    """Write a synthetic scanned-book-like PDF: one text line and one opaque image stream per page."""
+    with open(path, "wb") as output:
+        texts = [f"Page {i + 1} of a large scanned book" for i in range(pages)]
+        write_pdf(output, texts, os.urandom(payload_kb * 1024))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("files", nargs="*", type=Path)
+    parser.add_argument("--max-pages", type=int, default=5)
+    parser.add_argument("--generate", type=int, metavar="PAGES", help="benchmark a synthetic PDF with this many pages")
+    parser.add_argument("--payload-kb", type=int, default=256, help="image payload per synthetic page")
+    args = parser.parse_args()
+
+    files = list(args.files)
+    tmpdir = None
+    if args.generate:
+        tmpdir = tempfile.TemporaryDirectory()
+        synthetic = Path(tmpdir.name) / f"synthetic_{args.generate}_pages.pdf"
+        generate_pdf(synthetic, args.generate, args.payload_kb)
+        files.append(synthetic)
+    if not files:
+        parser.error("pass PDF files or --generate PAGES")
+
+    context = multiprocessing.get_context("spawn")
+    print(f"{'file':40} {'mode':6} {'size MB':>8} {'read MB':>8} {'traced MB':>10} {'RSS MB':>8} {'seconds':>8}")
+    for path in files:
+        size_mb = path.stat().st_size / 2**20
+        for mode in ("eager", "lazy"):
+            with ProcessPoolExecutor(max_workers=1, mp_context=context) as executor:
+                result = executor.submit(measure, str(path), mode, args.max_pages).result()
+            print(
+                f"{path.name[:40]:40} {mode:6} {size_mb:8.1f} {result['bytes_read'] / 2**20:8.2f} "
+                f"{result['traced_peak'] / 2**20:10.2f} {result['max_rss_kb'] / 1024:8.1f} {result['seconds']:8.3f}"
+            )
+
+    if tmpdir is not None:
+        tmpdir.cleanup()
+
+
+if __name__ == "__main__":
+    main()
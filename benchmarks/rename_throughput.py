@@ -0,0 +1,48 @@
+#!/usr/bin/env python3
+"""Measure end-to-end `rename auto` throughput against the offline stub LLM backend.
+
+Generates a directory of small PDFs and renames them with the stub service, so the numbers
+cover extraction, prompt building, scheduling and renaming without any inference server.
+Stub latency, stalls and failure rates come from the STUB_LLM_* settings.
+
+    python benchmarks/rename_throughput.py --files 500 --batch-size 8
+    STUB_LLM_STALL_RATE=0.01 STUB_LLM_STALL_LATENCY=5 python benchmarks/rename_throughput.py
+"""
+import argparse
+import asyncio
+import tempfile
+import time
+from pathlib import Path
+
+from gideon.cli.commands.rename import rename_files_with_ai
+from gideon.llm.factory import LLMServiceType
+from gideon.utils.synthetic_pdf import build_pdf
+
+
+async def main(files: int, batch_size: int, concurrent: int) -> None:
+    with tempfile.TemporaryDirectory() as directory:
+        directory = Path(directory)
+        for i in range(files):
+            lines = [f"On the Structure of Problem {i}", "Alice Smith", "Bob Jones", f"Published {1990 + i % 35}"]
+            (directory / f"scan_{i:05d}.pdf").write_bytes(build_pdf(["\n".join(lines)]))
+        start = time.perf_counter()
+        await rename_files_with_ai(
+            directory,
+            LLMServiceType.STUB,
+            "stub",
+            0.1,
+            max_concurrent=concurrent,
+            use_cache=False,
+            batch_size=batch_size,
+        )
+        elapsed = time.perf_counter() - start
+    print(f"files: {files}  elapsed: {elapsed:.2f}s  throughput: {files / elapsed:.1f} files/s")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--files", type=int, default=200)
+    parser.add_argument("--batch-size", type=int, default=8)
+    parser.add_argument("--concurrent", type=int, default=16)
+    args = parser.parse_args()
+    asyncio.run(main(args.files, args.batch_size, args.concurrent))
@@ -0,0 +1,120 @@
+"""Classify titles into TOPIC_LIST in-process, learning from files that are already named."""
+import math
+import re
+import unicodedata
+import zlib
+from typing import Iterable, List, Optional, Sequence, Tuple
+import numpy as np
+
+from ..formarters.formarters import TopicFormatter
+from ..models.document import TOPIC_LIST
+from ..validators.filename_validator import FilenameValidator
+
+# Topics as TopicFormatter writes them in filenames, mapped back to TOPIC_LIST
+FILENAME_TOPICS = {TopicFormatter.format_topic(topic): topic for topic in TOPIC_LIST}
+
+
+class TopicClassifier:
+    """Nearest-centroid topic classifier over hashed TF-IDF vectors of title n-grams.
+
+    Titles are turned into character n-grams (within word boundaries) plus whole words, hashed into
+    `n_features` buckets and weighted by sublinear term frequency times inverse document frequency.
+    Each topic is the normalized mean of its training vectors, so scoring a batch of titles is one
+    matrix product, and the confidence of a prediction is its cosine similarity to the topic.
+    """
+
+    def __init__(self, n_features: int = 2 ** 13, ngram_range: Tuple[int, int] = (3, 5)):
+        self.n_features = n_features
+        self.ngram_range = ngram_range
+        self.topics: List[str] = []
+        self.idf: Optional[np.ndarray] = None
+        self.centroids: Optional[np.ndarray] = None
+        self.examples = 0
+
+    @property
+    def trained(self) -> bool:
+        return self.centroids is not None
+
+    @classmethod
+    def from_filenames(cls, filenames: Iterable[str], **kwargs) -> "TopicClassifier":
+        """Train on the titles and topics of filenames in the Author.Year.Title.Topic.Timestamp format.
+
+        Filenames in another format or with a topic outside TOPIC_LIST are ignored; if none are left
+        the classifier stays untrained.
+        """
+        classifier = cls(**kwargs)
+        examples = cls.examples_from_filenames(filenames)
+        if examples:
+            titles, topics = zip(*examples)
+            classifier.fit(titles, topics)
+        return classifier
+
+    @staticmethod
+    def examples_from_filenames(filenames: Iterable[str]) -> List[Tuple[str, str]]:
+        """(title, topic) pairs from correctly formatted filenames."""
+        examples = []
+        for filename in filenames:
+            info = FilenameValidator.extract_info_from_filename(filename)
+            if not info:
+                continue
+            _, _, title, topic, _ = info
+            if topic in FILENAME_TOPICS:
+                examples.append((title.replace("_", " "), FILENAME_TOPICS[topic]))
+        return examples
+
+    def fit(self, titles: Sequence[str], topics: Sequence[str], chunk_size: int = 1024) -> "TopicClassifier":
+        # Dense count matrices are built a chunk at a time so large libraries fit in memory
+        chunks = [slice(start, start + chunk_size) for start in range(0, len(titles), chunk_size)]
+        document_frequency = np.zeros(self.n_features, dtype=np.int64)
+        for chunk in chunks:
+            document_frequency += np.count_nonzero(self._counts(titles[chunk]), axis=0)
+        self.idf = (np.log((1 + len(titles)) / (1 + document_frequency)) + 1).astype(np.float32)
+
+        self.topics = sorted(set(topics))
+        labels = np.array([self.topics.index(topic) for topic in topics])
+        centroids = np.zeros((len(self.topics), self.n_features), dtype=np.float32)
+        for chunk in chunks:
+            np.add.at(centroids, labels[chunk], self._weigh(self._counts(titles[chunk])))
+        self.centroids = self._normalize(centroids)
+        self.examples = len(titles)
+        return self
+
+    def predict(self, titles: Sequence[str]) -> List[Tuple[str, float]]:
+        """The closest topic and its cosine similarity for each title."""
+        if not self.trained:
+            raise RuntimeError("TopicClassifier has not been trained")
+        if not titles:
+            return []
+        scores = self._weigh(self._counts(titles)) @ self.centroids.T
+        best = scores.argmax(axis=1)
+        return [(self.topics[index], float(scores[row, index])) for row, index in enumerate(best)]
+
+    def _counts(self, titles: Sequence[str]) -> np.ndarray:
+        counts = np.zeros((len(titles), self.n_features), dtype=np.float32)
+        for row, title in enumerate(titles):
+            buckets = [zlib.crc32(feature.encode("utf-8")) % self.n_features for feature in self._features(title)]
+            if buckets:
+                counts[row] = np.bincount(buckets, minlength=self.n_features)
+        return counts
+
+    def _weigh(self, counts: np.ndarray) -> np.ndarray:
+        weights = np.zeros_like(counts)
+        np.log(counts, out=weights, where=counts > 0)
+        weights[counts > 0] += 1
+        return self._normalize(weights * self.idf)
+
+    def _features(self, title: str) -> List[str]:
+        text = unicodedata.normalize("NFKD", title).encode("ascii", "ignore").decode().lower()
+        words = re.findall(r"[a-z0-9]+", text)
+        low, high = self.ngram_range
+        features = [f"w:{word}" for word in words]
+        for word in words:
+            padded = f" {word} "
+            for n in range(low, min(high, len(padded)) + 1):
+                features.extend(padded[i:i + n] for i in range(len(padded) - n + 1))
+        return features
+
+    @staticmethod
+    def _normalize(matrix: np.ndarray) -> np.ndarray:
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        return matrix / np.maximum(norms, math.ulp(1.0))
@@ -1,12 +1,20 @@
-from typing import Optional, Dict, Any
+from collections import Counter
+from typing import Optional, Callable, Dict, Any, List, Tuple
 from langchain_core.prompts import PromptTemplate
 from ..utils.logging import log_info, log_error, log_warning
 from ..llm.factory import LLMServiceFactory, LLMServiceType
+from .classifier import TopicClassifier
+from ..llm.resilience import backoff_delay
 from ..utils.parsers import CleanJsonOutputParser
+from ..utils.content_selector import ContentSelector
 from ..core.config import settings
 from ..models.document import DocumentInfo, UNKNOWN_TITLE, TOPIC_LIST, UNKNOWN_TOPIC
+from ..models.schema import DOCUMENT_INFO_SCHEMA, TOPIC_SCHEMA
+from ..models.topics import TOPIC_INDEX, TopicIndex
+import asyncio
 import json
 import re
+import textwrap
 
 
 def format_topics_list(topics: list) -> str:
@@ -16,19 +24,14 @@ def format_topics_list(topics: list) -> str:
 
 def validate_topic_in_list(topic: str, topic_list: list) -> tuple[bool, str]:
     """Validate that a topic exists in the predefined list."""
-    if topic not in topic_list:
-        topic_lower = topic.lower()
-        matches = [t for t in topic_list if t.lower() == topic_lower]
-        if matches:
-            return False, f"Topic '{topic}' has incorrect case, should be '{matches[0]}'"
-        
-        partial_matches = [t for t in topic_list if topic_lower in t.lower() or t.lower() in topic_lower]
-        if partial_matches:
-            return False, f"Topic '{topic}' not found, similar topics: {partial_matches[:3]}"
-        
-        return False, f"Topic '{topic}' not in predefined list"
-    
-    return True, "Valid topic"
+    if topic in topic_list:
+        return True, "Valid topic"
+
+    index = TOPIC_INDEX if topic_list == TOPIC_INDEX.topics else TopicIndex(topic_list)
+    repaired = index.resolve(topic)
+    if repaired:
+        return False, f"Topic '{topic}' not found, should be '{repaired}'"
+    return False, f"Topic '{topic}' not in predefined list"
 
 
 def extract_json_from_response(response_text: str) -> Optional[dict]:
@@ -48,210 +51,385 @@ def extract_json_from_response(response_text: str) -> Optional[dict]:
     return None
 
 
+# Template prefix for extracting document metadata; the document content follows it. The topic list
+# is filled in here, so literal braces are doubled twice.
+ANALYSIS_PROMPT_PREFIX = textwrap.dedent(
+    """\
+    +++SchemaOutput(format=json, schema=strict)
+    +++Precision(level=high)
+    +++RuleFollowing(priority=absolute)
+    +++ExtractMetadata(fields=authors,year,title,topic)
+    +++ArrayOutput(field=authors)
+    +++DirectResponse(style=json_only)
+
+    You are a document analysis expert. Extract key information from the document content and classify it.
+
+    Return a JSON object with exactly these fields:
+    {{{{
+        "authors": ["Author Name 1", "Author Name 2"],
+        "year": "YYYY",
+        "title": "Document Title",
+        "topic": "Topic_Name",
+        "confidence": 0.9
+    }}}}
+
+    AVAILABLE TOPICS:
+    {topics_formatted}
+
+    # Rules:
+    1. Authors must be an array of names
+       - Include all authors you can identify
+       - Use the original capitalization and format from the document
+       - If no authors found, return an empty array []
+    2. Year must be exactly 4 digits or empty string if not found
+    3. Title should maintain its original formatting (as found in the document)
+    4. Topic must be exactly ONE from the available list above
+       - Choose the topic that best matches the document's subject matter
+       - Topic names must match exactly as listed (case-sensitive)
+       - If uncertain, use "Other"
+    5. If any field except authors is not found, return an empty string for that field (except topic, use "Other")
+    6. All strings must use double quotes
+    7. Return only the JSON object, no other text
+    8. DO NOT include any <think> tags or intermediate reasoning in your output
+    9. DO NOT include any troubleshooting URLs or error messages
+    10. Return ONLY the valid JSON object and nothing else
+    11. Confidence is a number from 0 to 1: how sure you are that the authors, year, title and topic are right
+
+    Document content:
+    """
+).format(topics_formatted=format_topics_list(TOPIC_LIST))
+
+# Template prefix for classifying a document; the title follows it.
+CLASSIFICATION_PROMPT_PREFIX = textwrap.dedent(
+    """\
+    You are an expert document classifier. Analyze the document title and assign the most appropriate topic from
+    the predefined list.
+
+    AVAILABLE TOPICS:
+    {topics_formatted}
+
+    CLASSIFICATION REQUIREMENTS:
+    1. Select exactly ONE topic from the available list above
+    2. Choose the topic that best matches the document's subject matter
+    3. Consider the primary focus and domain of the document
+    4. If multiple topics could apply, choose the most specific/relevant one
+    5. Topic names must match exactly as listed (case-sensitive with underscores)
+
+    OUTPUT FORMAT:
+    Return ONLY a valid JSON object with this exact structure:
+    {{{{"topic": "Topic_Name"}}}}
+
+    CRITICAL RULES:
+    - Your response must be valid JSON only
+    - No explanations, comments, or additional text
+    - Topic must be from the provided list exactly as written
+    - Include both opening and closing braces
+    - Use double quotes for JSON strings
+
+    Examples of valid responses:
+    {{{{"topic": "Mathematics"}}}}
+    {{{{"topic": "Computer Science"}}}}
+    {{{{"topic": "Artificial Intelligence"}}}}
+
+    DOCUMENT TITLE: """
+).format(topics_formatted=format_topics_list(TOPIC_LIST))
+
+
 class DocumentAnalyzer:
     def __init__(
         self,
         llm_service_type: LLMServiceType = settings.DEFAULT_LLM_SERVICE_TYPE,
         service_config: Optional[Dict[str, Any]] = None,
+        content_selector: Optional[ContentSelector] = None,
+        escalation_config: Optional[Dict[str, Any]] = None,
+        escalation_confidence: Optional[float] = None,
+        topic_classifier: Optional[TopicClassifier] = None,
+        classifier_confidence: Optional[float] = None,
+        train_topic_classifier: Optional[Callable[[], Optional[TopicClassifier]]] = None,
     ):
         self.llm_service = LLMServiceFactory.create(llm_service_type, service_config)
-        self.json_parser = CleanJsonOutputParser()
-        
-        # Analysis prompt for extracting document metadata
-        self.analysis_prompt = PromptTemplate.from_template(
-            """
-            +++SchemaOutput(format=json, schema=strict)
-            +++Precision(level=high)
-            +++RuleFollowing(priority=absolute)
-            +++ExtractMetadata(fields=authors,year,title,topic)
-            +++ArrayOutput(field=authors)
-            +++DirectResponse(style=json_only)
-            
-            You are a document analysis expert. Extract key information from the document content and classify it.
-            
-            Return a JSON object with exactly these fields:
-            {{
-                "authors": ["Author Name 1", "Author Name 2"],
-                "year": "YYYY",
-                "title": "Document Title",
-                "topic": "Topic_Name"
-            }}
-            
-            AVAILABLE TOPICS:
-            {topics_formatted}
-            
-            # Rules:
-            1. Authors must be an array of names
-               - Include all authors you can identify
-               - Use the original capitalization and format from the document
-               - If no authors found, return an empty array []
-            2. Year must be exactly 4 digits or empty string if not found
-            3. Title should maintain its original formatting (as found in the document)
-            4. Topic must be exactly ONE from the available list above
-               - Choose the topic that best matches the document's subject matter
-               - Topic names must match exactly as listed (case-sensitive)
-               - If uncertain, use "Other"
-            5. If any field except authors is not found, return an empty string for that field (except topic, use "Other")
-            6. All strings must use double quotes
-            7. Return only the JSON object, no other text
-            8. DO NOT include any <think> tags or intermediate reasoning in your output
-            9. DO NOT include any troubleshooting URLs or error messages
-            10. Return ONLY the valid JSON object and nothing else
-
-            Document content:
-            {content}
-            """
+        # Cascade: answers from the main model that fail the checks in escalation_reason are redone
+        # by a larger model, configured as overrides of service_config (usually just the model)
+        self.escalation_service = (
+            LLMServiceFactory.create(llm_service_type, {**(service_config or {}), **escalation_config})
+            if escalation_config
+            else None
         )
-        
-        # Classification prompt for when we only have a title
-        self.classification_prompt = PromptTemplate.from_template(
-            """
-            You are an expert document classifier. Analyze the document title and assign the most appropriate topic from
-            the predefined list.
-            
-            DOCUMENT TITLE: {title}
-
-            AVAILABLE TOPICS:
-            {topics_formatted}
-
-            CLASSIFICATION REQUIREMENTS:
-            1. Select exactly ONE topic from the available list above
-            2. Choose the topic that best matches the document's subject matter
-            3. Consider the primary focus and domain of the document
-            4. If multiple topics could apply, choose the most specific/relevant one
-            5. Topic names must match exactly as listed (case-sensitive with underscores)
-
-            OUTPUT FORMAT:
-            Return ONLY a valid JSON object with this exact structure:
-            {{"topic": "Topic_Name"}}
-
-            CRITICAL RULES:
-            - Your response must be valid JSON only
-            - No explanations, comments, or additional text
-            - Topic must be from the provided list exactly as written
-            - Include both opening and closing braces
-            - Use double quotes for JSON strings
-
-            Examples of valid responses:
-            {{"topic": "Mathematics"}}
-            {{"topic": "Computer Science"}}
-            {{"topic": "Artificial Intelligence"}}
-            """
+        self.escalation_confidence = (
+            escalation_confidence if escalation_confidence is not None else settings.LLM_ESCALATION_CONFIDENCE
         )
+        self.analyzed = 0
+        self.escalations: Counter = Counter()
+        # Titles the local classifier is sure about never reach the LLM
+        self.topic_classifier = topic_classifier if topic_classifier and topic_classifier.trained else None
+        # Training walks the library, so it waits until a title actually needs a topic
+        self.train_topic_classifier = train_topic_classifier if self.topic_classifier is None else None
+        self._training = asyncio.Lock()
+        self.classifier_confidence = (
+            classifier_confidence if classifier_confidence is not None else settings.TOPIC_CLASSIFIER_CONFIDENCE
+        )
+        self.classified_locally = 0
+        self.json_parser = CleanJsonOutputParser()
+        self.content_selector = content_selector or ContentSelector()
+        
+        # The static instructions and topic list form a byte-identical prefix and the per-document
+        # part comes last, so the server can reuse its KV cache for the prefix on every call.
+        self.analysis_prompt = PromptTemplate.from_template(ANALYSIS_PROMPT_PREFIX + "{content}\n")
+        self.classification_prompt = PromptTemplate.from_template(CLASSIFICATION_PROMPT_PREFIX + "{title}\n")
+
+    async def warm_up(self) -> bool:
+        """Load the model and prefill the static prefix of the analysis prompt on the server."""
+        log_info("Warming up the LLM")
+        return await self.llm_service.warm_up(self.analysis_prompt.format_prompt(content=""))
 
     async def analyze(self, content: str, file_name: str) -> Optional[DocumentInfo]:
         """Analyze document content and extract metadata including topic classification."""
         try:
             log_info(f"Analyzing document with classification: {file_name}")
             chain = await self.llm_service.create_chain(
-                prompt=self.analysis_prompt, 
-                output_parser=self.json_parser
-            )
-            result = await chain.ainvoke({
-                "content": content[:settings.MAX_CONTENT_LENGTH],
-                "topics_formatted": format_topics_list(TOPIC_LIST)
-            })
-
-            if not result or not isinstance(result, dict):
-                log_error(f"Invalid response format for {file_name}")
-                return None
-
-            # Validate topic if provided
-            topic = result.get("topic", UNKNOWN_TOPIC)
-            if topic and topic != UNKNOWN_TOPIC:
-                is_valid_topic, topic_error = validate_topic_in_list(topic, TOPIC_LIST)
-                if not is_valid_topic:
-                    log_warning(f"Invalid topic '{topic}' for {file_name}: {topic_error}. Using 'Other'")
-                    topic = "Other"
-
-            return DocumentInfo(
-                authors=result.get("authors", []),
-                year=str(result.get("year", "")),
-                title=str(result.get("title", UNKNOWN_TITLE)) or UNKNOWN_TITLE,
-                topic=topic or UNKNOWN_TOPIC,
+                prompt=self.analysis_prompt,
+                output_parser=self.json_parser,
+                schema=DOCUMENT_INFO_SCHEMA,
             )
+            inputs = self._analysis_input(content)
+            try:
+                result = await chain.ainvoke(inputs)
+            except Exception as e:
+                if self.escalation_service is None:
+                    raise
+                result = e
+            (result,) = await self._escalate([inputs], [result], [file_name])
+            if isinstance(result, Exception):
+                raise result
+            return self._to_document_info(result, file_name)
 
         except Exception as e:
             log_error(f"Error analyzing document {file_name}: {str(e)}")
             return None
 
+    async def analyze_batch(
+        self, documents: List[Tuple[str, str]], max_concurrency: Optional[int] = None
+    ) -> List[Optional[DocumentInfo]]:
+        """Analyze several (content, file_name) pairs in one batch submission.
+
+        Requests are spread over the backend's parallel slots; a failed document yields None.
+        """
+        if not documents:
+            return []
+        log_info(f"Analyzing batch of {len(documents)} documents")
+        chain = await self.llm_service.create_chain(
+            prompt=self.analysis_prompt, output_parser=self.json_parser, schema=DOCUMENT_INFO_SCHEMA
+        )
+        inputs = [self._analysis_input(content) for content, _ in documents]
+        results = await self.llm_service.abatch(chain, inputs, max_concurrency)
+        results = await self._escalate(inputs, results, [file_name for _, file_name in documents], max_concurrency)
+
+        doc_infos = []
+        for (_, file_name), result in zip(documents, results):
+            if isinstance(result, Exception):
+                log_error(f"Error analyzing document {file_name}: {str(result)}")
+                doc_infos.append(None)
+            else:
+                doc_infos.append(self._to_document_info(result, file_name))
+        return doc_infos
+
+    def escalation_reason(self, result: Any) -> Optional[str]:
+        """Why an analysis answer should be redone by the escalation model, or None if it passes."""
+        if not isinstance(result, dict):
+            return "failed"
+        if not re.fullmatch(r"\d{4}", str(result.get("year", ""))):
+            return "year"
+        title = str(result.get("title", "")).strip()
+        if not title or title == UNKNOWN_TITLE:
+            return "title"
+        if TOPIC_INDEX.resolve(str(result.get("topic", ""))) is None:
+            return "topic"
+        confidence = result.get("confidence")
+        if isinstance(confidence, (int, float)) and confidence < self.escalation_confidence:
+            return "confidence"
+        return None
+
+    async def _escalate(
+        self,
+        inputs: List[Dict[str, str]],
+        results: List[Any],
+        file_names: List[str],
+        max_concurrency: Optional[int] = None,
+    ) -> List[Any]:
+        """Redo the answers that fail escalation_reason on the escalation model, if one is configured.
+
+        An escalated answer that fails outright keeps the main model's answer.
+        """
+        self.analyzed += len(results)
+        if self.escalation_service is None:
+            return results
+
+        pending = []
+        for index, result in enumerate(results):
+            reason = self.escalation_reason(result)
+            if reason:
+                log_info(f"Escalating {file_names[index]} to the larger model: {reason}")
+                self.escalations[reason] += 1
+                pending.append(index)
+        if not pending:
+            return results
+
+        chain = await self.escalation_service.create_chain(
+            prompt=self.analysis_prompt, output_parser=self.json_parser, schema=DOCUMENT_INFO_SCHEMA
+        )
+        escalated = await self.escalation_service.abatch(chain, [inputs[i] for i in pending], max_concurrency)
+        results = list(results)
+        for index, result in zip(pending, escalated):
+            if isinstance(result, dict) or not isinstance(results[index], dict):
+                results[index] = result
+        return results
+
+    def close(self) -> None:
+        self.llm_service.close()
+        if self.escalation_service is not None:
+            self.escalation_service.close()
+
+    def _analysis_input(self, content: str) -> Dict[str, str]:
+        return {"content": self.content_selector.select(content[:settings.MAX_CONTENT_LENGTH])}
+
+    def _to_document_info(self, result: Any, file_name: str) -> Optional[DocumentInfo]:
+        if not result or not isinstance(result, dict):
+            log_error(f"Invalid response format for {file_name}")
+            return None
+
+        # Validate topic if provided
+        topic = result.get("topic", UNKNOWN_TOPIC)
+        if topic and topic != UNKNOWN_TOPIC:
+            repaired = TOPIC_INDEX.resolve(str(topic))
+            if repaired is None:
+                log_warning(f"Invalid topic '{topic}' for {file_name}: not in predefined list. Using 'Other'")
+            elif repaired != topic:
+                log_info(f"Repaired topic '{topic}' for {file_name} to '{repaired}'")
+            topic = repaired or "Other"
+
+        confidence = result.get("confidence")
+        return DocumentInfo(
+            authors=result.get("authors", []),
+            year=str(result.get("year", "")),
+            title=str(result.get("title", UNKNOWN_TITLE)) or UNKNOWN_TITLE,
+            topic=topic or UNKNOWN_TOPIC,
+            confidence=confidence if isinstance(confidence, (int, float)) else None,
+        )
+
+    async def _train_topic_classifier(self) -> None:
+        async with self._training:
+            # Concurrent batches wait for the first one to train instead of training again
+            if self.train_topic_classifier is None:
+                return
+            classifier = await asyncio.to_thread(self.train_topic_classifier)
+            self.train_topic_classifier = None
+            self.topic_classifier = classifier if classifier and classifier.trained else None
+
+    async def classify_batch(self, titles: List[str], max_retries: int = 2) -> List[Dict[str, str]]:
+        """Classify several documents by their titles.
+
+        The local topic classifier, trained off the event loop the first time a title needs it, scores
+        the whole batch at once; only titles it is unsure about are sent to the LLM. LLM transport errors and timeouts are raised once every call has ended.
+        """
+        results: List[Optional[Dict[str, str]]] = [None] * len(titles)
+        pending = [index for index, title in enumerate(titles) if title and title.strip()]
+        if pending and self.train_topic_classifier is not None:
+            await self._train_topic_classifier()
+        if self.topic_classifier is not None and pending:
+            predictions = self.topic_classifier.predict([titles[index].strip() for index in pending])
+            unsure = []
+            for index, (topic, confidence) in zip(pending, predictions):
+                if confidence >= self.classifier_confidence:
+                    log_info(f"Classified '{titles[index]}' as '{topic}' locally ({confidence:.2f})")
+                    results[index] = {"topic": topic}
+                    self.classified_locally += 1
+                else:
+                    unsure.append(index)
+            pending = unsure
+
+        classified = await asyncio.gather(
+            *(self._classify_with_llm(titles[index], max_retries) for index in pending), return_exceptions=True
+        )
+        for result in classified:
+            if isinstance(result, BaseException):
+                raise result
+        for index, result in zip(pending, classified):
+            results[index] = result
+        for index, title in enumerate(titles):
+            if results[index] is None:
+                log_error("Empty or whitespace-only title provided")
+                results[index] = {"topic": UNKNOWN_TOPIC}
+        return results
+
     async def classify(self, title: str, max_retries: int = 2) -> Dict[str, str]:
         """Classify a document by its title only."""
-        if not title or not title.strip():
-            log_error("Empty or whitespace-only title provided")
-            return {"topic": UNKNOWN_TOPIC}
+        (result,) = await self.classify_batch([title], max_retries)
+        return result
+
+    async def _classify_with_llm(self, title: str, max_retries: int = 2) -> Dict[str, str]:
+        """Ask the LLM for a title's topic, retrying only malformed answers and unknown topics.
 
-        retries = 0
+        Transport errors, timeouts and an open circuit are raised: the model step has already
+        retried them, and retrying here again would multiply the calls and the time spent waiting.
+        """
         last_error = None
-        
-        while retries <= max_retries:
-            try:
-                attempt_msg = f" (attempt {retries + 1}/{max_retries + 1})" if retries > 0 else ""
-                log_info(f"Classifying document: '{title}'{attempt_msg}")
-                
-                chain = await self.llm_service.create_chain(
-                    prompt=self.classification_prompt, 
-                    output_parser=self.json_parser
+
+        for attempt in range(max_retries + 1):
+            if attempt > 0:
+                await asyncio.sleep(
+                    backoff_delay(attempt - 1, settings.LLM_RETRY_BACKOFF, settings.LLM_RETRY_BACKOFF_MAX)
                 )
-                
-                result = await chain.ainvoke({
-                    "title": title.strip(), 
-                    "topics_formatted": format_topics_list(TOPIC_LIST)
-                })
-
-                # Validate response format
-                if not result or not isinstance(result, dict):
-                    last_error = f"Invalid response format: got {type(result)}"
-                    log_warning(f"{last_error}. Raw result: {result}")
-                    
-                    # Try to extract JSON if result is a string
-                    if isinstance(result, str):
-                        extracted = extract_json_from_response(result)
-                        if extracted:
-                            log_info("Successfully extracted JSON from string response")
-                            result = extracted
-                    
-                    if not result or not isinstance(result, dict):
-                        if retries < max_retries:
-                            retries += 1
-                            continue
-
-                # Validate topic field
-                if "topic" not in result:
-                    last_error = "Missing 'topic' key in response"
-                    log_warning(last_error)
-                    if retries < max_retries:
-                        retries += 1
-                        continue
-
-                topic = result["topic"].strip() if isinstance(result["topic"], str) else ""
-                if not topic:
-                    last_error = "Topic value is empty"
-                    log_warning(last_error)
-                    if retries < max_retries:
-                        retries += 1
-                        continue
-
-                # Validate topic against list
-                is_valid_topic, topic_error = validate_topic_in_list(topic, TOPIC_LIST)
-                if not is_valid_topic:
-                    last_error = f"Invalid topic: {topic_error}"
-                    log_warning(last_error)
-                    
-                    if retries < max_retries:
-                        retries += 1
-                        continue
-                else:
-                    log_info(f"Successfully classified '{title}' as '{topic}'")
-                    return {"topic": topic}
+            attempt_msg = f" (attempt {attempt + 1}/{max_retries + 1})" if attempt > 0 else ""
+            log_info(f"Classifying document: '{title}'{attempt_msg}")
 
-            except Exception as e:
+            chain = await self.llm_service.create_chain(
+                prompt=self.classification_prompt,
+                output_parser=self.json_parser,
+                schema=TOPIC_SCHEMA,
+            )
+            try:
+                result = await chain.ainvoke({"title": title.strip()})
+            except ValueError as e:
+                # Malformed output; the parser's errors are ValueErrors
                 last_error = f"Classification error: {str(e)}"
                 log_error(f"{last_error}{attempt_msg}")
-                
-                if retries < max_retries:
-                    retries += 1
-                    continue
+                continue
+
+            # Try to extract JSON if result is a string
+            if isinstance(result, str):
+                extracted = extract_json_from_response(result)
+                if extracted:
+                    log_info("Successfully extracted JSON from string response")
+                    result = extracted
+
+            # Validate response format
+            if not result or not isinstance(result, dict):
+                last_error = f"Invalid response format: got {type(result)}"
+                log_warning(f"{last_error}. Raw result: {result}")
+                continue
+
+            # Validate topic field
+            if "topic" not in result:
+                last_error = "Missing 'topic' key in response"
+                log_warning(last_error)
+                continue
+
+            topic = result["topic"].strip() if isinstance(result["topic"], str) else ""
+            if not topic:
+                last_error = "Topic value is empty"
+                log_warning(last_error)
+                continue
+
+            # Near-miss topics are repaired locally; only unrecognizable ones are asked again
+            repaired = TOPIC_INDEX.resolve(topic)
+            if repaired is None:
+                last_error = f"Invalid topic: Topic '{topic}' not in predefined list"
+                log_warning(last_error)
+                continue
+            if repaired != topic:
+                log_info(f"Repaired topic '{topic}' to '{repaired}'")
+            log_info(f"Successfully classified '{title}' as '{repaired}'")
+            return {"topic": repaired}
 
         log_error(f"Classification failed for '{title}' after {max_retries + 1} attempts. Last error: {last_error}")
         return {"topic": UNKNOWN_TOPIC}
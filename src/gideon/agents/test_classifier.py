@@ -0,0 +1,49 @@
+import pytest
+from gideon.agents.classifier import TopicClassifier
+
+TRAINING = {
+    "Mathematics": ["On prime numbers", "Algebraic number theory", "Linear algebra and matrices", "Galois theory"],
+    "Computer Science": ["Compilers principles and tools", "Operating systems design", "Algorithms for sorting"],
+    "Physics": ["Quantum mechanics lectures", "Classical electrodynamics", "Statistical mechanics"],
+}
+
+
+def filename(title, topic):
+    return f"Alice_Smith.2022.{title.replace(' ', '_')}.{topic.replace(' ', '_')}.20240101_120000.pdf"
+
+
+@pytest.fixture
+def classifier():
+    titles = [title for titles in TRAINING.values() for title in titles]
+    topics = [topic for topic, titles in TRAINING.items() for _ in titles]
+    return TopicClassifier().fit(titles, topics)
+
+
+def test_predicts_a_batch_of_titles(classifier):
+    predictions = classifier.predict(["Prime number theory", "Sorting algorithms", "Lectures on mechanics"])
+
+    assert [topic for topic, _ in predictions] == ["Mathematics", "Computer Science", "Physics"]
+    assert all(0 < confidence <= 1 for _, confidence in predictions)
+
+
+def test_unrelated_titles_get_low_confidence(classifier):
+    ((_, related), (_, unrelated)) = classifier.predict(["Galois theory", "Cooking for beginners"])
+
+    assert unrelated < 0.25 < related
+
+
+def test_learns_from_formatted_filenames():
+    names = [filename(title, topic) for topic, titles in TRAINING.items() for title in titles]
+    classifier = TopicClassifier.from_filenames(names + ["scan_0001.pdf", filename("A recipe", "Cooking")])
+
+    assert classifier.examples == 10
+    assert classifier.topics == ["Computer Science", "Mathematics", "Physics"]
+    assert classifier.predict(["Operating systems"])[0][0] == "Computer Science"
+
+
+def test_untrained_without_examples():
+    classifier = TopicClassifier.from_filenames(["scan_0001.pdf"])
+
+    assert not classifier.trained
+    with pytest.raises(RuntimeError):
+        classifier.predict(["On prime numbers"])
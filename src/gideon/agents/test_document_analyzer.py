@@ -0,0 +1,222 @@
+import asyncio
+import pytest
+from unittest.mock import AsyncMock, MagicMock, patch
+from gideon.agents.renamer import DocumentAnalyzer
+from gideon.llm.resilience import CircuitOpenError
+from gideon.models.document import DocumentInfo, UNKNOWN_TOPIC
+
+
+def make_analyzer(service: MagicMock) -> DocumentAnalyzer:
+    with patch("gideon.agents.renamer.LLMServiceFactory.create", return_value=service):
+        return DocumentAnalyzer()
+
+
+@pytest.mark.asyncio
+async def test_analyze_batch_maps_results_and_failures():
+    service = MagicMock(
+        create_chain=AsyncMock(return_value="chain"),
+        abatch=AsyncMock(return_value=[
+            {"authors": ["Alice Smith"], "year": "2022", "title": "A Study", "topic": "Mathematics"},
+            ValueError("Invalid JSON format in response"),
+            "not a dict",
+        ]),
+    )
+    analyzer = make_analyzer(service)
+
+    results = await analyzer.analyze_batch([("one", "a.pdf"), ("two", "b.pdf"), ("three", "c.pdf")])
+
+    assert results == [DocumentInfo(["Alice Smith"], "2022", "A Study", "Mathematics"), None, None]
+    chain, inputs, _ = service.abatch.await_args.args
+    assert chain == "chain"
+    assert inputs == [{"content": "one"}, {"content": "two"}, {"content": "three"}]
+
+
+@pytest.mark.asyncio
+async def test_analyze_batch_empty():
+    service = MagicMock(abatch=AsyncMock())
+    assert await make_analyzer(service).analyze_batch([]) == []
+    service.abatch.assert_not_called()
+
+
+def test_prompts_end_with_the_per_document_part():
+    analyzer = make_analyzer(MagicMock())
+    prefix = analyzer.analysis_prompt.format(content="")[:-1]
+
+    assert analyzer.analysis_prompt.format(content="First document") == prefix + "First document\n"
+    assert analyzer.analysis_prompt.format(content="Second document") == prefix + "Second document\n"
+    assert '"topic": "Topic_Name"' in prefix and "- Mathematics" in prefix
+
+    title_prefix = analyzer.classification_prompt.format(title="")[:-1]
+    assert analyzer.classification_prompt.format(title="On Topology") == title_prefix + "On Topology\n"
+
+
+@pytest.mark.asyncio
+async def test_warm_up_sends_the_static_analysis_prefix():
+    service = MagicMock(warm_up=AsyncMock(return_value=True))
+    analyzer = make_analyzer(service)
+
+    assert await analyzer.warm_up()
+    (prompt_value,) = service.warm_up.await_args.args
+    assert prompt_value.to_string() == analyzer.analysis_prompt.format(content="")
+
+
+@pytest.mark.asyncio
+async def test_classify_backs_off_between_retries():
+    chain = MagicMock(ainvoke=AsyncMock(side_effect=[{"topic": "Astrology"}, {"topic": "Mathematics"}]))
+    analyzer = make_analyzer(MagicMock(create_chain=AsyncMock(return_value=chain)))
+
+    with patch("gideon.agents.renamer.asyncio.sleep", new=AsyncMock()) as sleep:
+        assert await analyzer.classify("On Topology") == {"topic": "Mathematics"}
+
+    sleep.assert_awaited_once()
+    assert sleep.await_args.args[0] >= 0
+
+
+@pytest.mark.asyncio
+async def test_classify_stops_retrying_when_the_circuit_is_open():
+    chain = MagicMock(ainvoke=AsyncMock(side_effect=CircuitOpenError("open")))
+    analyzer = make_analyzer(MagicMock(create_chain=AsyncMock(return_value=chain)))
+
+    with pytest.raises(CircuitOpenError):
+        await analyzer.classify("On Topology")
+    assert chain.ainvoke.await_count == 1
+
+
+@pytest.mark.asyncio
+async def test_classify_leaves_transport_errors_and_timeouts_to_the_model_step_retries():
+    chain = MagicMock(ainvoke=AsyncMock(side_effect=TimeoutError("LLM call exceeded its 180s deadline")))
+    analyzer = make_analyzer(MagicMock(create_chain=AsyncMock(return_value=chain)))
+
+    with pytest.raises(TimeoutError):
+        await analyzer.classify_batch(["On Topology", "On Algebra"])
+    assert chain.ainvoke.await_count == 2
+
+
+@pytest.mark.asyncio
+async def test_classify_retries_malformed_output():
+    chain = MagicMock(ainvoke=AsyncMock(side_effect=ValueError("Invalid JSON format in response")))
+    analyzer = make_analyzer(MagicMock(create_chain=AsyncMock(return_value=chain)))
+
+    with patch("gideon.agents.renamer.asyncio.sleep", new=AsyncMock()):
+        assert await analyzer.classify("On Topology") == {"topic": UNKNOWN_TOPIC}
+    assert chain.ainvoke.await_count == 3
+
+
+@pytest.mark.asyncio
+async def test_classify_gives_up_when_every_answer_has_an_unknown_topic():
+    chain = MagicMock(ainvoke=AsyncMock(return_value={"topic": "Astrology"}))
+    analyzer = make_analyzer(MagicMock(create_chain=AsyncMock(return_value=chain)))
+
+    with patch("gideon.agents.renamer.asyncio.sleep", new=AsyncMock()):
+        assert await analyzer.classify("On Topology") == {"topic": UNKNOWN_TOPIC}
+    assert chain.ainvoke.await_count == 3
+
+
+GOOD = {"authors": ["Alice Smith"], "year": "2022", "title": "A Study", "topic": "Mathematics", "confidence": 0.9}
+
+
+@pytest.mark.parametrize(
+    "result, reason",
+    [
+        (GOOD, None),
+        (ValueError("Invalid JSON format in response"), "failed"),
+        ({**GOOD, "year": ""}, "year"),
+        ({**GOOD, "title": "Unknown_Title"}, "title"),
+        ({**GOOD, "topic": "Astrology"}, "topic"),
+        ({**GOOD, "confidence": 0.2}, "confidence"),
+        ({key: value for key, value in GOOD.items() if key != "confidence"}, None),
+    ],
+)
+def test_escalation_reason(result, reason):
+    assert make_analyzer(MagicMock()).escalation_reason(result) == reason
+
+
+@pytest.mark.asyncio
+async def test_analyze_batch_escalates_only_failing_answers():
+    small = MagicMock(
+        create_chain=AsyncMock(return_value="small chain"),
+        abatch=AsyncMock(return_value=[GOOD, {**GOOD, "year": ""}, ValueError("malformed")]),
+    )
+    large = MagicMock(
+        create_chain=AsyncMock(return_value="large chain"),
+        abatch=AsyncMock(return_value=[{**GOOD, "title": "Escalated"}, ValueError("malformed again")]),
+    )
+    with patch("gideon.agents.renamer.LLMServiceFactory.create", side_effect=[small, large]):
+        analyzer = DocumentAnalyzer(service_config={"model": "small"}, escalation_config={"model": "large"})
+
+    results = await analyzer.analyze_batch([("one", "a.pdf"), ("two", "b.pdf"), ("three", "c.pdf")])
+
+    assert [info.title if info else None for info in results] == ["A Study", "Escalated", None]
+    chain, inputs, _ = large.abatch.await_args.args
+    assert chain == "large chain"
+    assert inputs == [{"content": "two"}, {"content": "three"}]
+    assert analyzer.analyzed == 3
+    assert analyzer.escalations == {"year": 1, "failed": 1}
+
+
+@pytest.mark.asyncio
+async def test_failed_escalation_keeps_the_first_answer():
+    small = MagicMock(create_chain=AsyncMock(), abatch=AsyncMock(return_value=[{**GOOD, "confidence": 0.1}]))
+    large = MagicMock(create_chain=AsyncMock(), abatch=AsyncMock(return_value=[TimeoutError("deadline")]))
+    with patch("gideon.agents.renamer.LLMServiceFactory.create", side_effect=[small, large]):
+        analyzer = DocumentAnalyzer(escalation_config={"model": "large"})
+
+    (info,) = await analyzer.analyze_batch([("one", "a.pdf")])
+
+    assert info.title == "A Study" and info.confidence == 0.1
+
+
+@pytest.mark.asyncio
+async def test_classify_batch_asks_the_llm_only_below_the_classifier_confidence():
+    classifier = MagicMock(trained=True)
+    classifier.predict.return_value = [("Mathematics", 0.8), ("Physics", 0.1)]
+    chain = MagicMock(ainvoke=AsyncMock(return_value={"topic": "Biology"}))
+    service = MagicMock(create_chain=AsyncMock(return_value=chain))
+    with patch("gideon.agents.renamer.LLMServiceFactory.create", return_value=service):
+        analyzer = DocumentAnalyzer(topic_classifier=classifier, classifier_confidence=0.5)
+
+    results = await analyzer.classify_batch(["Prime numbers", "Cooking for beginners", "  "])
+
+    assert results == [{"topic": "Mathematics"}, {"topic": "Biology"}, {"topic": UNKNOWN_TOPIC}]
+    classifier.predict.assert_called_once_with(["Prime numbers", "Cooking for beginners"])
+    chain.ainvoke.assert_awaited_once_with({"title": "Cooking for beginners"})
+    assert analyzer.classified_locally == 1
+
+
+@pytest.mark.asyncio
+async def test_analyze_batch_repairs_near_miss_topics():
+    service = MagicMock(
+        create_chain=AsyncMock(),
+        abatch=AsyncMock(return_value=[{**GOOD, "topic": "machine_learning"}, {**GOOD, "topic": "Astrology"}]),
+    )
+
+    results = await make_analyzer(service).analyze_batch([("one", "a.pdf"), ("two", "b.pdf")])
+
+    assert [info.topic for info in results] == ["Machine Learning", "Other"]
+
+
+@pytest.mark.asyncio
+async def test_classify_repairs_the_topic_without_asking_again():
+    chain = MagicMock(ainvoke=AsyncMock(return_value={"topic": "Comp Sci"}))
+    analyzer = make_analyzer(MagicMock(create_chain=AsyncMock(return_value=chain)))
+
+    assert await analyzer.classify("Operating systems") == {"topic": "Computer Science"}
+    chain.ainvoke.assert_awaited_once()
+
+
+@pytest.mark.asyncio
+async def test_the_topic_classifier_is_trained_once_when_a_title_first_needs_it():
+    classifier = MagicMock(trained=True)
+    classifier.predict.side_effect = lambda titles: [("Mathematics", 0.9)] * len(titles)
+    train = MagicMock(return_value=classifier)
+    with patch("gideon.agents.renamer.LLMServiceFactory.create", return_value=MagicMock()):
+        analyzer = DocumentAnalyzer(train_topic_classifier=train, classifier_confidence=0.5)
+
+    assert await analyzer.classify_batch([]) == []
+    train.assert_not_called()
+
+    results = await asyncio.gather(analyzer.classify_batch(["Prime numbers"]), analyzer.classify_batch(["Graphs"]))
+
+    assert results == [[{"topic": "Mathematics"}], [{"topic": "Mathematics"}]]
+    train.assert_called_once_with()
+    assert analyzer.topic_classifier is classifier
@@ -1,17 +1,26 @@
 import asyncio
+import contextlib
+import itertools
+import signal
 import time
 from pathlib import Path
+from typing import List, Optional, Set
 import typer
-from rich.console import Console
 from rich.progress import Progress
 
 from ...services.rename_service import RenameService
+from ...agents.classifier import TopicClassifier
 from ...services.file_service import FileService
+from ...services.extraction_cache import ExtractionCache
+from ...services.journal import RenameJournal
+from ...services.manifest import RENAMED, RenameManifest
+from ...services.pipeline import PipelineStats, RenamePipeline
+from ...services.plan import RenamePlanWriter, Shard, apply_plan, read_plans
 from ...core.config import settings
 from ...llm.factory import LLMServiceType
-from ...utils.logging import set_quiet_mode, flush_messages, log_info, log_error, log_success
+from ...utils.concurrency import AdaptiveLimiter
+from ...utils.logging import set_quiet_mode, flush_messages, log_info, log_error, log_success, log_warning
 
-console = Console()
 rename_app = typer.Typer(help="Renaming files using AI and other methods")
 
 
@@ -31,14 +40,122 @@ def rename_file(
         help="Temperature for LLM responses",
     ),
     max_concurrent: int = typer.Option(
-        3, 
-        "--concurrent", 
-        "-c", 
-        help="Maximum number of files to process concurrently",
+        settings.LLM_MAX_CONCURRENCY,
+        "--concurrent",
+        "-c",
+        help="Upper bound on the number of batches analyzed concurrently; the actual limit adapts to LLM latency",
+    ),
+    extract_workers: Optional[int] = typer.Option(
+        settings.EXTRACTION_WORKERS,
+        "--extract-workers",
+        "-w",
+        help="Number of processes used to extract PDF text (defaults to the number of CPU cores)",
+    ),
+    no_cache: bool = typer.Option(
+        not settings.EXTRACTION_CACHE_ENABLED,
+        "--no-cache",
+        help="Re-parse every PDF instead of reusing text cached from previous runs",
+    ),
+    batch_size: int = typer.Option(
+        settings.LLM_BATCH_SIZE,
+        "--batch-size",
+        "-b",
+        help="Number of documents submitted to the LLM together, spread over the server's parallel slots",
+    ),
+    llm_cache: bool = typer.Option(
+        settings.LLM_CACHE_ENABLED,
+        "--llm-cache/--no-llm-cache",
+        help="Reuse LLM responses stored by earlier runs for identical prompts",
+    ),
+    stream: bool = typer.Option(
+        settings.LLM_STREAMING,
+        "--stream/--no-stream",
+        help="Stream LLM responses and stop generating as soon as the JSON answer is complete",
+    ),
+    escalation_model: Optional[str] = typer.Option(
+        settings.LLM_ESCALATION_MODEL,
+        "--escalation-model",
+        help="Larger model that redoes analyses with a missing year or title, an invalid topic or low confidence",
+    ),
+    incremental: bool = typer.Option(
+        settings.RENAME_INCREMENTAL,
+        "--incremental/--full",
+        help="Skip files that an earlier run handled and that have not changed since",
+    ),
+    resume: bool = typer.Option(
+        False,
+        "--resume",
+        help="Continue an interrupted run: replay the renames it decided on and process only unfinished files",
+    ),
+    plan: Optional[Path] = typer.Option(
+        None,
+        "--plan",
+        help="Write the proposed renames to this JSONL file instead of renaming; execute it with `rename apply`",
+    ),
+    shard: Optional[str] = typer.Option(
+        None,
+        "--shard",
+        help="Process only shard i of n (e.g. 2/4), a deterministic subset of the files, to split a run over machines",
+    ),
+    endpoints: Optional[List[str]] = typer.Option(
+        None,
+        "--endpoint",
+        "-e",
+        help="LLM server URL; repeat with --llm-service-type pool to spread requests over several servers",
     ),
 ):
     """Rename files in a directory using AI analysis."""
-    asyncio.run(rename_files_with_ai(directory, llm_service_type, model, temperature, max_concurrent))
+    try:
+        selected_shard = Shard.parse(shard) if shard else None
+    except ValueError as e:
+        raise typer.BadParameter(str(e), param_hint="--shard")
+    if plan is not None and resume:
+        raise typer.BadParameter("a plan run changes no files, so there is nothing to resume", param_hint="--resume")
+    asyncio.run(
+        rename_files_with_ai(
+            directory,
+            llm_service_type,
+            model,
+            temperature,
+            max_concurrent,
+            extract_workers,
+            use_cache=not no_cache,
+            batch_size=batch_size,
+            llm_cache=llm_cache,
+            endpoints=endpoints,
+            stream=stream,
+            escalation_model=escalation_model,
+            incremental=incremental,
+            resume=resume,
+            plan=plan,
+            shard=selected_shard,
+        )
+    )
+
+
+@rename_app.command("apply")
+def apply_rename_plan(
+    directory: Path = typer.Argument(..., help="Directory the plans were made for"),
+    plans: List[Path] = typer.Argument(..., help="Plan files written by `rename auto --plan`; later plans win"),
+    dry_run: bool = typer.Option(False, "--dry-run", help="Check the plans against the files without renaming"),
+    incremental: bool = typer.Option(
+        settings.RENAME_INCREMENTAL,
+        "--incremental/--full",
+        help="Record the renamed files so later incremental runs skip them",
+    ),
+):
+    """Rename files as planned by one or more `rename auto --plan` runs."""
+    entries = read_plans(plans)
+    log_info(f"Applying {len(entries)} planned renames in {directory}")
+    manifest = RenameManifest.open(directory) if incremental and not dry_run else None
+    start_time = time.time()
+    try:
+        stats = apply_plan(directory, entries.values(), manifest, dry_run)
+    finally:
+        if manifest is not None:
+            manifest.close()
+    log_success(f"Plan applied in {time.time() - start_time:.2f} seconds")
+    log_info(f"Renamed: {stats.renamed}, Skipped: {stats.skipped}, Errors: {stats.errors}")
 
 
 async def rename_files_with_ai(
@@ -46,88 +163,200 @@ async def rename_files_with_ai(
     llm_service_type: LLMServiceType,
     model: str,
     temperature: float,
-    max_concurrent: int = 3,
+    max_concurrent: Optional[int] = None,
+    extract_workers: Optional[int] = None,
+    use_cache: bool = True,
+    batch_size: int = 1,
+    llm_cache: bool = False,
+    endpoints: Optional[List[str]] = None,
+    stream: bool = False,
+    escalation_model: Optional[str] = None,
+    incremental: bool = False,
+    resume: bool = False,
+    plan: Optional[Path] = None,
+    shard: Optional[Shard] = None,
 ):
     log_info(f"Renaming files in {directory} using AI...")
     log_info(f"Using LLM service type: {llm_service_type}, model: {model}, temperature: {temperature}")
 
     file_service = FileService()
-    console.print(file_service.create_directory_tree(directory))
 
-    files = file_service.get_files_by_extension(directory, ".pdf")
-    if not files:
+    # One walk feeds the whole run; its first file tells whether there is anything to rename
+    files = RenamePipeline.walk(directory)
+    first_file = next(files, None)
+    if first_file is None:
         log_error("No PDF files found in the directory.")
         return
-
-    log_info(f"Found {len(files)} PDF files to rename.")
+    files = itertools.chain([first_file], files)
 
     config = {
         "model": model,
         "temperature": temperature,
+        "response_cache": llm_cache,
+        "streaming": stream,
     }
-    rename_wizard = RenameService(llm_service_type=llm_service_type, service_config=config)
+    if endpoints and llm_service_type == LLMServiceType.POOL:
+        config["endpoints"] = endpoints
+    elif endpoints:
+        if len(endpoints) > 1:
+            log_warning(f"Only the first endpoint is used unless --llm-service-type is {LLMServiceType.POOL.value}")
+        config["base_url"] = endpoints[0]
+
+    def train_topic_classifier() -> Optional[TopicClassifier]:
+        # Files named by earlier runs teach the local classifier the topics of this library
+        classifier = TopicClassifier.from_filenames(file_path.name for file_path in RenamePipeline.walk(directory))
+        if classifier.examples < settings.TOPIC_CLASSIFIER_MIN_EXAMPLES:
+            return None
+        log_info(f"Trained the topic classifier on {classifier.examples} named files")
+        return classifier
+
+    rename_wizard = RenameService(
+        llm_service_type=llm_service_type,
+        service_config=config,
+        escalation_config={"model": escalation_model} if escalation_model else None,
+        # Only titles from embedded metadata need a topic of their own, so most runs never train it
+        train_topic_classifier=train_topic_classifier if settings.TOPIC_CLASSIFIER else None,
+    )
+    # Load the model while the first PDFs are being extracted
+    warm_up = asyncio.create_task(rename_wizard.document_analyzer.warm_up()) if settings.LLM_WARM_UP else None
     
-    semaphore = asyncio.Semaphore(max_concurrent)
+    llm_service = rename_wizard.document_analyzer.llm_service
+    # Pools report the slots of their healthy replicas, which change during the run
+    limiter = AdaptiveLimiter(
+        max_concurrent or settings.LLM_MAX_CONCURRENCY, parallel_slots=lambda: llm_service.parallel_slots
+    )
+    cache = ExtractionCache.open_default() if use_cache else None
+    # Plan runs change nothing in the directory, the manifest included; shards may share it over a network
+    manifest = RenameManifest.open(directory) if incremental and plan is None else None
+    # A plan run renames nothing, so there is nothing to journal
+    journal = RenameJournal.for_directory(directory) if plan is None else None
+    finished = resume_interrupted_run(journal, manifest) if resume and journal is not None else set()
+    if journal is not None:
+        journal.open(resume)
+    plan_writer = RenamePlanWriter(plan, directory) if plan is not None else None
+    if shard is not None:
+        log_info(f"Processing shard {shard.index} of {shard.count}")
+        files = (file_path for file_path in files if shard.contains(file_path.relative_to(directory)))
     
-    processed = 0
-    renamed = 0
-    skipped = 0
-    errors = 0
     start_time = time.time()
     
     set_quiet_mode(True)
     
-    with Progress() as progress:
-        task = progress.add_task("[cyan]Renaming files...", total=len(files))
+    with Progress() as progress, file_service.create_extraction_executor(extract_workers) as executor:
+        task = progress.add_task(f"[cyan]Renaming files (concurrency {limiter.limit})...", total=None)
         current_file_task = progress.add_task("[yellow]Processing:", total=None, visible=True)
 
-        async def process_file(file_path: Path) -> None:
-            nonlocal processed, renamed, skipped, errors
-            try:
-                async with semaphore:
-                    # Update the current file being processed
-                    progress.update(
-                        current_file_task, 
-                        description=f"[yellow]Processing: [bold]{file_path.name}[/bold]"
-                    )
-                    
-                    content = await file_service.extract_pdf_content(file_path)
-                    if not content:
-                        log_error(f"Could not extract content from {file_path.name}")
-                        errors += 1
-                        progress.update(task, advance=1)
-                        return
-
-                    new_name = await rename_wizard.rename_file(content, file_path.name)
-                    if not new_name:
-                        log_error(f"Could not generate new name for {file_path.name}")
-                        errors += 1
-                        progress.update(task, advance=1)
-                        return
-
-                    # Only rename if the new name is different from current name
-                    if new_name != file_path.name:
-                        file_service.rename_file(file_path, new_name)
-                        renamed += 1
-                    else:
-                        skipped += 1
-                    
-                processed += 1
-                progress.update(task, advance=1)
-            except Exception as e:
-                log_error(f"Error processing {file_path.name}: {str(e)}")
-                errors += 1
-                progress.update(task, advance=1)
-
-        tasks = [process_file(file_path) for file_path in files]
-        await asyncio.gather(*tasks)
-        
+        def update(stats: PipelineStats, current: Optional[str]) -> None:
+            # The total grows as the walker finds files
+            progress.update(
+                task,
+                total=stats.found,
+                completed=stats.finished,
+                description=f"[cyan]Renaming files (concurrency {limiter.limit})...",
+            )
+            if current:
+                progress.update(current_file_task, description=f"[yellow]Processing: [bold]{current}[/bold]")
+
+        pipeline = RenamePipeline(
+            rename_wizard,
+            file_service,
+            executor,
+            cache,
+            limiter,
+            batch_size=batch_size,
+            extract_workers=extract_workers,
+            on_update=update,
+            manifest=manifest,
+            journal=journal,
+            finished=finished,
+            plan=plan_writer,
+        )
+        run = asyncio.create_task(pipeline.run(files))
+        interrupted = False
+
+        def interrupt() -> None:
+            # Cancel in-flight LLM requests and extraction; finished work is already in the journal
+            nonlocal interrupted
+            interrupted = True
+            run.cancel()
+
+        loop = asyncio.get_running_loop()
+        with contextlib.suppress(NotImplementedError):
+            loop.add_signal_handler(signal.SIGINT, interrupt)
+        try:
+            stats = await run
+        except asyncio.CancelledError:
+            if not interrupted:
+                raise
+            stats = pipeline.stats
+        finally:
+            with contextlib.suppress(NotImplementedError):
+                loop.remove_signal_handler(signal.SIGINT)
+        if warm_up is not None:
+            if interrupted:
+                warm_up.cancel()
+            await asyncio.gather(warm_up, return_exceptions=True)
+
+    if cache is not None:
+        cache.close()
+    if manifest is not None:
+        manifest.close()
+    if journal is not None:
+        journal.close(completed=not interrupted)
+    if plan_writer is not None:
+        plan_writer.close()
+    analyzer = rename_wizard.document_analyzer
+    response_cache = analyzer.llm_service.response_cache
+    analyzer.close()
+
     set_quiet_mode(False)
     flush_messages()
     
     elapsed_time = time.time() - start_time
-    log_success(f"Processing completed in {elapsed_time:.2f} seconds")
+    if interrupted:
+        log_warning(
+            f"Interrupted after {elapsed_time:.2f} seconds; "
+            + ("the plan is incomplete" if plan_writer is not None else "run again with --resume to continue")
+        )
+    else:
+        log_success(f"Processing completed in {elapsed_time:.2f} seconds")
     log_info(
-        f"Total files: {len(files)}, Processed: {processed}, "
-        f"Renamed: {renamed}, Skipped: {skipped}, Errors: {errors}"
+        f"Total files: {stats.found}, Processed: {stats.processed}, "
+        f"Renamed: {stats.renamed}, Skipped: {stats.skipped}, Errors: {stats.errors}"
     )
+    if plan_writer is not None:
+        log_info(f"Planned {stats.planned} renames in {plan}; review it, then run `gideon rename apply`")
+    if manifest is not None:
+        log_info(f"Unchanged since the last run: {stats.unchanged}")
+    if resume:
+        log_info(f"Already finished by the interrupted run: {stats.resumed}")
+    if response_cache is not None:
+        log_info(f"LLM response cache: {response_cache.hits} hits, {response_cache.misses} misses")
+    if analyzer.topic_classifier is not None:
+        log_info(f"Topic classifier: {analyzer.classified_locally} titles classified without the LLM")
+    if analyzer.escalation_service is not None:
+        reasons = ", ".join(f"{reason}: {count}" for reason, count in analyzer.escalations.most_common())
+        log_info(
+            f"Escalated {sum(analyzer.escalations.values())} of {analyzer.analyzed} analyses "
+            f"to {escalation_model}" + (f" ({reasons})" if reasons else "")
+        )
+    if warm_up is not None and not warm_up.cancelled() and warm_up.exception() is None and not warm_up.result():
+        log_warning("LLM warm-up failed, so the first batches waited for the model to load; see the warning above")
+    if interrupted:
+        raise typer.Exit(130)
+
+
+def resume_interrupted_run(journal: RenameJournal, manifest: Optional[RenameManifest]) -> Set[Path]:
+    """Replay the renames an interrupted run decided on and return the files it finished."""
+    if not journal.exists():
+        log_warning("No interrupted run to resume; processing every file")
+        return set()
+    state = journal.load()
+    replayed = journal.replay(state)
+    for source, target in replayed:
+        log_success(f"Replayed: {source.name} -> {target.name}")
+        if manifest is not None:
+            manifest.forget(source)
+            manifest.record(target, RENAMED)
+    log_info(f"Resuming: {len(replayed)} renames replayed, {len(state.finished)} files already finished")
+    return {journal.root / path for path in state.finished}
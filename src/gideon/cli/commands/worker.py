@@ -0,0 +1,135 @@
+import asyncio
+import time
+from pathlib import Path
+from typing import List, Optional
+import typer
+from rich.console import Console
+from rich.table import Table
+
+from ...services.extraction_cache import ExtractionCache
+from ...services.file_service import FileService
+from ...services.job_queue import JobQueue
+from ...services.manifest import RenameManifest
+from ...services.pipeline import RenamePipeline
+from ...services.rename_service import RenameService
+from ...services.worker import RenameWorker
+from ...validators.filename_validator import FilenameValidator
+from ...core.config import settings
+from ...llm.factory import LLMServiceType
+from ...utils.logging import log_info, log_success
+
+console = Console()
+worker_app = typer.Typer(help="Rename a directory with any number of worker processes sharing a job queue")
+
+
+@worker_app.command("enqueue")
+def enqueue_files(
+    directory: Path = typer.Argument(..., help="Directory containing files for rename"),
+    incremental: bool = typer.Option(
+        settings.RENAME_INCREMENTAL,
+        "--incremental/--full",
+        help="Leave out files that an earlier `rename auto` run handled and that have not changed since",
+    ),
+):
+    """Queue the PDFs of a directory that need renaming."""
+    manifest = RenameManifest.open(directory) if incremental else None
+    files = (
+        file_path
+        for file_path in RenamePipeline.walk(directory)
+        if not FilenameValidator.is_valid_format(file_path.name)
+        and not (manifest is not None and manifest.is_unchanged(file_path))
+    )
+    queue = JobQueue.open(directory)
+    added = queue.enqueue(files)
+    counts = queue.counts()
+    queue.close()
+    if manifest is not None:
+        manifest.close()
+    log_success(f"Queued {added} files; {counts['pending']} pending in {queue.path}")
+
+
+@worker_app.command("run")
+def run_worker(
+    directory: Path = typer.Argument(..., help="Directory whose queue to work on"),
+    llm_service_type: LLMServiceType = typer.Option(
+        settings.DEFAULT_LLM_SERVICE_TYPE,
+        help="Type of LLM to use for analysis",
+    ),
+    model: str = typer.Option(
+        settings.DEFAULT_LLM_CONFIG["model"],
+        help="Model name to use",
+    ),
+    temperature: float = typer.Option(
+        settings.DEFAULT_LLM_CONFIG["temperature"],
+        help="Temperature for LLM responses",
+    ),
+    batch_size: int = typer.Option(
+        settings.LLM_BATCH_SIZE,
+        "--batch-size",
+        "-b",
+        help="Number of jobs leased and submitted to the LLM together",
+    ),
+    extract_workers: Optional[int] = typer.Option(
+        settings.EXTRACTION_WORKERS,
+        "--extract-workers",
+        "-w",
+        help="Number of processes used to extract PDF text (defaults to the number of CPU cores)",
+    ),
+    no_cache: bool = typer.Option(
+        not settings.EXTRACTION_CACHE_ENABLED,
+        "--no-cache",
+        help="Re-parse every PDF instead of reusing text cached from previous runs",
+    ),
+    wait: bool = typer.Option(
+        False,
+        "--wait",
+        help="Keep polling for new jobs instead of exiting when the queue is drained",
+    ),
+    endpoints: Optional[List[str]] = typer.Option(
+        None,
+        "--endpoint",
+        "-e",
+        help="LLM server URL for this worker",
+    ),
+):
+    """Work on a directory's queue until it is drained; start as many as the LLM servers can serve."""
+    config = {"model": model, "temperature": temperature}
+    if endpoints and llm_service_type == LLMServiceType.POOL:
+        config["endpoints"] = endpoints
+    elif endpoints:
+        config["base_url"] = endpoints[0]
+    rename_service = RenameService(llm_service_type=llm_service_type, service_config=config)
+    queue = JobQueue.open(directory)
+    cache = ExtractionCache.open_default() if not no_cache else None
+    start_time = time.time()
+    with FileService.create_extraction_executor(extract_workers) as executor:
+        worker = RenameWorker(queue, rename_service, executor=executor, cache=cache, batch_size=batch_size)
+        log_info(f"Worker {worker.worker_id} started on {queue.path}")
+        try:
+            stats = asyncio.run(worker.run(wait))
+        except KeyboardInterrupt:
+            # The jobs in progress were handed back to the queue for the other workers
+            stats = worker.stats
+        finally:
+            queue.close()
+            if cache is not None:
+                cache.close()
+            rename_service.document_analyzer.close()
+    log_success(f"Worker {worker.worker_id} stopped after {time.time() - start_time:.2f} seconds")
+    log_info(
+        f"Processed: {stats.processed}, Renamed: {stats.renamed}, Skipped: {stats.skipped}, "
+        f"Errors: {stats.errors}, Lost leases: {stats.lost}"
+    )
+
+
+@worker_app.command("status")
+def queue_status(directory: Path = typer.Argument(..., help="Directory whose queue to show")):
+    """Show how many jobs of a directory's queue are pending, leased, done and failed."""
+    queue = JobQueue.open(directory)
+    table = Table(title=f"Rename jobs in {directory}")
+    table.add_column("Status")
+    table.add_column("Jobs", justify="right")
+    for status, count in queue.counts().items():
+        table.add_row(status, str(count))
+    queue.close()
+    console.print(table)
@@ -2,6 +2,7 @@ import typer
 from .commands.rename import rename_app
 from .commands.remove_duplicates import remove_duplicates_app
 from .commands.organize import organize_app
+from .commands.worker import worker_app
 
 app = typer.Typer(
     help="Gideon CLI - AI-powered Personal Assistant",
@@ -15,5 +16,7 @@ app.add_typer(remove_duplicates_app, name="remove-duplicates", help="Remove dupl
 
 # Organization commands
 app.add_typer(organize_app, name="organize", help="Organize files into folders based on AI analysis")
+# Distributed renaming
+app.add_typer(worker_app, name="worker", help="Rename files with several workers sharing a job queue")
 if __name__ == "__main__":
     app()
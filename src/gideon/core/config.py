@@ -19,10 +19,97 @@ class GideonSettings(BaseSettings):
     DEFAULT_LLM_SERVICE_TYPE: str = Field(default="ollama")
     DEFAULT_LLM_MODEL: str = Field(default="deepseek-r1:latest")
     DEFAULT_LLM_TEMPERATURE: float = Field(default=0.1)
+    LLM_BATCH_SIZE: int = Field(default=8)
+    # Capacity of each queue between the walk, extraction, LLM and rename stages of `rename auto`
+    PIPELINE_QUEUE_SIZE: int = Field(default=64)
+    # Record every processed file in a manifest in the renamed directory and skip unchanged files on later runs
+    RENAME_INCREMENTAL: bool = Field(default=True)
+    MANIFEST_FILENAME: str = Field(default=".gideon-manifest.sqlite")
+    # Write-ahead log of analyses and renames kept while a run is in progress, for --resume
+    JOURNAL_FILENAME: str = Field(default=".gideon-journal.jsonl")
+    # Job queue shared by `gideon worker run` processes: a worker holds a job for WORKER_LEASE_SECONDS
+    # past its last heartbeat, and a job is given up on after WORKER_MAX_ATTEMPTS leases
+    WORKER_QUEUE_FILENAME: str = Field(default=".gideon-queue.sqlite")
+    WORKER_LEASE_SECONDS: float = Field(default=120.0)
+    WORKER_MAX_ATTEMPTS: int = Field(default=3)
+    # Margin for clock differences between hosts before an expired lease is taken over
+    WORKER_CLOCK_SKEW: float = Field(default=30.0)
+    WORKER_POLL_INTERVAL: float = Field(default=2.0)
+    # Upper bound of the adaptive number of batches analyzed at once
+    LLM_MAX_CONCURRENCY: int = Field(default=16)
+    # Constrain LLM output to the expected JSON schema (Ollama format, OpenAI response_format)
+    LLM_STRUCTURED_OUTPUT: bool = Field(default=True)
+    # Stream responses and stop generating once the JSON object is complete
+    LLM_STREAMING: bool = Field(default=False)
+    # Cap on generated tokens per request, reasoning included (Ollama num_predict, OpenAI max_tokens)
+    LLM_MAX_OUTPUT_TOKENS: Optional[int] = Field(default=1024)
+    # Deadline of one LLM call, retries with jittered exponential backoff, and the circuit breaker
+    # that stops calling an endpoint after consecutive failures (0 disables it)
+    LLM_REQUEST_TIMEOUT: Optional[float] = Field(default=180.0)
+    LLM_MAX_RETRIES: int = Field(default=2)
+    LLM_RETRY_BACKOFF: float = Field(default=0.5)
+    LLM_RETRY_BACKOFF_MAX: float = Field(default=10.0)
+    LLM_CIRCUIT_BREAKER_FAILURES: int = Field(default=5)
+    LLM_CIRCUIT_BREAKER_RESET: float = Field(default=30.0)
+    # Larger model that redoes analyses failing the checks (empty year, unknown title, invalid topic,
+    # self-reported confidence below LLM_ESCALATION_CONFIDENCE)
+    LLM_ESCALATION_MODEL: Optional[str] = Field(default=None)
+    LLM_ESCALATION_CONFIDENCE: float = Field(default=0.6)
+    # Load the model and prefill the static prompt prefix when a run starts
+    LLM_WARM_UP: bool = Field(default=True)
+    OLLAMA_KEEP_ALIVE: Optional[str] = Field(default="30m")
+
+    # LLM endpoints and HTTP connection pooling
+    OLLAMA_BASE_URL: str = Field(default="http://127.0.0.1:11434")
+    AI_DOCKER_MODEL_BASE_URL: str = Field(default="http://127.0.0.1:12434/engines/v1")
+    LLM_MAX_CONNECTIONS: int = Field(default=32)
+    LLM_KEEPALIVE_EXPIRY: float = Field(default=60.0)
+    LLM_TIMEOUT: float = Field(default=300.0)
+    LLM_CONNECT_TIMEOUT: float = Field(default=10.0)
+
+    # Replicas of the "pool" LLM service
+    LLM_POOL_BACKEND: str = Field(default="ollama")
+    LLM_POOL_ENDPOINTS: List[str] = Field(default_factory=list)
+    LLM_POOL_FAILURE_THRESHOLD: int = Field(default=3)
+    LLM_POOL_COOLDOWN: float = Field(default=30.0)
+    # Send a duplicate request to a second replica when a call outlasts this quantile of recent latencies
+    LLM_HEDGE: bool = Field(default=False)
+    LLM_HEDGE_QUANTILE: float = Field(default=0.95)
+    OLLAMA_NUM_PARALLEL: int = Field(default=1)
+    AI_DOCKER_MODEL_PARALLEL: int = Field(default=1)
+
+    # Offline "stub" LLM service for load testing: log-normal latency around STUB_LLM_LATENCY seconds,
+    # occasional stalls, failures and malformed output
+    STUB_LLM_LATENCY: float = Field(default=0.05)
+    STUB_LLM_LATENCY_SIGMA: float = Field(default=0.5)
+    STUB_LLM_STALL_RATE: float = Field(default=0.0)
+    STUB_LLM_STALL_LATENCY: float = Field(default=30.0)
+    STUB_LLM_FAILURE_RATE: float = Field(default=0.0)
+    STUB_LLM_MALFORMED_RATE: float = Field(default=0.0)
+    STUB_LLM_SEED: Optional[int] = Field(default=None)
+    STUB_LLM_PARALLEL: int = Field(default=8)
     
     # File processing
     MAX_CONTENT_LENGTH: int = Field(default=500000)
+    MAX_PROMPT_TOKENS: int = Field(default=800)
     MAX_PDF_PAGES: int = Field(default=5)
+    MAX_EXTRACT_CHARS: int = Field(default=12000)
+    LAZY_PDF_OPEN: bool = Field(default=True)
+    EXTRACTION_WORKERS: Optional[int] = Field(default=None)
+    USE_EMBEDDED_METADATA: bool = Field(default=True)
+    # Classify titles in-process, trained on the already named files, and ask the LLM only when the
+    # best topic is less similar than TOPIC_CLASSIFIER_CONFIDENCE
+    TOPIC_CLASSIFIER: bool = Field(default=True)
+    TOPIC_CLASSIFIER_CONFIDENCE: float = Field(default=0.25)
+    TOPIC_CLASSIFIER_MIN_EXAMPLES: int = Field(default=20)
+
+    # Caches
+    CACHE_DIR: Path = Field(default=Path.home() / ".cache" / "gideon")
+    EXTRACTION_CACHE_ENABLED: bool = Field(default=True)
+    EXTRACTION_CACHE_MAX_BYTES: int = Field(default=512 * 1024 * 1024)
+    LLM_CACHE_ENABLED: bool = Field(default=False)
+    LLM_CACHE_TTL: int = Field(default=30 * 24 * 3600)
+    LLM_CACHE_MAX_ENTRIES: int = Field(default=100000)
     SUPPORTED_EXTENSIONS: List[str] = Field(default=[".pdf"])
     
     @property
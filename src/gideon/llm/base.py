@@ -1,17 +1,223 @@
-from abc import ABC, abstractmethod
-from typing import Any, Dict, Optional
+import asyncio
+from abc import ABC
+from typing import Any, Dict, List, Optional, Tuple
+from langchain_core.language_models import BaseChatModel
+from langchain_core.messages import AIMessage
+from langchain_core.prompt_values import PromptValue
 from langchain_core.prompts import PromptTemplate
 from langchain_core.output_parsers import BaseOutputParser
+from langchain_core.runnables import Runnable, RunnableLambda
+from .cache import ResponseCache, template_fingerprint
+from .resilience import CircuitBreaker, resilient
+from ..core.config import settings
+from ..models.schema import schema_key
+from ..utils.logging import log_warning
+from ..utils.parsers import JsonObjectScanner
 
 
 class BaseLLMService(ABC):
+    llm: BaseChatModel
+
     def __init__(self, config: Optional[Dict[str, Any]] = None):
         self.config = config or {}
+        # One runnable per prompt/parser/schema; the objects are kept so their ids stay unique
+        self._chains: Dict[Tuple[int, int, int], Tuple[Any, ...]] = {}
+        self._structured_models: Dict[str, Runnable] = {}
+        self.response_cache: Optional[ResponseCache] = (
+            ResponseCache.open_default() if self.config.get("response_cache") else None
+        )
+        failures = self.config.get("circuit_breaker_failures", settings.LLM_CIRCUIT_BREAKER_FAILURES)
+        self.circuit_breaker: Optional[CircuitBreaker] = (
+            CircuitBreaker(failures, self.config.get("circuit_breaker_reset", settings.LLM_CIRCUIT_BREAKER_RESET))
+            if failures
+            else None
+        )
 
-    @abstractmethod
     async def create_chain(
         self,
         prompt: PromptTemplate,
         output_parser: Optional[BaseOutputParser] = None,
-    ):
-        pass
+        schema: Optional[Dict[str, Any]] = None,
+    ) -> Runnable:
+        """Return the chain for a prompt/parser pair, building it only on first use.
+
+        With a JSON schema, the model is constrained to output matching the schema.
+        """
+        key = (id(prompt), id(output_parser), id(schema))
+        if key not in self._chains:
+            self._chains[key] = (prompt, output_parser, schema, self._build_chain(prompt, output_parser, schema))
+        return self._chains[key][-1]
+
+    def structured_model(self, schema: Dict[str, Any]) -> Runnable:
+        """The model constrained to emit JSON matching the schema, or the plain model if disabled."""
+        if not self.config.get("structured_output", settings.LLM_STRUCTURED_OUTPUT):
+            return self.llm
+        key = schema_key(schema)
+        if key not in self._structured_models:
+            self._structured_models[key] = self._bind_schema(schema)
+        return self._structured_models[key]
+
+    @property
+    def http_options(self) -> Dict[str, Any]:
+        """Connection pool and timeout settings for the backend's HTTP client."""
+        return {
+            "max_connections": self.config.get("max_connections", settings.LLM_MAX_CONNECTIONS),
+            "keepalive_expiry": self.config.get("keepalive_expiry", settings.LLM_KEEPALIVE_EXPIRY),
+            "timeout": self.config.get("timeout", settings.LLM_TIMEOUT),
+            "connect_timeout": self.config.get("connect_timeout", settings.LLM_CONNECT_TIMEOUT),
+        }
+
+    @property
+    def parallel_slots(self) -> int:
+        """Number of requests the inference server processes in parallel."""
+        return max(1, self.config.get("parallel_slots") or 1)
+
+    async def abatch(
+        self,
+        chain: Runnable,
+        inputs: List[Dict[str, Any]],
+        max_concurrency: Optional[int] = None,
+    ) -> List[Any]:
+        """Run a chain over many inputs, keeping up to max_concurrency requests in flight.
+
+        Defaults to the server's parallel slots. Failed inputs yield their exception in place of a result.
+        """
+        if not inputs:
+            return []
+        results = await chain.abatch(
+            inputs,
+            config={"max_concurrency": max_concurrency or self.parallel_slots},
+            return_exceptions=True,
+        )
+        # return_exceptions also captures the cancellation of the caller, which must not pass for a failure
+        for result in results:
+            if isinstance(result, asyncio.CancelledError):
+                raise result
+        return results
+
+    async def warm_up(self, prompt: Any = "ping") -> bool:
+        """Load the model on the server and prefill the prompt, generating a single token.
+
+        Send the static prefix of a real prompt so later requests get prefix cache hits.
+        Failures are logged rather than raised; the run proceeds and pays the load on first use.
+        """
+        try:
+            await self._warm_up_model().ainvoke(prompt)
+            return True
+        except Exception as e:
+            log_warning(f"LLM warm-up failed: {str(e)}")
+            return False
+
+    def _warm_up_model(self) -> Runnable:
+        return self.llm
+
+    def close(self) -> None:
+        if self.response_cache is not None:
+            self.response_cache.close()
+
+    def model_step(self, schema: Optional[Dict[str, Any]] = None) -> Runnable:
+        """The chain step that calls the model: constrained to the schema, streamed if configured,
+        and guarded by the per-call deadline, retries and circuit breaker."""
+        model = self.structured_model(schema) if schema else self.llm
+        if self.config.get("streaming", settings.LLM_STREAMING):
+            model = self._streaming_model(model)
+        return self._resilient(model, self.config.get("request_timeout", settings.LLM_REQUEST_TIMEOUT))
+
+    def _resilient(self, model: Runnable, timeout: Optional[float]) -> Runnable:
+        return resilient(
+            model,
+            timeout=timeout,
+            max_retries=self.config.get("max_retries", settings.LLM_MAX_RETRIES),
+            backoff_base=self.config.get("retry_backoff", settings.LLM_RETRY_BACKOFF),
+            backoff_cap=settings.LLM_RETRY_BACKOFF_MAX,
+            breaker=self.circuit_breaker,
+        )
+
+    def _bind_schema(self, schema: Dict[str, Any]) -> Runnable:
+        """Bind a JSON schema to the model. Backends without constrained decoding return the model unchanged."""
+        return self.llm
+
+    @staticmethod
+    def _streaming_model(model: Runnable) -> Runnable:
+        """Stream the response and stop generating once the first JSON object is complete.
+
+        Closing the stream drops the request, so the server stops spending tokens on whatever
+        would follow the object. Without a complete object the whole response is returned.
+        """
+
+        def invoke(prompt_value: PromptValue) -> AIMessage:
+            scanner = JsonObjectScanner()
+            for chunk in model.stream(prompt_value):
+                if isinstance(chunk.content, str) and scanner.feed(chunk.content) is not None:
+                    break
+            return AIMessage(content=scanner.object_text or scanner.text)
+
+        async def ainvoke(prompt_value: PromptValue) -> AIMessage:
+            scanner = JsonObjectScanner()
+            stream = model.astream(prompt_value)
+            try:
+                async for chunk in stream:
+                    if isinstance(chunk.content, str) and scanner.feed(chunk.content) is not None:
+                        break
+            finally:
+                await stream.aclose()
+            return AIMessage(content=scanner.object_text or scanner.text)
+
+        return RunnableLambda(invoke, afunc=ainvoke, name="StreamingChatModel")
+
+    def _build_chain(
+        self,
+        prompt: PromptTemplate,
+        output_parser: Optional[BaseOutputParser] = None,
+        schema: Optional[Dict[str, Any]] = None,
+    ) -> Runnable:
+        model = self.model_step(schema)
+        if self.response_cache is not None:
+            return prompt | self._cached_model(prompt, model, output_parser, schema_key(schema) if schema else "")
+        chain = prompt | model
+        if output_parser:
+            chain = chain | output_parser
+        return chain
+
+    def _cached_model(
+        self,
+        prompt: PromptTemplate,
+        model: Runnable,
+        output_parser: Optional[BaseOutputParser] = None,
+        extra: str = "",
+    ) -> Runnable:
+        """Model and parser steps answered from the response cache.
+
+        Only responses the parser accepts are stored, so a malformed answer is retried rather than replayed.
+        """
+        cache = self.response_cache
+        fingerprint = template_fingerprint(prompt)
+
+        def cache_key(prompt_value: PromptValue) -> str:
+            return ResponseCache.make_key(
+                str(self.config.get("model", "")),
+                self.config.get("temperature", 0.0),
+                prompt_value.to_string(),
+                fingerprint,
+                extra,
+            )
+
+        def invoke(prompt_value: PromptValue) -> Any:
+            key = cache_key(prompt_value)
+            cached = cache.get(key)
+            message = AIMessage(content=cached) if cached is not None else model.invoke(prompt_value)
+            result = output_parser.invoke(message) if output_parser else message
+            if cached is None and isinstance(message.content, str):
+                cache.put(key, message.content)
+            return result
+
+        async def ainvoke(prompt_value: PromptValue) -> Any:
+            key = cache_key(prompt_value)
+            cached = cache.get(key)
+            message = AIMessage(content=cached) if cached is not None else await model.ainvoke(prompt_value)
+            result = await output_parser.ainvoke(message) if output_parser else message
+            if cached is None and isinstance(message.content, str):
+                cache.put(key, message.content)
+            return result
+
+        return RunnableLambda(invoke, afunc=ainvoke, name="CachedChatModel")
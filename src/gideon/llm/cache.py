@@ -0,0 +1,87 @@
+"""Persistent cache of LLM responses."""
+import hashlib
+import sqlite3
+import time
+from pathlib import Path
+from typing import Optional
+from langchain_core.prompts import BasePromptTemplate
+from ..core.config import settings
+
+
+def template_fingerprint(prompt: BasePromptTemplate) -> str:
+    """Hash a prompt template, so editing a prompt invalidates the responses cached for it."""
+    template = getattr(prompt, "template", None) or repr(prompt)
+    partials = sorted((key, str(value)) for key, value in prompt.partial_variables.items())
+    return hashlib.sha256(f"{template}\x00{partials}".encode("utf-8")).hexdigest()
+
+
+class ResponseCache:
+    """A SQLite cache of raw model responses with a TTL and an entry cap.
+
+    Entries are keyed by model, temperature, the fully rendered prompt and the template fingerprint.
+    """
+
+    def __init__(self, path: Path, ttl_seconds: int, max_entries: int):
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._connection = sqlite3.connect(str(path), check_same_thread=False)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute(
+            "CREATE TABLE IF NOT EXISTS responses ("
+            "key TEXT PRIMARY KEY, response TEXT NOT NULL, created REAL NOT NULL, last_access REAL NOT NULL)"
+        )
+        self._connection.execute("CREATE INDEX IF NOT EXISTS responses_last_access ON responses (last_access)")
+        self._connection.commit()
+        self._entries = len(self)
+
+    @classmethod
+    def open_default(cls) -> "ResponseCache":
+        return cls(settings.CACHE_DIR / "responses.sqlite", settings.LLM_CACHE_TTL, settings.LLM_CACHE_MAX_ENTRIES)
+
+    @staticmethod
+    def make_key(model: str, temperature: float, prompt: str, fingerprint: str, extra: str = "") -> str:
+        payload = "\x00".join([model, repr(float(temperature)), fingerprint, extra, prompt])
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> Optional[str]:
+        row = self._connection.execute("SELECT response, created FROM responses WHERE key = ?", (key,)).fetchone()
+        now = time.time()
+        if row is None or now - row[1] > self.ttl_seconds:
+            if row is not None:
+                self._connection.execute("DELETE FROM responses WHERE key = ?", (key,))
+                self._connection.commit()
+                self._entries -= 1
+            self.misses += 1
+            return None
+        self._connection.execute("UPDATE responses SET last_access = ? WHERE key = ?", (now, key))
+        self._connection.commit()
+        self.hits += 1
+        return row[0]
+
+    def put(self, key: str, response: str) -> None:
+        now = time.time()
+        exists = self._connection.execute("SELECT 1 FROM responses WHERE key = ?", (key,)).fetchone()
+        self._connection.execute(
+            "INSERT OR REPLACE INTO responses (key, response, created, last_access) VALUES (?, ?, ?, ?)",
+            (key, response, now, now),
+        )
+        if not exists:
+            self._entries += 1
+        overflow = self._entries - self.max_entries
+        if overflow > 0:
+            self._connection.execute(
+                "DELETE FROM responses WHERE key IN (SELECT key FROM responses ORDER BY last_access LIMIT ?)",
+                (overflow,),
+            )
+            self._entries -= overflow
+        self._connection.commit()
+
+    def __len__(self) -> int:
+        return self._connection.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+
+    def close(self) -> None:
+        self._connection.close()
@@ -1,9 +1,8 @@
 from typing import Any, Dict, Optional
+from langchain_core.runnables import Runnable
 from langchain_openai import ChatOpenAI
-from langchain_core.output_parsers import BaseOutputParser
-from langchain_core.prompts import PromptTemplate
-from langchain_core.runnables import RunnableSequence
 from .base import BaseLLMService
+from .http import shared_async_client
 from ..core.config import settings
 
 
@@ -13,17 +12,23 @@ class AiDockerModelService(BaseLLMService):
 
         self.llm = ChatOpenAI(
             model=self.config.get("model", settings.DEFAULT_LLM_CONFIG["model"]),
-            base_url="http://127.0.0.1:12434/engines/v1",
+            base_url=self.config.get("base_url", settings.AI_DOCKER_MODEL_BASE_URL),
             temperature=self.config.get("temperature", settings.DEFAULT_LLM_CONFIG["temperature"]),
-            api_key="ignored"
+            api_key="ignored",
+            max_tokens=self.config.get("max_output_tokens", settings.LLM_MAX_OUTPUT_TOKENS),
+            http_async_client=shared_async_client(self.http_options),
+            # llama.cpp keeps the KV cache of the previous prompt in each slot and reuses the common prefix
+            extra_body={"cache_prompt": True},
         )
 
-    async def create_chain(
-        self,
-        prompt: PromptTemplate,
-        output_parser: Optional[BaseOutputParser] = None,
-    ) -> RunnableSequence:
-        chain = prompt | self.llm
-        if output_parser:
-            chain = chain | output_parser
-        return chain
+    def _bind_schema(self, schema: Dict[str, Any]) -> Runnable:
+        # llama.cpp compiles the schema into a grammar, so decoding starts at the opening brace
+        return self.llm.bind(
+            response_format={
+                "type": "json_schema",
+                "json_schema": {"name": "gideon_output", "schema": schema, "strict": True},
+            }
+        )
+
+    def _warm_up_model(self) -> Runnable:
+        return self.llm.bind(max_tokens=1)
@@ -1,36 +1,134 @@
 from enum import Enum
-from typing import Dict, Any, Optional, Type
-from pydantic import BaseModel
+from typing import Dict, Any, List, Optional, Type
+from pydantic import BaseModel, Field, field_validator
 
 from .base import BaseLLMService
 from .ollama import OllamaService
 from .dockerai import AiDockerModelService
+from .pool import PooledLLMService
+from .stub import StubLLMService
+from ..core.config import settings
 
 
 class LLMServiceType(str, Enum):
     OLLAMA = "ollama"
     AI_DOCKER_MODEL = "docker-model"
+    POOL = "pool"
+    STUB = "stub"
 
 
 class OllamaConfig(BaseModel):
     model: str
     temperature: float = 0.1
+    base_url: str = Field(default_factory=lambda: settings.OLLAMA_BASE_URL)
+    max_connections: int = Field(default_factory=lambda: settings.LLM_MAX_CONNECTIONS)
+    keepalive_expiry: float = Field(default_factory=lambda: settings.LLM_KEEPALIVE_EXPIRY)
+    timeout: float = Field(default_factory=lambda: settings.LLM_TIMEOUT)
+    connect_timeout: float = Field(default_factory=lambda: settings.LLM_CONNECT_TIMEOUT)
+    # How long the server keeps the model loaded after a request ("30m", "-1" for ever)
+    keep_alive: Optional[str] = Field(default_factory=lambda: settings.OLLAMA_KEEP_ALIVE)
+    # Should match OLLAMA_NUM_PARALLEL on the server
+    parallel_slots: int = Field(default_factory=lambda: settings.OLLAMA_NUM_PARALLEL)
+    response_cache: bool = Field(default_factory=lambda: settings.LLM_CACHE_ENABLED)
+    structured_output: bool = Field(default_factory=lambda: settings.LLM_STRUCTURED_OUTPUT)
+    streaming: bool = Field(default_factory=lambda: settings.LLM_STREAMING)
+    max_output_tokens: Optional[int] = Field(default_factory=lambda: settings.LLM_MAX_OUTPUT_TOKENS)
+    request_timeout: Optional[float] = Field(default_factory=lambda: settings.LLM_REQUEST_TIMEOUT)
+    max_retries: int = Field(default_factory=lambda: settings.LLM_MAX_RETRIES)
+    retry_backoff: float = Field(default_factory=lambda: settings.LLM_RETRY_BACKOFF)
+    circuit_breaker_failures: int = Field(default_factory=lambda: settings.LLM_CIRCUIT_BREAKER_FAILURES)
+    circuit_breaker_reset: float = Field(default_factory=lambda: settings.LLM_CIRCUIT_BREAKER_RESET)
 
 
 class AiDockerModelConfig(BaseModel):
     model: str
     temperature: float = 0.1
+    base_url: str = Field(default_factory=lambda: settings.AI_DOCKER_MODEL_BASE_URL)
+    max_connections: int = Field(default_factory=lambda: settings.LLM_MAX_CONNECTIONS)
+    keepalive_expiry: float = Field(default_factory=lambda: settings.LLM_KEEPALIVE_EXPIRY)
+    timeout: float = Field(default_factory=lambda: settings.LLM_TIMEOUT)
+    connect_timeout: float = Field(default_factory=lambda: settings.LLM_CONNECT_TIMEOUT)
+    # Parallel slots of the OpenAI-compatible server (llama.cpp --parallel)
+    parallel_slots: int = Field(default_factory=lambda: settings.AI_DOCKER_MODEL_PARALLEL)
+    response_cache: bool = Field(default_factory=lambda: settings.LLM_CACHE_ENABLED)
+    structured_output: bool = Field(default_factory=lambda: settings.LLM_STRUCTURED_OUTPUT)
+    streaming: bool = Field(default_factory=lambda: settings.LLM_STREAMING)
+    max_output_tokens: Optional[int] = Field(default_factory=lambda: settings.LLM_MAX_OUTPUT_TOKENS)
+    request_timeout: Optional[float] = Field(default_factory=lambda: settings.LLM_REQUEST_TIMEOUT)
+    max_retries: int = Field(default_factory=lambda: settings.LLM_MAX_RETRIES)
+    retry_backoff: float = Field(default_factory=lambda: settings.LLM_RETRY_BACKOFF)
+    circuit_breaker_failures: int = Field(default_factory=lambda: settings.LLM_CIRCUIT_BREAKER_FAILURES)
+    circuit_breaker_reset: float = Field(default_factory=lambda: settings.LLM_CIRCUIT_BREAKER_RESET)
+
+
+class StubConfig(BaseModel):
+    model: str = "stub"
+    temperature: float = 0.1
+    latency: float = Field(default_factory=lambda: settings.STUB_LLM_LATENCY)
+    latency_sigma: float = Field(default_factory=lambda: settings.STUB_LLM_LATENCY_SIGMA)
+    stall_rate: float = Field(default_factory=lambda: settings.STUB_LLM_STALL_RATE, ge=0.0, le=1.0)
+    stall_latency: float = Field(default_factory=lambda: settings.STUB_LLM_STALL_LATENCY)
+    failure_rate: float = Field(default_factory=lambda: settings.STUB_LLM_FAILURE_RATE, ge=0.0, le=1.0)
+    malformed_rate: float = Field(default_factory=lambda: settings.STUB_LLM_MALFORMED_RATE, ge=0.0, le=1.0)
+    seed: Optional[int] = Field(default_factory=lambda: settings.STUB_LLM_SEED)
+    parallel_slots: int = Field(default_factory=lambda: settings.STUB_LLM_PARALLEL)
+    response_cache: bool = Field(default_factory=lambda: settings.LLM_CACHE_ENABLED)
+    streaming: bool = Field(default_factory=lambda: settings.LLM_STREAMING)
+    request_timeout: Optional[float] = Field(default_factory=lambda: settings.LLM_REQUEST_TIMEOUT)
+    max_retries: int = Field(default_factory=lambda: settings.LLM_MAX_RETRIES)
+    retry_backoff: float = Field(default_factory=lambda: settings.LLM_RETRY_BACKOFF)
+    circuit_breaker_failures: int = Field(default_factory=lambda: settings.LLM_CIRCUIT_BREAKER_FAILURES)
+    circuit_breaker_reset: float = Field(default_factory=lambda: settings.LLM_CIRCUIT_BREAKER_RESET)
+
+
+class PoolConfig(BaseModel):
+    model: str
+    temperature: float = 0.1
+    # Service type of every replica, one replica per endpoint URL
+    backend: LLMServiceType = Field(default_factory=lambda: LLMServiceType(settings.LLM_POOL_BACKEND))
+    endpoints: List[str] = Field(default_factory=lambda: list(settings.LLM_POOL_ENDPOINTS))
+    failure_threshold: int = Field(default_factory=lambda: settings.LLM_POOL_FAILURE_THRESHOLD)
+    cooldown: float = Field(default_factory=lambda: settings.LLM_POOL_COOLDOWN)
+    hedge: bool = Field(default_factory=lambda: settings.LLM_HEDGE)
+    hedge_quantile: float = Field(default_factory=lambda: settings.LLM_HEDGE_QUANTILE)
+    response_cache: bool = Field(default_factory=lambda: settings.LLM_CACHE_ENABLED)
+    structured_output: bool = Field(default_factory=lambda: settings.LLM_STRUCTURED_OUTPUT)
+    streaming: bool = Field(default_factory=lambda: settings.LLM_STREAMING)
+    max_output_tokens: Optional[int] = Field(default_factory=lambda: settings.LLM_MAX_OUTPUT_TOKENS)
+    request_timeout: Optional[float] = Field(default_factory=lambda: settings.LLM_REQUEST_TIMEOUT)
+    max_retries: int = Field(default_factory=lambda: settings.LLM_MAX_RETRIES)
+    retry_backoff: float = Field(default_factory=lambda: settings.LLM_RETRY_BACKOFF)
+    circuit_breaker_failures: int = Field(default_factory=lambda: settings.LLM_CIRCUIT_BREAKER_FAILURES)
+    circuit_breaker_reset: float = Field(default_factory=lambda: settings.LLM_CIRCUIT_BREAKER_RESET)
+
+    @field_validator("backend")
+    @classmethod
+    def backend_is_not_a_pool(cls, backend: LLMServiceType) -> LLMServiceType:
+        if backend == LLMServiceType.POOL:
+            raise ValueError("A pool cannot be the backend of another pool")
+        return backend
+
+    @field_validator("endpoints")
+    @classmethod
+    def endpoints_not_empty(cls, endpoints: List[str]) -> List[str]:
+        if not endpoints:
+            raise ValueError("Set at least one endpoint URL (LLM_POOL_ENDPOINTS or --endpoint)")
+        return endpoints
 
 
 class LLMServiceFactory:
     _service_map: Dict[LLMServiceType, Type[BaseLLMService]] = {
         LLMServiceType.OLLAMA: OllamaService,
         LLMServiceType.AI_DOCKER_MODEL: AiDockerModelService,
+        LLMServiceType.POOL: PooledLLMService,
+        LLMServiceType.STUB: StubLLMService,
     }
 
     _config_map = {
         LLMServiceType.OLLAMA: OllamaConfig,
         LLMServiceType.AI_DOCKER_MODEL: AiDockerModelConfig,
+        LLMServiceType.POOL: PoolConfig,
+        LLMServiceType.STUB: StubConfig,
     }
 
     @classmethod
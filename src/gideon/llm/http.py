@@ -0,0 +1,69 @@
+"""Pooled keep-alive HTTP clients shared by every chain in a run."""
+import asyncio
+import weakref
+from typing import Any, Dict, Tuple
+import httpx
+
+_transports: Dict[Tuple[int, float], "LoopLocalTransport"] = {}
+_clients: Dict[Tuple[Any, ...], httpx.AsyncClient] = {}
+
+
+class LoopLocalTransport(httpx.AsyncBaseTransport):
+    """A connection pool per event loop, behind one transport object.
+
+    Pooled connections belong to the loop that opened them, so a process that runs several loops in
+    turn, such as a library caller using asyncio.run more than once, gets a fresh pool in each. A
+    loop's pool is dropped when the loop is garbage collected.
+    """
+
+    def __init__(self, limits: httpx.Limits):
+        self.limits = limits
+        self._pools: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, httpx.AsyncHTTPTransport]" = (
+            weakref.WeakKeyDictionary()
+        )
+
+    def pool(self) -> httpx.AsyncHTTPTransport:
+        loop = asyncio.get_running_loop()
+        pool = self._pools.get(loop)
+        if pool is None:
+            pool = self._pools[loop] = httpx.AsyncHTTPTransport(limits=self.limits)
+        return pool
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        return await self.pool().handle_async_request(request)
+
+    async def aclose(self) -> None:
+        pool = self._pools.pop(asyncio.get_running_loop(), None)
+        if pool is not None:
+            await pool.aclose()
+
+
+def http_timeout(config: Dict[str, Any]) -> httpx.Timeout:
+    """Build the request timeout from a service config: a long read timeout for slow local inference."""
+    return httpx.Timeout(config["timeout"], connect=config["connect_timeout"])
+
+
+def shared_async_transport(config: Dict[str, Any]) -> LoopLocalTransport:
+    """Return the process-wide connection pool for the given pool size and keep-alive expiry.
+
+    Connections are opened once per event loop and kept alive across requests instead of being set
+    up per call.
+    """
+    key = (config["max_connections"], config["keepalive_expiry"])
+    if key not in _transports:
+        _transports[key] = LoopLocalTransport(
+            httpx.Limits(
+                max_connections=config["max_connections"],
+                max_keepalive_connections=config["max_connections"],
+                keepalive_expiry=config["keepalive_expiry"],
+            )
+        )
+    return _transports[key]
+
+
+def shared_async_client(config: Dict[str, Any]) -> httpx.AsyncClient:
+    """Return one async client per pool and timeout settings, backed by the shared transport."""
+    key = (config["max_connections"], config["keepalive_expiry"], config["timeout"], config["connect_timeout"])
+    if key not in _clients:
+        _clients[key] = httpx.AsyncClient(transport=shared_async_transport(config), timeout=http_timeout(config))
+    return _clients[key]
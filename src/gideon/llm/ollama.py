@@ -1,10 +1,9 @@
 from typing import Any, Dict, Optional
+from langchain_core.runnables import Runnable
 from langchain_ollama import ChatOllama
-from langchain_core.prompts import PromptTemplate
-from langchain_core.output_parsers import BaseOutputParser
-from langchain_core.runnables import RunnableSequence
 
 from .base import BaseLLMService
+from .http import http_timeout, shared_async_transport
 from ..core.config import settings
 
 
@@ -15,14 +14,17 @@ class OllamaService(BaseLLMService):
         self.llm = ChatOllama(
             model=self.config.get("model", settings.DEFAULT_LLM_CONFIG["model"]),
             temperature=self.config.get("temperature", settings.DEFAULT_LLM_CONFIG["temperature"]),
+            base_url=self.config.get("base_url", settings.OLLAMA_BASE_URL),
+            num_predict=self.config.get("max_output_tokens", settings.LLM_MAX_OUTPUT_TOKENS),
+            keep_alive=self.config.get("keep_alive", settings.OLLAMA_KEEP_ALIVE),
+            client_kwargs={"timeout": http_timeout(self.http_options)},
+            # The ollama client builds its own httpx client; sharing the transport shares the connection pool
+            async_client_kwargs={"transport": shared_async_transport(self.http_options)},
         )
 
-    async def create_chain(
-        self,
-        prompt: PromptTemplate,
-        output_parser: Optional[BaseOutputParser] = None,
-    ) -> RunnableSequence:
-        chain = prompt | self.llm
-        if output_parser:
-            chain = chain | output_parser
-        return chain
+    def _bind_schema(self, schema: Dict[str, Any]) -> Runnable:
+        # Ollama turns the schema into a grammar; with thinking off the model emits nothing but the JSON
+        return self.llm.bind(format=schema, reasoning=False)
+
+    def _warm_up_model(self) -> Runnable:
+        return self.llm.bind(options={"num_predict": 1}, reasoning=False)
@@ -0,0 +1,213 @@
+"""Spread LLM requests over several inference servers."""
+import asyncio
+import time
+from typing import Any, Callable, Dict, List, Optional, Set
+from langchain_core.prompt_values import PromptValue
+from langchain_core.runnables import Runnable, RunnableLambda
+from .base import BaseLLMService
+from .resilience import LatencyTracker
+from ..core.config import settings
+from ..utils.logging import log_warning
+
+# Config keys that describe the pool itself rather than each replica
+POOL_CONFIG_KEYS = {
+    "backend",
+    "endpoints",
+    "failure_threshold",
+    "cooldown",
+    "hedge",
+    "hedge_quantile",
+    "response_cache",
+    "max_retries",
+    "retry_backoff",
+    "circuit_breaker_failures",
+    "circuit_breaker_reset",
+}
+
+
+class Replica:
+    """One inference server in a pool, with its in-flight count and health."""
+
+    def __init__(self, endpoint: str, service: BaseLLMService):
+        self.endpoint = endpoint
+        self.service = service
+        self.in_flight = 0
+        self.consecutive_failures = 0
+        self.unhealthy_until = 0.0
+
+    def is_healthy(self, now: float) -> bool:
+        return now >= self.unhealthy_until
+
+
+class PooledLLMService(BaseLLMService):
+    """Route each request to the healthy replica with the fewest requests in flight.
+
+    A replica that fails `failure_threshold` times in a row is taken out of rotation for `cooldown`
+    seconds and then tried again. A failed request is retried on another replica before giving up.
+    With `hedge` on, a request still running after the `hedge_quantile` of recent latencies is
+    duplicated on a second replica and the first answer wins. Prompt rendering, output parsing,
+    the response cache and retries run once, in the pool; only the model call is routed, and the
+    per-call deadline applies on each replica.
+    """
+
+    def __init__(self, config: Optional[Dict[str, Any]] = None, replicas: Optional[List[Replica]] = None):
+        super().__init__(config)
+        self.failure_threshold = max(1, self.config.get("failure_threshold", 3))
+        self.cooldown = self.config.get("cooldown", 30.0)
+        self.hedge = self.config.get("hedge", settings.LLM_HEDGE)
+        self.hedge_quantile = self.config.get("hedge_quantile", settings.LLM_HEDGE_QUANTILE)
+        self.latencies = LatencyTracker()
+        self.hedged_requests = 0
+        self.replicas = replicas if replicas is not None else self._create_replicas()
+        if not self.replicas:
+            raise ValueError("An LLM pool needs at least one endpoint")
+        self._next = 0
+        self.llm = self._routed(lambda service: service.llm)
+
+    def _create_replicas(self) -> List[Replica]:
+        from .factory import LLMServiceFactory
+
+        replica_config = {key: value for key, value in self.config.items() if key not in POOL_CONFIG_KEYS}
+        return [
+            Replica(
+                endpoint,
+                LLMServiceFactory.create(
+                    self.config["backend"],
+                    # Failing over and retrying is the pool's job, so replicas fail fast
+                    {
+                        **replica_config,
+                        "base_url": endpoint,
+                        "response_cache": False,
+                        "max_retries": 0,
+                        "circuit_breaker_failures": 0,
+                    },
+                ),
+            )
+            for endpoint in self.config.get("endpoints", [])
+        ]
+
+    @property
+    def parallel_slots(self) -> int:
+        """Total parallel slots of the healthy replicas."""
+        now = time.monotonic()
+        healthy = [replica for replica in self.replicas if replica.is_healthy(now)] or self.replicas
+        return sum(replica.service.parallel_slots for replica in healthy)
+
+    async def warm_up(self, prompt: Any = "ping") -> bool:
+        """Warm every replica concurrently."""
+        results = await asyncio.gather(*(replica.service.warm_up(prompt) for replica in self.replicas))
+        return any(results)
+
+    def close(self) -> None:
+        super().close()
+        for replica in self.replicas:
+            replica.service.close()
+
+    def _choose(self, exclude: Set[int]) -> Optional[Replica]:
+        candidates = [replica for replica in self.replicas if id(replica) not in exclude]
+        if not candidates:
+            return None
+        now = time.monotonic()
+        healthy = [replica for replica in candidates if replica.is_healthy(now)]
+        if not healthy:
+            # Every remaining replica is cooling down: try the one that recovers first
+            return min(candidates, key=lambda replica: replica.unhealthy_until)
+        # Rotate the starting point so ties do not always land on the first replica
+        self._next = (self._next + 1) % len(healthy)
+        rotated = healthy[self._next:] + healthy[:self._next]
+        return min(rotated, key=lambda replica: replica.in_flight)
+
+    def _record(self, replica: Replica, error: Optional[BaseException]) -> None:
+        if error is None:
+            replica.consecutive_failures = 0
+            return
+        replica.consecutive_failures += 1
+        if replica.consecutive_failures >= self.failure_threshold:
+            replica.unhealthy_until = time.monotonic() + self.cooldown
+            log_warning(
+                f"LLM endpoint {replica.endpoint} failed {replica.consecutive_failures} times, "
+                f"out of rotation for {self.cooldown:.0f}s: {error}"
+            )
+
+    def model_step(self, schema: Optional[Dict[str, Any]] = None) -> Runnable:
+        # Schema binding, streaming and the deadline apply on each replica, which inherits those settings
+        return self._resilient(self._routed(lambda service: service.model_step(schema)), timeout=None)
+
+    def _hedge_delay(self) -> Optional[float]:
+        if not self.hedge or len(self.replicas) < 2:
+            return None
+        return self.latencies.quantile(self.hedge_quantile)
+
+    def _routed(self, model_of: Callable[[BaseLLMService], Runnable]) -> Runnable:
+        """A model step that sends each call to model_of(replica service) on the chosen replica."""
+
+        def invoke(prompt_value: PromptValue) -> Any:
+            tried: Set[int] = set()
+            while True:
+                replica = self._choose(tried)
+                tried.add(id(replica))
+                replica.in_flight += 1
+                try:
+                    result = model_of(replica.service).invoke(prompt_value)
+                except Exception as e:
+                    self._record(replica, e)
+                    if len(tried) == len(self.replicas):
+                        raise
+                    continue
+                finally:
+                    replica.in_flight -= 1
+                self._record(replica, None)
+                return result
+
+        async def call(replica: Replica, prompt_value: PromptValue) -> Any:
+            replica.in_flight += 1
+            start = time.monotonic()
+            try:
+                result = await model_of(replica.service).ainvoke(prompt_value)
+            except Exception as e:
+                self._record(replica, e)
+                raise
+            finally:
+                replica.in_flight -= 1
+            self._record(replica, None)
+            self.latencies.add(time.monotonic() - start)
+            return result
+
+        async def ainvoke(prompt_value: PromptValue) -> Any:
+            tried: Set[int] = set()
+            pending: Set[asyncio.Task] = set()
+            hedge_delay = self._hedge_delay()
+            last_error: Optional[BaseException] = None
+
+            def launch() -> bool:
+                replica = self._choose(tried)
+                if replica is None:
+                    return False
+                tried.add(id(replica))
+                pending.add(asyncio.ensure_future(call(replica, prompt_value)))
+                return True
+
+            launch()
+            try:
+                while pending:
+                    done, _ = await asyncio.wait(pending, timeout=hedge_delay, return_when=asyncio.FIRST_COMPLETED)
+                    if not done:
+                        # The call is slower than usual: race a duplicate on another replica
+                        hedge_delay = None
+                        if launch():
+                            self.hedged_requests += 1
+                        continue
+                    for task in done:
+                        pending.discard(task)
+                        if task.exception() is None:
+                            return task.result()
+                        last_error = task.exception()
+                    if not pending:
+                        # Fail over to a replica that has not been tried yet
+                        launch()
+                raise last_error
+            finally:
+                for task in pending:
+                    task.cancel()
+
+        return RunnableLambda(invoke, afunc=ainvoke, name="PooledChatModel")
@@ -0,0 +1,126 @@
+"""Deadlines, retries with backoff, circuit breaking and latency tracking for LLM calls."""
+import asyncio
+import random
+import time
+from collections import deque
+from typing import Any, Callable, Deque, Optional
+from langchain_core.runnables import Runnable, RunnableLambda
+
+
+class CircuitOpenError(RuntimeError):
+    """Raised instead of calling an endpoint that has been failing."""
+
+
+def backoff_delay(attempt: int, base: float, cap: float, rng: Callable[[], float] = random.random) -> float:
+    """Full-jitter exponential backoff: a random delay up to base * 2**attempt, capped."""
+    return rng() * min(cap, base * 2 ** attempt)
+
+
+class CircuitBreaker:
+    """Fail fast while an endpoint is down.
+
+    After `failure_threshold` consecutive failures the circuit opens and calls are rejected for
+    `reset_timeout` seconds. Then one trial call is let through: success closes the circuit,
+    failure opens it again.
+    """
+
+    def __init__(self, failure_threshold: int, reset_timeout: float, clock: Callable[[], float] = time.monotonic):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.clock = clock
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+        self._trial_in_flight = False
+
+    @property
+    def is_open(self) -> bool:
+        return self.opened_at is not None
+
+    def allow(self) -> None:
+        if self.opened_at is None:
+            return
+        if self._trial_in_flight or self.clock() - self.opened_at < self.reset_timeout:
+            raise CircuitOpenError(f"Circuit open after {self.failures} consecutive failures")
+        self._trial_in_flight = True
+
+    def record_success(self) -> None:
+        self.failures = 0
+        self.opened_at = None
+        self._trial_in_flight = False
+
+    def record_failure(self) -> None:
+        self.failures += 1
+        if self._trial_in_flight or self.failures >= self.failure_threshold:
+            self.opened_at = self.clock()
+        self._trial_in_flight = False
+
+
+class LatencyTracker:
+    """Latencies of the most recent successful calls."""
+
+    def __init__(self, window: int = 200):
+        self.samples: Deque[float] = deque(maxlen=window)
+
+    def add(self, latency: float) -> None:
+        self.samples.append(latency)
+
+    def quantile(self, q: float, min_samples: int = 20) -> Optional[float]:
+        """The q-quantile of recent latencies, or None until there are enough samples."""
+        if len(self.samples) < min_samples:
+            return None
+        ordered = sorted(self.samples)
+        return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+def resilient(
+    model: Runnable,
+    timeout: Optional[float] = None,
+    max_retries: int = 0,
+    backoff_base: float = 0.5,
+    backoff_cap: float = 10.0,
+    breaker: Optional[CircuitBreaker] = None,
+) -> Runnable:
+    """Wrap a model step with a per-call deadline, retries with jittered backoff and a circuit breaker.
+
+    An open circuit is not retried; the call fails immediately. The deadline only applies to async
+    calls: a blocking `invoke` cannot be interrupted, so it is bounded by the HTTP client's timeouts
+    (LLM_TIMEOUT) alone.
+    """
+
+    def invoke(prompt_value: Any) -> Any:
+        for attempt in range(max_retries + 1):
+            if breaker is not None:
+                breaker.allow()
+            try:
+                result = model.invoke(prompt_value)
+            except Exception:
+                if breaker is not None:
+                    breaker.record_failure()
+                if attempt == max_retries:
+                    raise
+                time.sleep(backoff_delay(attempt, backoff_base, backoff_cap))
+                continue
+            if breaker is not None:
+                breaker.record_success()
+            return result
+
+    async def ainvoke(prompt_value: Any) -> Any:
+        for attempt in range(max_retries + 1):
+            if breaker is not None:
+                breaker.allow()
+            try:
+                result = await asyncio.wait_for(model.ainvoke(prompt_value), timeout)
+            except Exception as e:
+                if breaker is not None:
+                    breaker.record_failure()
+                if attempt == max_retries:
+                    if isinstance(e, asyncio.TimeoutError):
+                        raise TimeoutError(f"LLM call exceeded its {timeout}s deadline") from e
+                    raise
+                await asyncio.sleep(backoff_delay(attempt, backoff_base, backoff_cap))
+                continue
+            if breaker is not None:
+                breaker.record_success()
+            return result
+
+    return RunnableLambda(invoke, afunc=ainvoke, name="ResilientChatModel")
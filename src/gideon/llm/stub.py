@@ -0,0 +1,123 @@
+"""An offline LLM backend that answers instantly from the prompt, for load testing."""
+import asyncio
+import hashlib
+import json
+import random
+import re
+import time
+from typing import Any, Dict, List, Optional
+from langchain_core.language_models import BaseChatModel
+from langchain_core.messages import AIMessage, BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+from pydantic import PrivateAttr
+
+from .base import BaseLLMService
+from ..core.config import settings
+from ..models.document import TOPIC_LIST
+
+CONTENT_MARKER = "Document content:\n"
+TITLE_MARKER = "DOCUMENT TITLE: "
+YEAR_PATTERN = re.compile(r"\b(19|20)\d{2}\b")
+NAME_PATTERN = re.compile(r"^[A-Z][a-z]+(?: [A-Z]\.?)*(?: [A-Z][a-z]+)+$")
+
+
+class StubChatModel(BaseChatModel):
+    """A chat model that derives a DocumentInfo answer from the document in the prompt.
+
+    Answers are deterministic for a given document. Latency is log-normal around `latency`
+    seconds; `stall_rate` of the calls take `stall_latency` instead, `failure_rate` raise and
+    `malformed_rate` return output that is not valid JSON. Draws come from a generator seeded with `seed`.
+    """
+
+    latency: float = 0.05
+    latency_sigma: float = 0.5
+    stall_rate: float = 0.0
+    stall_latency: float = 30.0
+    failure_rate: float = 0.0
+    malformed_rate: float = 0.0
+    seed: Optional[int] = None
+    _rng: random.Random = PrivateAttr()
+
+    def model_post_init(self, __context: Any) -> None:
+        self._rng = random.Random(self.seed)
+
+    @property
+    def _llm_type(self) -> str:
+        return "gideon-stub"
+
+    def _draw(self) -> Dict[str, Any]:
+        rng = self._rng
+        stalled = rng.random() < self.stall_rate
+        delay = self.stall_latency if stalled else self.latency * rng.lognormvariate(0.0, self.latency_sigma)
+        return {
+            "delay": delay,
+            "fail": rng.random() < self.failure_rate,
+            "malformed": rng.random() < self.malformed_rate,
+        }
+
+    def _generate(
+        self, messages: List[BaseMessage], stop: Optional[List[str]] = None, run_manager: Any = None, **kwargs: Any
+    ) -> ChatResult:
+        draw = self._draw()
+        time.sleep(draw["delay"])
+        return self._result(messages, draw)
+
+    async def _agenerate(
+        self, messages: List[BaseMessage], stop: Optional[List[str]] = None, run_manager: Any = None, **kwargs: Any
+    ) -> ChatResult:
+        draw = self._draw()
+        await asyncio.sleep(draw["delay"])
+        return self._result(messages, draw)
+
+    def _result(self, messages: List[BaseMessage], draw: Dict[str, Any]) -> ChatResult:
+        if draw["fail"]:
+            raise ConnectionError("Stub LLM backend failure")
+        text = self.respond(str(messages[-1].content) if messages else "")
+        if draw["malformed"]:
+            # A reasoning preamble and a cut-off object, as a model that ran out of tokens would produce
+            text = "<think>Let me look at the document.</think>\n" + text[: len(text) // 2]
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content=text))])
+
+    @staticmethod
+    def respond(prompt: str) -> str:
+        """The JSON answer for a rendered analysis or classification prompt."""
+        if CONTENT_MARKER not in prompt:
+            title = prompt.rsplit(TITLE_MARKER, 1)[-1].strip()
+            return json.dumps({"topic": pick_topic(title)})
+
+        content = prompt.split(CONTENT_MARKER, 1)[1].strip()
+        lines = [line.strip() for line in content.splitlines() if line.strip()]
+        title = lines[0][:120] if lines else ""
+        authors = [line for line in lines[1:6] if NAME_PATTERN.match(line)][:3]
+        year = YEAR_PATTERN.search(content)
+        return json.dumps(
+            {
+                "authors": authors,
+                "year": year.group() if year else "",
+                "title": title,
+                "topic": pick_topic(content),
+                # Unsure when the document gives little to go on, so cascades get exercised
+                "confidence": 0.9 if authors and year else 0.4,
+            }
+        )
+
+
+def pick_topic(text: str) -> str:
+    """A topic from TOPIC_LIST chosen by hashing the text, stable across runs."""
+    digest = hashlib.sha256(text.encode("utf-8")).digest()
+    return TOPIC_LIST[int.from_bytes(digest[:4], "big") % len(TOPIC_LIST)]
+
+
+class StubLLMService(BaseLLMService):
+    def __init__(self, config: Optional[Dict[str, Any]] = None):
+        super().__init__(config)
+
+        self.llm = StubChatModel(
+            latency=self.config.get("latency", settings.STUB_LLM_LATENCY),
+            latency_sigma=self.config.get("latency_sigma", settings.STUB_LLM_LATENCY_SIGMA),
+            stall_rate=self.config.get("stall_rate", settings.STUB_LLM_STALL_RATE),
+            stall_latency=self.config.get("stall_latency", settings.STUB_LLM_STALL_LATENCY),
+            failure_rate=self.config.get("failure_rate", settings.STUB_LLM_FAILURE_RATE),
+            malformed_rate=self.config.get("malformed_rate", settings.STUB_LLM_MALFORMED_RATE),
+            seed=self.config.get("seed", settings.STUB_LLM_SEED),
+        )
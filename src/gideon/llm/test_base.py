@@ -0,0 +1,146 @@
+import asyncio
+import inspect
+import ollama
+import pytest
+from langchain_core.messages import AIMessageChunk, HumanMessage
+from langchain_core.output_parsers import JsonOutputParser, StrOutputParser
+from langchain_core.prompts import PromptTemplate
+from langchain_core.runnables import RunnableGenerator, RunnableLambda
+from gideon.llm.dockerai import AiDockerModelService
+from gideon.llm.ollama import OllamaService
+from gideon.models.schema import TOPIC_SCHEMA
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("service_class", [OllamaService, AiDockerModelService])
+async def test_create_chain_reuses_runnable_per_prompt_and_parser(service_class):
+    service = service_class({"model": "test-model", "temperature": 0.1})
+    prompt = PromptTemplate.from_template("Classify {title}")
+    other_prompt = PromptTemplate.from_template("Analyze {content}")
+    parser = StrOutputParser()
+
+    chain = await service.create_chain(prompt, parser)
+    assert await service.create_chain(prompt, parser) is chain
+    assert await service.create_chain(prompt) is not chain
+    assert await service.create_chain(other_prompt, parser) is not chain
+
+
+@pytest.mark.asyncio
+async def test_abatch_limits_concurrency_to_parallel_slots():
+    service = OllamaService({"model": "test-model", "parallel_slots": 2})
+    in_flight = peak = 0
+
+    async def call(inputs):
+        nonlocal in_flight, peak
+        in_flight += 1
+        peak = max(peak, in_flight)
+        await asyncio.sleep(0.01)
+        in_flight -= 1
+        if inputs["n"] == 3:
+            raise ValueError("boom")
+        return inputs["n"]
+
+    results = await service.abatch(RunnableLambda(call), [{"n": n} for n in range(6)])
+
+    assert peak == 2
+    assert results[:3] == [0, 1, 2]
+    assert isinstance(results[3], ValueError)
+
+
+
+@pytest.mark.asyncio
+async def test_cancelling_abatch_is_not_reported_as_failed_inputs():
+    service = OllamaService({"model": "test-model", "parallel_slots": 4})
+    service.llm = RunnableLambda(lambda prompt_value: prompt_value, afunc=lambda prompt_value: asyncio.sleep(10))
+    chain = await service.create_chain(PromptTemplate.from_template("{n}"))
+
+    task = asyncio.create_task(service.abatch(chain, [{"n": n} for n in range(4)]))
+    await asyncio.sleep(0.01)
+    task.cancel()
+
+    with pytest.raises(asyncio.CancelledError):
+        await task
+
+def test_ollama_binds_schema_as_format_without_reasoning():
+    service = OllamaService({"model": "test-model"})
+
+    model = service.structured_model(TOPIC_SCHEMA)
+
+    assert model.kwargs == {"format": TOPIC_SCHEMA, "reasoning": False}
+    assert service.structured_model(dict(TOPIC_SCHEMA)) is model
+
+
+def ollama_request(service, runnable):
+    """The arguments langchain-ollama passes to the ollama client for a bound model."""
+    params = service.llm._chat_params([HumanMessage("ping")], **runnable.kwargs)
+    # The client rejects arguments it does not know, as older langchain-ollama releases passed them on
+    inspect.signature(ollama.AsyncClient.chat).bind(None, **params)
+    return params
+
+
+def test_ollama_client_accepts_the_structured_request():
+    service = OllamaService({"model": "test-model"})
+
+    params = ollama_request(service, service.structured_model(TOPIC_SCHEMA))
+
+    assert params["format"] == TOPIC_SCHEMA
+    assert params["think"] is False
+
+
+def test_docker_model_binds_schema_as_response_format():
+    service = AiDockerModelService({"model": "test-model"})
+
+    response_format = service.structured_model(TOPIC_SCHEMA).kwargs["response_format"]
+
+    assert response_format["type"] == "json_schema"
+    assert response_format["json_schema"]["schema"] == TOPIC_SCHEMA
+
+
+def test_structured_output_can_be_disabled():
+    service = OllamaService({"model": "test-model", "structured_output": False})
+
+    assert service.structured_model(TOPIC_SCHEMA) is service.llm
+
+
+@pytest.mark.asyncio
+async def test_streaming_stops_once_the_json_object_is_complete():
+    produced = []
+
+    async def generate(_):
+        for token in ["<think>", "Let me {think}", "</think>", '{"topic": ', '"Mathematics"}', " Trailing", " text"]:
+            produced.append(token)
+            yield AIMessageChunk(content=token)
+
+    service = OllamaService({"model": "test-model", "streaming": True})
+    service.llm = RunnableGenerator(generate)
+    chain = await service.create_chain(PromptTemplate.from_template("Classify {title}"), JsonOutputParser())
+
+    assert await chain.ainvoke({"title": "Topology"}) == {"topic": "Mathematics"}
+    assert produced[-1] == '"Mathematics"}'
+
+
+def test_output_token_cap_reaches_both_backends():
+    assert OllamaService({"model": "m", "max_output_tokens": 256}).llm.num_predict == 256
+    assert AiDockerModelService({"model": "m", "max_output_tokens": 256}).llm.max_tokens == 256
+
+
+def test_warm_up_generates_one_token_and_keeps_the_model_loaded():
+    service = OllamaService({"model": "m", "keep_alive": "1h"})
+
+    assert service.llm.keep_alive == "1h"
+    assert service._warm_up_model().kwargs == {"options": {"num_predict": 1}, "reasoning": False}
+    params = ollama_request(service, service._warm_up_model())
+    assert (params["options"]["num_predict"], params["think"]) == (1, False)
+    assert AiDockerModelService({"model": "m"})._warm_up_model().kwargs == {"max_tokens": 1}
+
+
+@pytest.mark.asyncio
+async def test_failed_warm_up_does_not_raise():
+    service = OllamaService({"model": "m"})
+
+    async def unreachable(prompt_value):
+        raise ConnectionError("connection refused")
+
+    service._warm_up_model = lambda: RunnableLambda(unreachable)
+
+    assert await service.warm_up() is False
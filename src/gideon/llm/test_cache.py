@@ -0,0 +1,87 @@
+import pytest
+from unittest.mock import patch
+from langchain_core.language_models.fake_chat_models import FakeListChatModel
+from langchain_core.output_parsers import JsonOutputParser
+from langchain_core.prompts import PromptTemplate
+from gideon.llm.cache import ResponseCache, template_fingerprint
+from gideon.llm.ollama import OllamaService
+from gideon.models.schema import TOPIC_SCHEMA
+
+
+@pytest.fixture
+def cache(tmp_path):
+    cache = ResponseCache(tmp_path / "responses.sqlite", ttl_seconds=60, max_entries=2)
+    yield cache
+    cache.close()
+
+
+def make_service(cache, responses):
+    service = OllamaService({"model": "test-model", "temperature": 0.1})
+    service.llm = FakeListChatModel(responses=responses)
+    service.response_cache = cache
+    return service
+
+
+def test_cache_counts_hits_and_misses(cache):
+    assert cache.get("a") is None
+    cache.put("a", "response")
+    assert cache.get("a") == "response"
+    assert (cache.hits, cache.misses) == (1, 1)
+
+
+def test_cache_expires_entries(cache):
+    cache.put("a", "response")
+    with patch("gideon.llm.cache.time.time", return_value=10**12):
+        assert cache.get("a") is None
+    assert len(cache) == 0
+
+
+def test_cache_caps_entries(cache):
+    for key in "abc":
+        cache.put(key, key)
+    assert len(cache) == 2
+    assert cache.get("a") is None
+
+
+def test_key_depends_on_model_temperature_and_template():
+    key = ResponseCache.make_key("model", 0.1, "prompt", "fp")
+    assert key != ResponseCache.make_key("other", 0.1, "prompt", "fp")
+    assert key != ResponseCache.make_key("model", 0.2, "prompt", "fp")
+    assert key != ResponseCache.make_key("model", 0.1, "prompt", "fp2")
+    assert template_fingerprint(PromptTemplate.from_template("A {x}")) != template_fingerprint(
+        PromptTemplate.from_template("B {x}")
+    )
+
+
+@pytest.mark.asyncio
+async def test_service_answers_repeated_prompts_from_cache(cache):
+    service = make_service(cache, ['{"topic": "Mathematics"}', '{"topic": "Physics"}'])
+    chain = await service.create_chain(PromptTemplate.from_template("Classify {title}"), JsonOutputParser())
+
+    assert await chain.ainvoke({"title": "Topology"}) == {"topic": "Mathematics"}
+    assert await chain.ainvoke({"title": "Topology"}) == {"topic": "Mathematics"}
+    assert await chain.ainvoke({"title": "Quantum fields"}) == {"topic": "Physics"}
+    assert (cache.hits, cache.misses) == (1, 2)
+
+
+@pytest.mark.asyncio
+async def test_service_does_not_cache_unparseable_responses(cache):
+    service = make_service(cache, ["not json", '{"topic": "Mathematics"}'])
+    chain = await service.create_chain(PromptTemplate.from_template("Classify {title}"), JsonOutputParser())
+
+    with pytest.raises(Exception):
+        await chain.ainvoke({"title": "Topology"})
+    assert await chain.ainvoke({"title": "Topology"}) == {"topic": "Mathematics"}
+    assert len(cache) == 1
+
+
+@pytest.mark.asyncio
+async def test_cache_keeps_schema_constrained_responses_apart(cache):
+    service = make_service(cache, ['{"topic": "Mathematics"}', '{"topic": "Physics"}'])
+    prompt = PromptTemplate.from_template("Classify {title}")
+    plain = await service.create_chain(prompt, JsonOutputParser())
+    constrained = await service.create_chain(prompt, JsonOutputParser(), schema=TOPIC_SCHEMA)
+
+    assert await plain.ainvoke({"title": "Topology"}) == {"topic": "Mathematics"}
+    assert await constrained.ainvoke({"title": "Topology"}) == {"topic": "Physics"}
+    assert len(cache) == 2
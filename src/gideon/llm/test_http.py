@@ -0,0 +1,67 @@
+import asyncio
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import httpx
+from gideon.llm.dockerai import AiDockerModelService
+from gideon.llm.http import shared_async_client
+from gideon.llm.factory import LLMServiceFactory, LLMServiceType
+from gideon.llm.ollama import OllamaService
+
+
+def test_ollama_services_share_one_connection_pool():
+    first = OllamaService({"model": "small", "base_url": "http://gpu-box:11434"})
+    second = OllamaService({"model": "large", "base_url": "http://gpu-box:11434"})
+
+    assert first.llm.base_url == "http://gpu-box:11434"
+    assert first.llm._async_client._client._transport is second.llm._async_client._client._transport
+
+
+def test_docker_model_services_share_one_async_client():
+    first = AiDockerModelService({"model": "small"})
+    second = AiDockerModelService({"model": "large"})
+
+    assert first.llm.http_async_client is second.llm.http_async_client
+    assert first.llm.http_async_client.timeout.connect == first.http_options["connect_timeout"]
+
+
+def test_factory_config_carries_endpoint_and_pool_settings():
+    service = LLMServiceFactory.create(
+        LLMServiceType.AI_DOCKER_MODEL,
+        {"model": "m", "base_url": "http://models:8080/v1", "max_connections": 4, "timeout": 30.0},
+    )
+
+    assert service.llm.openai_api_base == "http://models:8080/v1"
+    client = service.llm.http_async_client
+    assert client.timeout == httpx.Timeout(30.0, connect=service.config["connect_timeout"])
+    assert client._transport.limits.max_connections == 4
+
+
+class OkHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        self.send_response(200)
+        self.send_header("Content-Length", "2")
+        self.end_headers()
+        self.wfile.write(b"ok")
+
+    def log_message(self, *args):
+        pass
+
+
+def test_shared_client_works_across_event_loops():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), OkHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = f"http://127.0.0.1:{server.server_address[1]}/"
+    client = shared_async_client(AiDockerModelService({"model": "m"}).http_options)
+
+    async def get():
+        return (await client.get(url)).text
+
+    try:
+        # The keep-alive connection of the first loop must not be reused by the second
+        assert asyncio.run(get()) == "ok"
+        assert asyncio.run(get()) == "ok"
+    finally:
+        server.shutdown()
+        server.server_close()
@@ -0,0 +1,133 @@
+import asyncio
+import pytest
+from langchain_core.messages import AIMessage
+from langchain_core.output_parsers import StrOutputParser
+from langchain_core.prompts import PromptTemplate
+from langchain_core.runnables import RunnableLambda
+from gideon.llm.base import BaseLLMService
+from gideon.llm.factory import LLMServiceFactory, LLMServiceType
+from gideon.llm.pool import PooledLLMService, Replica
+
+
+class FakeReplicaService(BaseLLMService):
+    def __init__(self, name, delay=0.01, fail=False, parallel_slots=1):
+        # Replicas built by the pool fail fast; retries and health tracking happen in the pool
+        super().__init__({"parallel_slots": parallel_slots, "max_retries": 0, "circuit_breaker_failures": 0})
+        self.calls = 0
+        self.peak = 0
+        self.in_flight = 0
+
+        async def call(prompt_value):
+            self.calls += 1
+            self.in_flight += 1
+            self.peak = max(self.peak, self.in_flight)
+            await asyncio.sleep(delay)
+            self.in_flight -= 1
+            if fail:
+                raise ConnectionError(f"{name} is down")
+            return AIMessage(content=name)
+
+        self.llm = RunnableLambda(lambda prompt_value: AIMessage(content=name), afunc=call)
+
+
+def make_pool(services, **config):
+    replicas = [Replica(f"http://replica-{i}", service) for i, service in enumerate(services)]
+    return PooledLLMService({"model": "m", "max_retries": 0, **config}, replicas=replicas)
+
+
+@pytest.mark.asyncio
+async def test_pool_spreads_requests_over_replicas():
+    services = [FakeReplicaService("a"), FakeReplicaService("b"), FakeReplicaService("c")]
+    pool = make_pool(services)
+    chain = await pool.create_chain(PromptTemplate.from_template("{n}"), StrOutputParser())
+
+    results = await pool.abatch(chain, [{"n": n} for n in range(9)])
+
+    assert pool.parallel_slots == 3
+    assert sorted(results) == sorted(["a", "b", "c"] * 3)
+    assert [service.calls for service in services] == [3, 3, 3]
+    assert all(service.peak == 1 for service in services)
+
+
+@pytest.mark.asyncio
+async def test_pool_prefers_replica_with_fewest_requests_in_flight():
+    slow, fast = FakeReplicaService("slow", delay=0.2), FakeReplicaService("fast", delay=0.001)
+    pool = make_pool([slow, fast])
+    chain = await pool.create_chain(PromptTemplate.from_template("{n}"), StrOutputParser())
+
+    results = await pool.abatch(chain, [{"n": n} for n in range(20)], max_concurrency=2)
+
+    assert results.count("fast") > results.count("slow")
+
+
+@pytest.mark.asyncio
+async def test_failing_replica_is_taken_out_of_rotation():
+    down, up = FakeReplicaService("down", fail=True), FakeReplicaService("up")
+    pool = make_pool([down, up], failure_threshold=2, cooldown=60.0)
+    chain = await pool.create_chain(PromptTemplate.from_template("{n}"), StrOutputParser())
+
+    results = [await chain.ainvoke({"n": n}) for n in range(10)]
+
+    # Failed requests are retried on the healthy replica
+    assert results == ["up"] * 10
+    assert down.calls == 2
+    assert pool.parallel_slots == 1
+
+
+@pytest.mark.asyncio
+async def test_pool_raises_when_every_replica_fails():
+    pool = make_pool([FakeReplicaService("a", fail=True), FakeReplicaService("b", fail=True)])
+    chain = await pool.create_chain(PromptTemplate.from_template("{n}"))
+
+    with pytest.raises(ConnectionError):
+        await chain.ainvoke({"n": 1})
+
+
+def test_factory_builds_one_replica_per_endpoint():
+    pool = LLMServiceFactory.create(
+        LLMServiceType.POOL,
+        {"model": "m", "backend": "docker-model", "endpoints": ["http://a:8080/v1", "http://b:8080/v1"]},
+    )
+
+    assert [replica.endpoint for replica in pool.replicas] == ["http://a:8080/v1", "http://b:8080/v1"]
+    assert [replica.service.llm.openai_api_base for replica in pool.replicas] == [
+        "http://a:8080/v1",
+        "http://b:8080/v1",
+    ]
+    assert all(replica.service.response_cache is None for replica in pool.replicas)
+
+
+def test_pool_config_requires_endpoints():
+    with pytest.raises(ValueError):
+        LLMServiceFactory.create(LLMServiceType.POOL, {"model": "m", "endpoints": []})
+
+
+@pytest.mark.asyncio
+async def test_pool_routes_schema_constrained_calls_to_replica_models():
+    class ConstrainedReplica(FakeReplicaService):
+        def _bind_schema(self, schema):
+            return RunnableLambda(lambda prompt_value: AIMessage(content="constrained"))
+
+    pool = make_pool([ConstrainedReplica("a"), ConstrainedReplica("b")])
+    chain = await pool.create_chain(PromptTemplate.from_template("{n}"), StrOutputParser(), schema={"type": "object"})
+
+    assert await chain.ainvoke({"n": 1}) == "constrained"
+
+
+@pytest.mark.asyncio
+async def test_hedged_request_races_a_slow_replica():
+    slow, fast = FakeReplicaService("slow", delay=2.0), FakeReplicaService("fast", delay=0.001)
+    pool = make_pool([slow, fast], hedge=True, hedge_quantile=0.9)
+    for _ in range(20):
+        pool.latencies.add(0.01)
+    chain = await pool.create_chain(PromptTemplate.from_template("{n}"), StrOutputParser())
+
+    start = asyncio.get_running_loop().time()
+    results = [await chain.ainvoke({"n": n}) for n in range(4)]
+
+    assert results == ["fast"] * 4
+    assert asyncio.get_running_loop().time() - start < 1.0
+    assert pool.hedged_requests >= 1
+    # The losing duplicates are cancelled
+    await asyncio.sleep(0)
+    assert [replica.in_flight for replica in pool.replicas] == [0, 0]
@@ -0,0 +1,99 @@
+import asyncio
+import pytest
+from langchain_core.runnables import RunnableLambda
+from gideon.llm.resilience import CircuitBreaker, CircuitOpenError, LatencyTracker, backoff_delay, resilient
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def flaky(failures, delay=0.0):
+    calls = []
+
+    async def call(prompt_value):
+        calls.append(prompt_value)
+        await asyncio.sleep(delay)
+        if len(calls) <= failures:
+            raise ConnectionError("connection reset")
+        return "ok"
+
+    return RunnableLambda(call), calls
+
+
+def test_backoff_delay_is_jittered_and_capped():
+    assert backoff_delay(3, base=0.5, cap=10.0, rng=lambda: 1.0) == 4.0
+    assert backoff_delay(10, base=0.5, cap=10.0, rng=lambda: 1.0) == 10.0
+    assert backoff_delay(3, base=0.5, cap=10.0, rng=lambda: 0.25) == 1.0
+
+
+def test_circuit_breaker_opens_and_lets_one_trial_through():
+    clock = FakeClock()
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=30.0, clock=clock)
+
+    breaker.record_failure()
+    breaker.allow()
+    breaker.record_failure()
+    with pytest.raises(CircuitOpenError):
+        breaker.allow()
+
+    clock.now = 31.0
+    breaker.allow()
+    with pytest.raises(CircuitOpenError):
+        breaker.allow()
+    breaker.record_success()
+    breaker.allow()
+    assert not breaker.is_open
+
+
+def test_latency_quantile_needs_enough_samples():
+    tracker = LatencyTracker()
+    for latency in range(1, 11):
+        tracker.add(float(latency))
+
+    assert tracker.quantile(0.9, min_samples=20) is None
+    assert tracker.quantile(0.9, min_samples=10) == 10.0
+
+
+@pytest.mark.asyncio
+async def test_resilient_retries_with_backoff():
+    model, calls = flaky(failures=2)
+
+    result = await resilient(model, max_retries=2, backoff_base=0.001).ainvoke("prompt")
+
+    assert result == "ok"
+    assert len(calls) == 3
+
+
+@pytest.mark.asyncio
+async def test_resilient_gives_up_after_max_retries():
+    model, calls = flaky(failures=5)
+
+    with pytest.raises(ConnectionError):
+        await resilient(model, max_retries=1, backoff_base=0.001).ainvoke("prompt")
+    assert len(calls) == 2
+
+
+@pytest.mark.asyncio
+async def test_resilient_enforces_the_deadline():
+    model, _ = flaky(failures=0, delay=1.0)
+
+    with pytest.raises(TimeoutError):
+        await resilient(model, timeout=0.01).ainvoke("prompt")
+
+
+@pytest.mark.asyncio
+async def test_open_circuit_fails_fast_without_calling_the_model():
+    model, calls = flaky(failures=100)
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=60.0)
+    step = resilient(model, max_retries=5, backoff_base=0.001, breaker=breaker)
+
+    with pytest.raises(CircuitOpenError):
+        await step.ainvoke("prompt")
+    with pytest.raises(CircuitOpenError):
+        await step.ainvoke("prompt")
+    assert len(calls) == 2
@@ -0,0 +1,64 @@
+import json
+import pytest
+from langchain_core.prompts import PromptTemplate
+from gideon.agents.renamer import DocumentAnalyzer
+from gideon.llm.factory import LLMServiceFactory, LLMServiceType
+from gideon.llm.stub import StubChatModel
+from gideon.models.document import DocumentInfo, TOPIC_LIST
+
+CONTENT = "A Study of Graphs\nAlice Smith\nBob Jones\nUniversity of Somewhere, 2021"
+
+
+def make_stub(**config):
+    return LLMServiceFactory.create(LLMServiceType.STUB, {"latency": 0.0, "max_retries": 0, **config})
+
+
+@pytest.mark.asyncio
+async def test_stub_answers_analysis_prompts_from_the_content():
+    analyzer = DocumentAnalyzer(LLMServiceType.STUB, {"latency": 0.0})
+
+    info = await analyzer.analyze(CONTENT, "scan.pdf")
+
+    assert info == DocumentInfo(["Alice Smith", "Bob Jones"], "2021", "A Study of Graphs", info.topic, 0.9)
+    assert info.topic in TOPIC_LIST
+    assert await analyzer.analyze(CONTENT, "copy.pdf") == info
+
+
+@pytest.mark.asyncio
+async def test_stub_answers_classification_prompts():
+    analyzer = DocumentAnalyzer(LLMServiceType.STUB, {"latency": 0.0})
+
+    assert (await analyzer.classify("A Study of Graphs"))["topic"] in TOPIC_LIST
+
+
+def test_stub_failure_and_malformed_rates_are_seeded():
+    def outcomes(seed):
+        model = StubChatModel(latency=0.0, failure_rate=0.3, malformed_rate=0.3, seed=seed)
+        results = []
+        for _ in range(40):
+            try:
+                json.loads(model.invoke("Document content:\n" + CONTENT).content)
+                results.append("ok")
+            except ConnectionError:
+                results.append("failed")
+            except json.JSONDecodeError:
+                results.append("malformed")
+        return results
+
+    first = outcomes(seed=7)
+    assert first == outcomes(seed=7)
+    assert {"ok", "failed", "malformed"} <= set(first)
+
+
+@pytest.mark.asyncio
+async def test_stub_stalls_trip_the_request_deadline():
+    service = make_stub(stall_rate=1.0, stall_latency=5.0, request_timeout=0.05)
+    chain = await service.create_chain(PromptTemplate.from_template("Document content:\n{content}"))
+
+    with pytest.raises(TimeoutError):
+        await chain.ainvoke({"content": CONTENT})
+
+
+def test_stub_config_rejects_invalid_rates():
+    with pytest.raises(ValueError):
+        make_stub(failure_rate=1.5)
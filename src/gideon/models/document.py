@@ -1,4 +1,4 @@
-from typing import List
+from typing import List, Optional
 from dataclasses import dataclass
 
 UNKNOWN_AUTHOR = "Unknown_Author"
@@ -46,3 +46,5 @@ class DocumentInfo:
     year: str
     title: str
     topic: str = UNKNOWN_TOPIC
+    # How sure the model is of the other fields, from 0 to 1, when it reports it
+    confidence: Optional[float] = None
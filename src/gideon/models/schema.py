@@ -0,0 +1,47 @@
+"""JSON schemas that constrain LLM output to the document model."""
+import json
+from typing import Any, Dict
+from pydantic import TypeAdapter
+
+from .document import DocumentInfo, TOPIC_LIST
+
+
+def document_info_schema() -> Dict[str, Any]:
+    """The schema of DocumentInfo as the LLM must return it.
+
+    Every field is required, the year is four digits or empty, the topic is one of TOPIC_LIST and
+    the confidence is a number from 0 to 1.
+    """
+    schema = TypeAdapter(DocumentInfo).json_schema()
+    properties = {
+        name: {key: value for key, value in field.items() if key not in ("title", "default")}
+        for name, field in schema["properties"].items()
+    }
+    properties["year"]["pattern"] = "^([0-9]{4})?$"
+    properties["topic"]["enum"] = list(TOPIC_LIST)
+    properties["confidence"] = {"type": "number", "minimum": 0, "maximum": 1}
+    return {
+        "type": "object",
+        "properties": properties,
+        "required": list(properties),
+        "additionalProperties": False,
+    }
+
+
+def topic_schema() -> Dict[str, Any]:
+    """The schema of a title classification: a single topic from TOPIC_LIST."""
+    return {
+        "type": "object",
+        "properties": {"topic": {"type": "string", "enum": list(TOPIC_LIST)}},
+        "required": ["topic"],
+        "additionalProperties": False,
+    }
+
+
+def schema_key(schema: Dict[str, Any]) -> str:
+    """A canonical string for a schema, used to memoize and cache by schema."""
+    return json.dumps(schema, sort_keys=True, separators=(",", ":"))
+
+
+DOCUMENT_INFO_SCHEMA = document_info_schema()
+TOPIC_SCHEMA = topic_schema()
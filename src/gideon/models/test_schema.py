@@ -0,0 +1,25 @@
+import re
+from gideon.models.document import TOPIC_LIST
+from gideon.models.schema import DOCUMENT_INFO_SCHEMA, TOPIC_SCHEMA, schema_key
+
+
+def test_document_schema_requires_every_field_and_limits_topics():
+    properties = DOCUMENT_INFO_SCHEMA["properties"]
+
+    assert set(DOCUMENT_INFO_SCHEMA["required"]) == {"authors", "year", "title", "topic", "confidence"}
+    assert DOCUMENT_INFO_SCHEMA["additionalProperties"] is False
+    assert properties["authors"] == {"type": "array", "items": {"type": "string"}}
+    assert properties["topic"]["enum"] == TOPIC_LIST
+
+
+def test_document_schema_year_is_four_digits_or_empty():
+    pattern = re.compile(DOCUMENT_INFO_SCHEMA["properties"]["year"]["pattern"])
+
+    assert pattern.match("2022") and pattern.match("")
+    assert not pattern.match("22") and not pattern.match("circa 2022")
+
+
+def test_topic_schema():
+    assert TOPIC_SCHEMA["properties"]["topic"]["enum"] == TOPIC_LIST
+    assert TOPIC_SCHEMA["required"] == ["topic"]
+    assert schema_key(TOPIC_SCHEMA) != schema_key(DOCUMENT_INFO_SCHEMA)
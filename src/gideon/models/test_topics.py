@@ -0,0 +1,52 @@
+import pytest
+from gideon.models.document import TOPIC_LIST
+from gideon.models.topics import TOPIC_INDEX, TopicIndex, bounded_edit_distance, topic_key
+
+
+@pytest.mark.parametrize(
+    "answer, topic",
+    [
+        ("Machine Learning", "Machine Learning"),
+        ("machine_learning", "Machine Learning"),
+        ("MACHINE-LEARNING", "Machine Learning"),
+        ("MachineLearning", "Machine Learning"),
+        ("Comp Sci", "Computer Science"),
+        ("AI", "Artificial Intelligence"),
+        ("Maths", "Mathematics"),
+        ("Mathematcs", "Mathematics"),
+        ("Psycology", "Psychology"),
+        ("Softwre Enginering", "Software Engineering"),
+        ("Économics", "Economics"),
+    ],
+)
+def test_resolves_near_misses(answer, topic):
+    assert TOPIC_INDEX.resolve(answer) == topic
+
+
+@pytest.mark.parametrize("answer", ["", "Astrology", "xyz", "Cooking Recipes"])
+def test_unknown_topics_stay_unresolved(answer):
+    assert TOPIC_INDEX.resolve(answer) is None
+
+
+def test_every_canonical_topic_resolves_to_itself():
+    assert [TOPIC_INDEX.resolve(topic) for topic in TOPIC_LIST] == TOPIC_LIST
+
+
+def test_short_keys_only_match_exactly():
+    index = TopicIndex(["Art", "Law"], aliases={})
+
+    assert index.resolve("law") == "Law"
+    assert index.resolve("Lax") is None
+
+
+def test_ambiguous_misspellings_are_not_guessed():
+    index = TopicIndex(["Biology", "Geology"], aliases={})
+
+    assert index.resolve("Beology") is None
+    assert index.resolve("Biologgy") == "Biology"
+
+
+def test_topic_key_and_edit_distance():
+    assert topic_key("  Data__Science & Co ") == "data science and co"
+    assert bounded_edit_distance("topology", "topolgy", 2) == 1
+    assert bounded_edit_distance("topology", "biology", 1) == 2
@@ -0,0 +1,112 @@
+"""Map the topic names models actually produce onto the canonical topics of TOPIC_LIST."""
+import re
+import unicodedata
+from typing import Dict, Iterable, Mapping, Optional
+
+from .document import TOPIC_LIST
+
+# Abbreviations and synonyms for canonical topics, in any case and with spaces or underscores
+TOPIC_ALIASES = {
+    "Mathematics": ["math", "maths", "mathematic", "pure mathematics", "applied mathematics"],
+    "Topology": ["algebraic topology", "general topology"],
+    "Geometry": ["differential geometry", "algebraic geometry"],
+    "Algebra": ["linear algebra", "abstract algebra"],
+    "Analysis": ["real analysis", "complex analysis", "functional analysis", "mathematical analysis"],
+    "Probability": ["probability theory"],
+    "Statistics": ["stats", "stat", "statistic"],
+    "Combinatorics": ["discrete mathematics", "graph theory"],
+    "Computer Science": ["cs", "comp sci", "compsci", "computing", "informatics", "computer sciences"],
+    "Physics": ["phys"],
+    "Chemistry": ["chem"],
+    "Biology": ["bio", "life sciences"],
+    "Economics": ["econ", "economy"],
+    "Business": ["business administration"],
+    "Medicine": ["medical", "health", "healthcare"],
+    "Psychology": ["psych"],
+    "Arts": ["art", "fine arts"],
+    "Law": ["legal"],
+    "Artificial Intelligence": ["ai", "a i"],
+    "Machine Learning": ["ml", "deep learning"],
+    "Data Science": ["data analytics", "data analysis"],
+    "Software Engineering": ["se", "software development"],
+    "Other": ["others", "misc", "miscellaneous", "general"],
+}
+
+
+def topic_key(topic: str) -> str:
+    """Fold case, accents, punctuation, underscores and runs of spaces out of a topic name."""
+    text = unicodedata.normalize("NFKD", topic).encode("ascii", "ignore").decode().lower()
+    text = text.replace("&", " and ")
+    return " ".join(re.findall(r"[a-z0-9]+", text))
+
+
+def bounded_edit_distance(a: str, b: str, limit: int) -> int:
+    """Levenshtein distance between a and b, or limit + 1 as soon as it must exceed limit."""
+    if abs(len(a) - len(b)) > limit:
+        return limit + 1
+    previous = list(range(len(b) + 1))
+    for i, char_a in enumerate(a, start=1):
+        current = [i] + [0] * len(b)
+        for j, char_b in enumerate(b, start=1):
+            current[j] = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (char_a != char_b))
+        if min(current) > limit:
+            return limit + 1
+        previous = current
+    return min(previous[-1], limit + 1)
+
+
+class TopicIndex:
+    """Resolve near-miss topic names to canonical topics.
+
+    Canonical names and aliases are stored under their folded key, with and without spaces, so
+    "machine_learning", "MachineLearning" and "ML" are dictionary lookups. Misspellings fall back to
+    a scan for the single key within `max_distance` edits; keys shorter than `min_fuzzy_length`
+    only match exactly, since short abbreviations are one edit away from each other.
+    """
+
+    def __init__(
+        self,
+        topics: Iterable[str] = TOPIC_LIST,
+        aliases: Optional[Mapping[str, Iterable[str]]] = None,
+        max_distance: int = 2,
+        min_fuzzy_length: int = 5,
+    ):
+        self.topics = list(topics)
+        self.max_distance = max_distance
+        self.min_fuzzy_length = min_fuzzy_length
+        self.keys: Dict[str, str] = {}
+        aliases = TOPIC_ALIASES if aliases is None else aliases
+        for topic in self.topics:
+            for name in [topic, *aliases.get(topic, [])]:
+                key = topic_key(name)
+                self.keys.setdefault(key, topic)
+                self.keys.setdefault(key.replace(" ", ""), topic)
+
+    def __contains__(self, topic: str) -> bool:
+        return topic in self.topics
+
+    def resolve(self, topic: str) -> Optional[str]:
+        """The canonical topic for a model's answer, or None if it matches none."""
+        if topic in self.topics:
+            return topic
+        key = topic_key(topic or "")
+        if not key:
+            return None
+        match = self.keys.get(key) or self.keys.get(key.replace(" ", ""))
+        if match or len(key) < self.min_fuzzy_length:
+            return match
+
+        limit = 1 if len(key) < 8 else self.max_distance
+        best, best_distance, tied = None, limit + 1, False
+        for candidate, canonical in self.keys.items():
+            if len(candidate) < self.min_fuzzy_length:
+                continue
+            distance = bounded_edit_distance(key, candidate, limit)
+            if distance < best_distance:
+                best, best_distance, tied = canonical, distance, False
+            elif distance == best_distance and canonical != best:
+                tied = True
+        return None if tied else best
+
+
+TOPIC_INDEX = TopicIndex()
@@ -0,0 +1,69 @@
+"""Fake file and rename services shared by the pipeline and worker tests."""
+import asyncio
+import pytest
+from gideon.models.document import DocumentInfo
+from gideon.services.file_service import FileService
+from gideon.services.pdf_extractor import PdfExtract
+from gideon.services.rename_service import RenameProposal
+
+INFO = DocumentInfo(["Alice Smith"], "2022", "A Study", "Mathematics")
+
+
+class FakeFileService:
+    """Extracts "text of <name>" from every file but the unreadable ones and the scanned ones, which
+    only have the given metadata. Renames are recorded, and only made on disk with `on_disk`."""
+
+    def __init__(self, unreadable=(), scanned=(), on_disk=False):
+        self.unreadable = set(unreadable)
+        self.scanned = dict(scanned)
+        self.on_disk = on_disk
+        self.extracted = []
+        self.renamed = []
+
+    async def extract_pdf(self, file_path, executor=None, cache=None, content_hash=None):
+        self.extracted.append(file_path.name)
+        await asyncio.sleep(0)
+        if file_path.name in self.unreadable:
+            return None
+        if file_path.name in self.scanned:
+            return PdfExtract("", self.scanned[file_path.name])
+        return PdfExtract(f"text of {file_path.name}")
+
+    def rename_file(self, file_path, new_name):
+        self.renamed.append((file_path.name, new_name))
+        return FileService.rename_file(file_path, new_name) if self.on_disk else file_path.parent / new_name
+
+
+class FakeRenameService:
+    """Names every file new_<name>, except files named bad*, which it cannot analyze. Batches wait
+    for `release` when given, then take `delay` seconds."""
+
+    def __init__(self, release=None, delay=0.0):
+        self.release = release
+        self.delay = delay
+        self.batches = []
+
+    @property
+    def analyzed(self):
+        return [file_name for batch in self.batches for file_name in batch]
+
+    async def propose_batch(self, documents):
+        if self.release is not None:
+            await self.release.wait()
+        if self.delay:
+            await asyncio.sleep(self.delay)
+        self.batches.append([file_name for _, file_name, _ in documents])
+        return [
+            RenameProposal(file_name) if file_name.startswith("bad") else RenameProposal(f"new_{file_name}", INFO)
+            for _, file_name, _ in documents
+        ]
+
+
+@pytest.fixture
+def make_file_service():
+    return FakeFileService
+
+
+@pytest.fixture
+def make_rename_service():
+    return FakeRenameService
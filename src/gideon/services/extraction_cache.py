@@ -0,0 +1,81 @@
+"""On-disk cache of extracted PDF text, keyed by file content and extractor settings."""
+import sqlite3
+import time
+from pathlib import Path
+from typing import Optional
+from ..core.config import settings
+
+
+class ExtractionCache:
+    """A size-bounded LRU cache stored in a SQLite database.
+
+    Entries are keyed by the SHA-256 of the file contents plus the extractor settings, so renamed or
+    moved files still hit, while edited files or a different page/character budget miss.
+    """
+
+    # Bump when the stored payload changes shape so stale entries stop matching
+    FORMAT_VERSION = 2
+
+    def __init__(self, path: Path, max_bytes: int):
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self.path = path
+        self.max_bytes = max_bytes
+        self._connection = sqlite3.connect(str(path))
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute(
+            "CREATE TABLE IF NOT EXISTS entries ("
+            "key TEXT PRIMARY KEY, content TEXT NOT NULL, size INTEGER NOT NULL, last_access REAL NOT NULL)"
+        )
+        self._connection.execute("CREATE INDEX IF NOT EXISTS entries_last_access ON entries (last_access)")
+        self._connection.commit()
+        self._total_bytes = self._connection.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+
+    @classmethod
+    def open_default(cls) -> "ExtractionCache":
+        return cls(settings.CACHE_DIR / "extraction.sqlite", settings.EXTRACTION_CACHE_MAX_BYTES)
+
+    @staticmethod
+    def make_key(content_hash: str, max_pages: int, max_chars: int) -> str:
+        return f"{ExtractionCache.FORMAT_VERSION}:{content_hash}:{max_pages}:{max_chars}"
+
+    def get(self, key: str) -> Optional[str]:
+        row = self._connection.execute("SELECT content FROM entries WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            return None
+        self._connection.execute("UPDATE entries SET last_access = ? WHERE key = ?", (time.time(), key))
+        self._connection.commit()
+        return row[0]
+
+    def put(self, key: str, content: str) -> None:
+        size = len(content.encode("utf-8"))
+        previous = self._connection.execute("SELECT size FROM entries WHERE key = ?", (key,)).fetchone()
+        if previous is not None:
+            self._total_bytes -= previous[0]
+        self._connection.execute(
+            "INSERT OR REPLACE INTO entries (key, content, size, last_access) VALUES (?, ?, ?, ?)",
+            (key, content, size, time.time()),
+        )
+        self._total_bytes += size
+        self._evict()
+        self._connection.commit()
+
+    def _evict(self) -> None:
+        """Drop least recently used entries until the cache fits in max_bytes."""
+        while self._total_bytes > self.max_bytes:
+            rows = self._connection.execute(
+                "SELECT key, size FROM entries ORDER BY last_access LIMIT 100"
+            ).fetchall()
+            if not rows:
+                self._total_bytes = 0
+                return
+            for key, size in rows:
+                self._connection.execute("DELETE FROM entries WHERE key = ?", (key,))
+                self._total_bytes -= size
+                if self._total_bytes <= self.max_bytes:
+                    return
+
+    def __len__(self) -> int:
+        return self._connection.execute("SELECT COUNT(*) FROM entries").fetchone()[0]
+
+    def close(self) -> None:
+        self._connection.close()
@@ -1,23 +1,89 @@
+import asyncio
+import hashlib
+import json
+import os
+from concurrent.futures import Executor, ProcessPoolExecutor
+from dataclasses import asdict
 from pathlib import Path
 from typing import List, Optional
-from PyPDF2 import PdfReader
 from rich.tree import Tree
-import hashlib
 from ..core.config import settings
 from ..utils.logging import log_success, log_error
+from .extraction_cache import ExtractionCache
+from .pdf_extractor import PdfExtract, extract_pdf
 
 
 class FileService:
     @staticmethod
-    async def extract_pdf_content(file_path: Path) -> str:
+    def create_extraction_executor(max_workers: Optional[int] = None) -> Executor:
+        """Create the process pool used for CPU-bound PDF parsing.
+
+        Args:
+            max_workers: Number of worker processes, defaults to EXTRACTION_WORKERS or the CPU count
+        """
+        workers = max_workers or settings.EXTRACTION_WORKERS or os.cpu_count() or 1
+        return ProcessPoolExecutor(max_workers=workers)
+
+    @staticmethod
+    def hash_file(file_path: Path, chunk_size: int = 1024 * 1024) -> str:
+        """Return the SHA-256 of a file's contents, read in chunks to keep memory flat."""
+        digest = hashlib.sha256()
+        with open(file_path, "rb") as f:
+            while chunk := f.read(chunk_size):
+                digest.update(chunk)
+        return digest.hexdigest()
+
+    @staticmethod
+    async def extract_pdf(
+        file_path: Path,
+        executor: Optional[Executor] = None,
+        cache: Optional[ExtractionCache] = None,
+        content_hash: Optional[str] = None,
+    ) -> Optional[PdfExtract]:
+        """Extract PDF text and embedded metadata off the event loop.
+
+        Args:
+            file_path: The PDF to read
+            executor: Executor to parse in; the loop's default thread pool is used when omitted
+            cache: Extraction cache to look up unchanged files in and store new results to
+            content_hash: SHA-256 of the file when the caller has already computed it
+        """
         try:
-            pfd_reader = PdfReader(str(file_path))
-            pages = pfd_reader.pages[:settings.MAX_PDF_PAGES]
-            return "\n".join([page.extract_text() for page in pages if page.extract_text()])
-            
+            loop = asyncio.get_running_loop()
+            cache_key = None
+            if cache is not None:
+                if content_hash is None:
+                    content_hash = await loop.run_in_executor(executor, FileService.hash_file, file_path)
+                cache_key = ExtractionCache.make_key(content_hash, settings.MAX_PDF_PAGES, settings.MAX_EXTRACT_CHARS)
+                cached = cache.get(cache_key)
+                if cached is not None:
+                    return PdfExtract(**json.loads(cached))
+
+            extract = await loop.run_in_executor(
+                executor,
+                extract_pdf,
+                str(file_path),
+                settings.MAX_PDF_PAGES,
+                settings.MAX_EXTRACT_CHARS,
+                settings.LAZY_PDF_OPEN,
+            )
+            if cache_key is not None and extract.text:
+                cache.put(cache_key, json.dumps(asdict(extract)))
+            return extract
+
         except Exception as e:
             log_error(f"Error reading PDF file {file_path.name}: {e}")
-            return ""
+            return None
+
+    @staticmethod
+    async def extract_pdf_content(
+        file_path: Path,
+        executor: Optional[Executor] = None,
+        cache: Optional[ExtractionCache] = None,
+    ) -> str:
+        """Extract PDF text off the event loop, returning an empty string on failure."""
+        extract = await FileService.extract_pdf(file_path, executor, cache)
+        return extract.text if extract else ""
 
     @staticmethod
     def get_files_by_extension(directory: Path, extension: str = ".pdf") -> List[Path]:
@@ -25,17 +91,41 @@ class FileService:
 
     @staticmethod
     def rename_file(file_path: Path, new_name: str) -> Optional[Path]:
+        """Rename a file within its folder, never replacing an existing file; None on failure."""
         try:
             new_path = file_path.parent / new_name
             if new_path != file_path:
-                file_path.rename(new_path)
+                FileService._move_without_replacing(file_path, new_path)
                 log_success(f"Renamed: {file_path.name} -> {new_name}")
                 return new_path
             return file_path
+        except FileExistsError:
+            log_error(f"Not renaming {file_path.name}: {new_name} already exists")
+            return None
         except Exception as e:
             log_error(f"Error renaming {file_path}: {str(e)}")
             return None
 
+    @staticmethod
+    def _move_without_replacing(source: Path, target: Path) -> None:
+        # Path.rename replaces an existing target; a hard link fails instead, atomically, even when
+        # another process or host creates the target at the same moment
+        try:
+            os.link(source, target)
+        except FileExistsError:
+            raise
+        except OSError:
+            # Filesystems without hard links; checking first narrows the race without closing it
+            if target.exists():
+                raise FileExistsError(target) from None
+            source.rename(target)
+            return
+        try:
+            os.unlink(source)
+        except OSError:
+            os.unlink(target)
+            raise
+
     @staticmethod
     def create_directory_tree(directory: Path) -> Tree:
         tree = Tree(f"[bold magenta]{directory.name}[/bold magenta]")
@@ -56,7 +146,7 @@ class FileService:
         visited_files = set()
         removed_files = 0
         for file in files:
-            file_hash = hashlib.sha256(file.read_bytes()).hexdigest()
+            file_hash = FileService.hash_file(file)
             if file_hash in visited_files:
                 file.unlink()
                 log_success(f"Removed: {file.name}")
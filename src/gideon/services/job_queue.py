@@ -0,0 +1,205 @@
+"""SQLite-backed queue of rename jobs shared by `gideon worker` processes."""
+import contextlib
+import itertools
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional
+from ..core.config import settings
+
+# Job states
+PENDING = "pending"
+LEASED = "leased"
+DONE = "done"
+FAILED = "failed"
+
+
+def is_busy(error: sqlite3.OperationalError) -> bool:
+    """Whether an error only means another process held the queue's lock for too long."""
+    code = getattr(error, "sqlite_errorcode", None)
+    if code is None:
+        return "locked" in str(error) or "busy" in str(error)
+    # Extended result codes keep the primary code in the low byte
+    return code & 0xFF in (sqlite3.SQLITE_BUSY, sqlite3.SQLITE_LOCKED)
+
+
+@dataclass
+class QueuedJob:
+    id: int
+    # Path relative to the queue's directory, so hosts mounting it in different places can share it
+    path: str
+    attempts: int
+    # Set just before the rename, so a retry can tell whether the rename already happened
+    new_name: Optional[str] = None
+
+
+class JobQueue:
+    """A table of files to rename, leased to workers for a limited time.
+
+    A worker leases a few pending jobs at a time and extends the lease with heartbeats while it
+    works on them. Jobs whose lease runs out, because their worker died or hung, go back to any
+    worker that asks, up to `max_attempts` leases in all. Leases and completions only succeed for
+    the worker holding the job, so a worker that lost its lease cannot finish the job twice.
+
+    Workers on several hosts can share the queue over a network filesystem as long as its file
+    locking works, which is why the queue uses a rollback journal rather than WAL: WAL needs memory
+    shared by all processes, so it only works on one host. Lease expiry compares clocks of different
+    hosts, so a lease is only taken over `clock_skew` seconds after it expired; host clocks must
+    agree to within that margin.
+
+    One queue may be used from several threads, one operation at a time.
+    """
+
+    # Files inserted per transaction, so enqueueing a large directory never holds the lock for long
+    ENQUEUE_CHUNK_SIZE = 500
+
+    def __init__(
+        self,
+        path: Path,
+        root: Path,
+        lease_seconds: Optional[float] = None,
+        max_attempts: Optional[int] = None,
+        clock_skew: Optional[float] = None,
+    ):
+        self.path = path
+        self.root = root
+        self.lease_seconds = lease_seconds or settings.WORKER_LEASE_SECONDS
+        self.max_attempts = max_attempts or settings.WORKER_MAX_ATTEMPTS
+        self.clock_skew = settings.WORKER_CLOCK_SKEW if clock_skew is None else clock_skew
+        # Transactions are managed explicitly so leasing can take the write lock up front
+        self._connection = sqlite3.connect(str(path), timeout=30, isolation_level=None, check_same_thread=False)
+        self._lock = threading.Lock()
+        self._connection.execute("PRAGMA journal_mode=DELETE")
+        self._connection.execute(
+            "CREATE TABLE IF NOT EXISTS jobs ("
+            "id INTEGER PRIMARY KEY, path TEXT NOT NULL UNIQUE, status TEXT NOT NULL, worker TEXT, "
+            "lease_expires REAL, attempts INTEGER NOT NULL DEFAULT 0, new_name TEXT, error TEXT, "
+            "updated_at REAL NOT NULL)"
+        )
+        self._connection.execute("CREATE INDEX IF NOT EXISTS jobs_status ON jobs (status, lease_expires)")
+
+    @classmethod
+    def open(cls, directory: Path, **kwargs) -> "JobQueue":
+        return cls(directory / settings.WORKER_QUEUE_FILENAME, directory, **kwargs)
+
+    def enqueue(self, files: Iterable[Path]) -> int:
+        """Add files not queued yet, returning how many were added.
+
+        `files` is read a chunk at a time outside any transaction, so a slow directory walk does not
+        keep workers already running from leasing jobs.
+        """
+        files = iter(files)
+        added = 0
+        while chunk := [self._key(file_path) for file_path in itertools.islice(files, self.ENQUEUE_CHUNK_SIZE)]:
+            now = time.time()
+            with self._transaction():
+                before = self._connection.total_changes
+                self._connection.executemany(
+                    "INSERT OR IGNORE INTO jobs (path, status, updated_at) VALUES (?, ?, ?)",
+                    ((key, PENDING, now) for key in chunk),
+                )
+                added += self._connection.total_changes - before
+        return added
+
+    def lease(self, worker: str, limit: int = 1) -> List[QueuedJob]:
+        """Lease up to `limit` pending jobs, or jobs whose lease has expired, to a worker."""
+        now = time.time()
+        # Leases written by a host whose clock runs behind look expired early; wait out the difference
+        expired = now - self.clock_skew
+        with self._transaction():
+            # Expired jobs that used up their attempts are given up on rather than leased again
+            self._connection.execute(
+                "UPDATE jobs SET status = ?, worker = NULL, error = 'lease expired', updated_at = ? "
+                "WHERE status = ? AND lease_expires < ? AND attempts >= ?",
+                (FAILED, now, LEASED, expired, self.max_attempts),
+            )
+            rows = self._connection.execute(
+                "SELECT id, path, attempts, new_name FROM jobs "
+                "WHERE status = ? OR (status = ? AND lease_expires < ?) ORDER BY id LIMIT ?",
+                (PENDING, LEASED, expired, limit),
+            ).fetchall()
+            self._connection.executemany(
+                "UPDATE jobs SET status = ?, worker = ?, lease_expires = ?, attempts = attempts + 1, updated_at = ? "
+                "WHERE id = ?",
+                ((LEASED, worker, now + self.lease_seconds, now, row[0]) for row in rows),
+            )
+        return [QueuedJob(job_id, path, attempts + 1, new_name) for job_id, path, attempts, new_name in rows]
+
+    def heartbeat(self, worker: str, jobs: Iterable[QueuedJob]) -> int:
+        """Extend the worker's leases on jobs, returning how many it still holds."""
+        now = time.time()
+        ids = [job.id for job in jobs]
+        with self._transaction():
+            cursor = self._connection.executemany(
+                "UPDATE jobs SET lease_expires = ?, updated_at = ? WHERE id = ? AND worker = ? AND status = ?",
+                ((now + self.lease_seconds, now, job_id, worker, LEASED) for job_id in ids),
+            )
+            return cursor.rowcount
+
+    def begin_rename(self, worker: str, job: QueuedJob, new_name: str) -> bool:
+        """Record the name a job's file is about to get; False if the worker no longer holds the job."""
+        with self._transaction():
+            cursor = self._connection.execute(
+                "UPDATE jobs SET new_name = ?, updated_at = ? WHERE id = ? AND worker = ? AND status = ?",
+                (new_name, time.time(), job.id, worker, LEASED),
+            )
+        job.new_name = new_name
+        return cursor.rowcount == 1
+
+    def release(self, worker: str, jobs: Iterable[QueuedJob]) -> None:
+        """Hand jobs a worker is leaving back to the queue, without counting the attempt."""
+        with self._transaction():
+            self._connection.executemany(
+                "UPDATE jobs SET status = ?, worker = NULL, lease_expires = NULL, attempts = attempts - 1, "
+                "updated_at = ? WHERE id = ? AND worker = ? AND status = ?",
+                ((PENDING, time.time(), job.id, worker, LEASED) for job in jobs),
+            )
+
+    def complete(self, worker: str, job: QueuedJob) -> bool:
+        return self._finish(worker, job, DONE, None)
+
+    def fail(self, worker: str, job: QueuedJob, error: str) -> bool:
+        """Release a job for another attempt, or give up on it after `max_attempts`."""
+        status = FAILED if job.attempts >= self.max_attempts else PENDING
+        return self._finish(worker, job, status, error)
+
+    def counts(self) -> Dict[str, int]:
+        with self._lock:
+            rows = self._connection.execute("SELECT status, COUNT(*) FROM jobs GROUP BY status").fetchall()
+        return {status: 0 for status in (PENDING, LEASED, DONE, FAILED)} | dict(rows)
+
+    def has_unfinished(self) -> bool:
+        with self._lock:
+            return self._connection.execute(
+                "SELECT EXISTS (SELECT 1 FROM jobs WHERE status IN (?, ?))", (PENDING, LEASED)
+            ).fetchone()[0] == 1
+
+    def close(self) -> None:
+        with self._lock:
+            self._connection.close()
+
+    def _finish(self, worker: str, job: QueuedJob, status: str, error: Optional[str]) -> bool:
+        with self._transaction():
+            cursor = self._connection.execute(
+                "UPDATE jobs SET status = ?, worker = NULL, lease_expires = NULL, error = ?, updated_at = ? "
+                "WHERE id = ? AND worker = ? AND status = ?",
+                (status, error, time.time(), job.id, worker, LEASED),
+            )
+        return cursor.rowcount == 1
+
+    @contextlib.contextmanager
+    def _transaction(self) -> Iterator[None]:
+        with self._lock:
+            # BEGIN IMMEDIATE takes the write lock up front, so concurrent workers queue for it instead of deadlocking
+            self._connection.execute("BEGIN IMMEDIATE")
+            try:
+                yield
+            except BaseException:
+                self._connection.execute("ROLLBACK")
+                raise
+            self._connection.execute("COMMIT")
+
+    def _key(self, file_path: Path) -> str:
+        return file_path.relative_to(self.root).as_posix()
@@ -0,0 +1,119 @@
+"""Write-ahead journal of analysis results and renames, so an interrupted run can be resumed."""
+import json
+import os
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Dict, List, Optional, Set, Tuple
+from ..core.config import settings
+from ..models.document import DocumentInfo
+from ..utils.logging import log_warning
+
+# Journal events
+PROPOSED = "proposed"
+APPLIED = "applied"
+
+
+@dataclass
+class JournalState:
+    """What an interrupted run got done, read back from its journal."""
+
+    # Files renamed or confirmed, by their current path relative to the directory
+    finished: Set[str] = field(default_factory=set)
+    # Analyzed files whose rename was not confirmed: path -> (new name, DocumentInfo)
+    proposed: Dict[str, Tuple[str, Optional[dict]]] = field(default_factory=dict)
+
+
+class RenameJournal:
+    """An append-only JSONL log kept in the renamed directory while `rename auto` runs.
+
+    Every analysis result is appended and synced to disk before the file is renamed, and every
+    rename is appended once it is done. After a crash the journal tells which renames to replay and
+    which files still need work; after a run that finishes, it is deleted.
+    """
+
+    def __init__(self, path: Path, root: Path):
+        self.path = path
+        self.root = root
+        self._file = None
+
+    @classmethod
+    def for_directory(cls, directory: Path) -> "RenameJournal":
+        return cls(directory / settings.JOURNAL_FILENAME, directory)
+
+    def exists(self) -> bool:
+        return self.path.exists()
+
+    def load(self) -> JournalState:
+        state = JournalState()
+        if not self.exists():
+            return state
+        with open(self.path, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    # The last line of a journal cut off mid-write
+                    continue
+                if entry["event"] == PROPOSED:
+                    state.proposed[entry["path"]] = (entry["new_name"], entry.get("doc_info"))
+                elif entry["event"] == APPLIED:
+                    state.proposed.pop(entry["path"], None)
+                    state.finished.add(entry["new_path"])
+        return state
+
+    def replay(self, state: JournalState) -> List[Tuple[Path, Path]]:
+        """Finish the renames an interrupted run had decided on, returning (old, new) path pairs.
+
+        A rename whose source is gone and whose target exists already happened before the crash.
+        Renames that cannot be completed are left out, so their files are analyzed again.
+        """
+        replayed = []
+        for relative_path, (new_name, _) in state.proposed.items():
+            source = self.root / relative_path
+            target = source.parent / new_name
+            if source.exists() and (target == source or not target.exists()):
+                source.rename(target)
+            elif source.exists() or not target.exists():
+                continue
+            replayed.append((source, target))
+            state.finished.add(self._key(target))
+        state.proposed.clear()
+        return replayed
+
+    def open(self, resume: bool = False) -> None:
+        """Start appending; without resume, a journal left by an earlier run is discarded."""
+        if not resume and self.exists():
+            log_warning(f"Discarding the journal of an interrupted run in {self.root}; use --resume to continue it")
+        self._file = open(self.path, "a" if resume else "w", encoding="utf-8")
+
+    def propose(self, entries: List[Tuple[Path, str, Optional[DocumentInfo]]]) -> None:
+        """Record analysis results and the renames they lead to, durably, before any is applied."""
+        for file_path, new_name, doc_info in entries:
+            self._write(
+                {
+                    "event": PROPOSED,
+                    "path": self._key(file_path),
+                    "new_name": new_name,
+                    "doc_info": asdict(doc_info) if doc_info else None,
+                }
+            )
+        self._file.flush()
+        os.fsync(self._file.fileno())
+
+    def applied(self, file_path: Path, new_path: Path) -> None:
+        # Not synced: a lost entry is recovered by replay, which finds the rename already done
+        self._write({"event": APPLIED, "path": self._key(file_path), "new_path": self._key(new_path)})
+        self._file.flush()
+
+    def close(self, completed: bool = False) -> None:
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+        if completed and self.exists():
+            self.path.unlink()
+
+    def _write(self, entry: dict) -> None:
+        self._file.write(json.dumps(entry) + "\n")
+
+    def _key(self, file_path: Path) -> str:
+        return file_path.relative_to(self.root).as_posix()
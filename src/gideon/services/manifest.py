@@ -0,0 +1,122 @@
+"""Per-directory record of the files `rename auto` has seen, so later runs skip unchanged files."""
+import os
+import sqlite3
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Optional
+from ..core.config import settings
+
+# Outcomes recorded for a file
+RENAMED = "renamed"
+UNCHANGED_NAME = "unchanged"
+FAILED = "failed"
+# Files with these outcomes are not processed again until their contents change
+FINAL_OUTCOMES = (RENAMED, UNCHANGED_NAME)
+
+
+@dataclass
+class ManifestEntry:
+    path: str
+    size: int
+    mtime_ns: int
+    inode: int
+    content_hash: Optional[str]
+    outcome: str
+
+    def matches(self, stat: os.stat_result) -> bool:
+        return (self.size, self.mtime_ns, self.inode) == (stat.st_size, stat.st_mtime_ns, stat.st_ino)
+
+
+class RenameManifest:
+    """A SQLite table of path, size, mtime, inode, content hash and outcome for each processed file.
+
+    Paths are stored relative to the directory the manifest belongs to. A file whose size, mtime
+    and inode all match its entry is unchanged and can be skipped without opening it; when only the
+    stat differs, the content hash decides.
+
+    The manifest lives in the library it describes, which may be on a network filesystem shared by
+    several hosts, so like the job queue it uses a rollback journal rather than WAL.
+    """
+
+    def __init__(self, path: Path, root: Path, commit_every: int = 100):
+        self.path = path
+        self.root = root
+        self.commit_every = commit_every
+        self._uncommitted = 0
+        self._connection = sqlite3.connect(str(path))
+        self._connection.execute("PRAGMA journal_mode=DELETE")
+        self._connection.execute(
+            "CREATE TABLE IF NOT EXISTS files ("
+            "path TEXT PRIMARY KEY, size INTEGER NOT NULL, mtime_ns INTEGER NOT NULL, inode INTEGER NOT NULL, "
+            "content_hash TEXT, outcome TEXT NOT NULL, updated_at REAL NOT NULL)"
+        )
+        self._connection.commit()
+
+    @classmethod
+    def open(cls, directory: Path) -> "RenameManifest":
+        return cls(directory / settings.MANIFEST_FILENAME, directory)
+
+    def lookup(self, file_path: Path) -> Optional[ManifestEntry]:
+        row = self._connection.execute(
+            "SELECT path, size, mtime_ns, inode, content_hash, outcome FROM files WHERE path = ?",
+            (self._key(file_path),),
+        ).fetchone()
+        return ManifestEntry(*row) if row else None
+
+    def is_unchanged(self, file_path: Path, stat: Optional[os.stat_result] = None) -> bool:
+        """Whether the file was handled by an earlier run and has not changed since, judged by its stat."""
+        entry = self.lookup(file_path)
+        if entry is None or entry.outcome not in FINAL_OUTCOMES:
+            return False
+        try:
+            return entry.matches(stat or file_path.stat())
+        except OSError:
+            return False
+
+    def has_same_content(self, file_path: Path, content_hash: str, update: bool = True) -> bool:
+        """Whether a file with a changed stat still has the contents an earlier run handled.
+
+        If so, and `update` is set, the entry is updated to the new stat so the next run can skip the
+        file by stat alone.
+        """
+        entry = self.lookup(file_path)
+        if entry is None or entry.outcome not in FINAL_OUTCOMES or entry.content_hash != content_hash:
+            return False
+        if update:
+            self.record(file_path, entry.outcome, content_hash)
+        return True
+
+    def record(self, file_path: Path, outcome: str, content_hash: Optional[str] = None) -> None:
+        """Record a file's outcome under its current stat; a file that cannot be stat'ed is left out."""
+        try:
+            stat = file_path.stat()
+        except OSError:
+            return
+        self._connection.execute(
+            "INSERT OR REPLACE INTO files (path, size, mtime_ns, inode, content_hash, outcome, updated_at) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (self._key(file_path), stat.st_size, stat.st_mtime_ns, stat.st_ino, content_hash, outcome, time.time()),
+        )
+        self._written()
+
+    def forget(self, file_path: Path) -> None:
+        self._connection.execute("DELETE FROM files WHERE path = ?", (self._key(file_path),))
+        self._written()
+
+    def __len__(self) -> int:
+        return self._connection.execute("SELECT COUNT(*) FROM files").fetchone()[0]
+
+    def close(self) -> None:
+        self._connection.commit()
+        self._connection.close()
+
+    def _key(self, file_path: Path) -> str:
+        return file_path.relative_to(self.root).as_posix()
+
+    def _written(self) -> None:
+        # Committing every write would dominate the cost of a run over many small files
+        self._uncommitted += 1
+        if self._uncommitted >= self.commit_every:
+            self._connection.commit()
+            self._uncommitted = 0
@@ -0,0 +1,118 @@
+"""Build DocumentInfo from metadata embedded in a PDF, so well-tagged documents skip the LLM analysis."""
+import re
+from datetime import datetime
+from typing import Dict, List, Optional
+from ..models.document import DocumentInfo, TOPIC_LIST, UNKNOWN_TOPIC
+
+# Titles that authoring tools write when the user never set one
+JUNK_TITLE_PATTERN = re.compile(
+    r"^(untitled|no title|title|document\d*|slide \d+|presentation\d*|microsoft (word|powerpoint)\b.*)$"
+    r"|\.(docx?|pdf|tex|dvi|ps|indd|qxd|rtf|odt|pptx?)$",
+    re.IGNORECASE,
+)
+# Author values that name a machine account or a tool instead of a person
+JUNK_AUTHOR_PATTERN = re.compile(
+    r"\b(admin(istrator)?|user|owner|unknown|author|anonymous|default|"
+    r"latex|tex|pdftex|microsoft|adobe|acrobat|word|writer|openoffice|libreoffice|elsevier|springer|ieee)\b",
+    re.IGNORECASE,
+)
+AUTHOR_SEPARATOR_PATTERN = re.compile(r"\s*(?:;|&|\band\b)\s*", re.IGNORECASE)
+
+
+class MetadataProbe:
+    def __init__(self, min_title_words: int = 2, max_title_length: int = 300):
+        self.min_title_words = min_title_words
+        self.max_title_length = max_title_length
+
+    def probe(self, metadata: Dict[str, str]) -> Optional[DocumentInfo]:
+        """Return DocumentInfo when the embedded title, authors and publication year look trustworthy,
+        None otherwise.
+
+        The year must come from a publication date; the creation date of a re-exported or scanned
+        paper is when the file was made. The topic is inferred from the subject and keywords when
+        possible and left as UNKNOWN_TOPIC otherwise, so the caller can classify the title instead
+        of running a full analysis.
+        """
+        if not metadata:
+            return None
+
+        title = self.clean_title(metadata.get("title", ""))
+        authors = self.clean_authors(metadata.get("author", ""))
+        year = self.extract_year(metadata.get("publication_date", ""))
+        if not title or not authors or not year:
+            return None
+
+        return DocumentInfo(
+            authors=authors,
+            year=year,
+            title=title,
+            topic=self.infer_topic(" ".join([metadata.get("subject", ""), metadata.get("keywords", "")])),
+        )
+
+    def clean_title(self, title: str) -> str:
+        title = re.sub(r"\s+", " ", title).strip()
+        if not title or len(title) > self.max_title_length:
+            return ""
+        if JUNK_TITLE_PATTERN.search(title):
+            return ""
+        if len(re.findall(r"[A-Za-z]{2,}", title)) < self.min_title_words:
+            return ""
+        letters = sum(char.isalpha() for char in title)
+        if letters < 0.6 * len(title.replace(" ", "")):
+            return ""
+        return title
+
+    def clean_authors(self, author: str) -> List[str]:
+        author = re.sub(r"\s+", " ", author).strip()
+        if not author:
+            return []
+
+        names = [name for name in AUTHOR_SEPARATOR_PATTERN.split(author) if name]
+        # "Smith, John" is one person, "John Smith, Jane Doe" is two
+        if len(names) == 1 and "," in author:
+            parts = [part.strip() for part in author.split(",") if part.strip()]
+            if all(len(part.split()) >= 2 for part in parts):
+                names = parts
+
+        authors = []
+        for name in names:
+            name = name.strip(" ,.")
+            if not self._is_person_name(name):
+                return []
+            authors.append(name)
+        return authors
+
+    @staticmethod
+    def _is_person_name(name: str) -> bool:
+        if not name or "@" in name or any(char.isdigit() for char in name):
+            return False
+        if JUNK_AUTHOR_PATTERN.search(name):
+            return False
+        words = re.findall(r"[^\W\d_][\w'.-]*", name)
+        return len(words) >= 2
+
+    @staticmethod
+    def extract_year(date: str) -> str:
+        """Read the year from a date such as 2023-01-15 or D:20230115120000Z."""
+        match = re.search(r"(\d{4})", date or "")
+        if not match:
+            return ""
+        year = int(match.group(1))
+        if year < 1900 or year > datetime.now().year + 1:
+            return ""
+        return match.group(1)
+
+    @staticmethod
+    def infer_topic(text: str) -> str:
+        """Pick the topic whose name appears earliest in the subject or keywords, or UNKNOWN_TOPIC."""
+        if not text.strip():
+            return UNKNOWN_TOPIC
+        text = text.lower()
+        best_topic, best_position = UNKNOWN_TOPIC, len(text)
+        for topic in TOPIC_LIST:
+            if topic == "Other":
+                continue
+            match = re.search(rf"\b{re.escape(topic.lower())}\b", text)
+            if match and match.start() < best_position:
+                best_topic, best_position = topic, match.start()
+        return best_topic
@@ -0,0 +1,183 @@
+"""Budgeted PDF text extraction.
+
+These are plain blocking functions so they can be shipped to the extraction process pool.
+"""
+import mmap
+import re
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from itertools import islice
+from typing import Any, Dict, Iterator
+from PyPDF2 import PageObject, PdfReader
+from PyPDF2.generic import IndirectObject, NameObject
+
+INHERITABLE_PAGE_ATTRIBUTES = ("/Resources", "/MediaBox", "/CropBox", "/Rotate")
+# XMP fields in which publishers record when a paper was published, as opposed to when the file was made
+PRISM_NAMESPACE_PREFIX = "http://prismstandard.org/namespaces/"
+PRISM_DATE_FIELDS = ("publicationDate", "coverDate")
+
+
+@dataclass
+class PdfExtract:
+    text: str
+    metadata: Dict[str, str] = field(default_factory=dict)
+
+
+@contextmanager
+def open_pdf(file_path: str, lazy: bool = True) -> Iterator[PdfReader]:
+    """Open a PDF for reading.
+
+    PdfReader copies the whole file into memory when given a path. In lazy mode the file is
+    memory-mapped instead, so only the trailer, the xref table and the objects actually resolved
+    are paged in from disk.
+    """
+    if not lazy:
+        yield PdfReader(file_path)
+        return
+    with open(file_path, "rb") as pdf_file, mmap.mmap(pdf_file.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+        yield PdfReader(mapped)
+
+
+def iter_lazy_pages(pdf_reader: PdfReader) -> Iterator[PageObject]:
+    """Walk the page tree depth-first, resolving only the nodes that lead to the pages consumed.
+
+    Unlike PdfReader.pages, which flattens the whole tree up front, the walk stops as soon as
+    the caller stops iterating. Inheritable attributes are copied down like PdfReader does.
+    """
+    catalog = pdf_reader.trailer["/Root"].get_object()
+    seen = set()
+
+    def walk(node_reference, inherited: Dict[str, Any]) -> Iterator[PageObject]:
+        if isinstance(node_reference, IndirectObject):
+            if node_reference.idnum in seen:
+                return
+            seen.add(node_reference.idnum)
+        node = node_reference.get_object()
+
+        if node.get("/Type") == "/Pages" or "/Kids" in node:
+            inherited = {**inherited, **{key: node[key] for key in INHERITABLE_PAGE_ATTRIBUTES if key in node}}
+            for kid in node.get("/Kids", []):
+                yield from walk(kid, inherited)
+            return
+
+        indirect_reference = node_reference if isinstance(node_reference, IndirectObject) else None
+        page = PageObject(pdf_reader, indirect_reference)
+        page.update(node)
+        for key, value in inherited.items():
+            if key not in page:
+                page[NameObject(key)] = value
+        yield page
+
+    yield from walk(catalog["/Pages"], {})
+
+
+def _iter_reader_pages(pdf_reader: PdfReader, max_pages: int, max_chars: int, lazy: bool = True) -> Iterator[str]:
+    pages = iter_lazy_pages(pdf_reader) if lazy else pdf_reader.pages
+    remaining = max_chars
+    for page in islice(pages, max_pages):
+        if remaining <= 0:
+            break
+        text = page.extract_text()
+        if not text:
+            continue
+        text = text[:remaining]
+        remaining -= len(text)
+        yield text
+
+
+def iter_pdf_pages(file_path: str, max_pages: int, max_chars: int, lazy: bool = True) -> Iterator[str]:
+    """Yield the text of each page until the page or character budget is spent.
+
+    Pages are parsed lazily, so a document whose first page already fills the budget never
+    has its later pages decoded. The last page yielded is trimmed to fit the budget.
+
+    Args:
+        file_path: The PDF to read
+        max_pages: Maximum number of pages to read
+        max_chars: Maximum number of characters to yield in total
+        lazy: Memory-map the file and resolve only the pages read, see open_pdf
+    """
+    with open_pdf(file_path, lazy) as pdf_reader:
+        yield from _iter_reader_pages(pdf_reader, max_pages, max_chars, lazy)
+
+
+def read_pdf_text(file_path: str, max_pages: int, max_chars: int, lazy: bool = True) -> str:
+    """Extract the text of the first pages of a PDF within a character budget.
+
+    Errors are raised to the caller, which logs them in the main process.
+    """
+    return "\n".join(iter_pdf_pages(file_path, max_pages, max_chars, lazy))
+
+
+def read_pdf_metadata(pdf_reader: PdfReader) -> Dict[str, str]:
+    """Collect title, author, subject, keywords and creation date from the info dictionary and XMP packet.
+
+    The info dictionary wins; XMP only fills fields it leaves empty. The publication date only comes
+    from XMP. Unreadable metadata is ignored.
+    """
+    metadata: Dict[str, str] = {}
+    try:
+        info = pdf_reader.metadata or {}
+        for key, name in (
+            ("title", "/Title"),
+            ("author", "/Author"),
+            ("subject", "/Subject"),
+            ("keywords", "/Keywords"),
+            ("creation_date", "/CreationDate"),
+        ):
+            value = info.get(name)
+            if value:
+                metadata[key] = str(value).strip()
+    except Exception:
+        pass
+
+    try:
+        xmp = pdf_reader.xmp_metadata
+    except Exception:
+        xmp = None
+    if xmp is not None:
+        for key, read in (
+            ("title", lambda: next(iter((xmp.dc_title or {}).values()), "")),
+            ("author", lambda: "; ".join(xmp.dc_creator or [])),
+            ("subject", lambda: ", ".join(xmp.dc_subject or [])),
+            ("keywords", lambda: xmp.pdf_keywords or ""),
+            ("creation_date", lambda: xmp.xmp_create_date.strftime("D:%Y%m%d") if xmp.xmp_create_date else ""),
+        ):
+            if metadata.get(key):
+                continue
+            try:
+                value = read()
+            except Exception:
+                continue
+            if value:
+                metadata[key] = re.sub(r"\s+", " ", str(value)).strip()
+        try:
+            publication_date = read_xmp_publication_date(xmp.rdf_root)
+        except Exception:
+            publication_date = ""
+        if publication_date:
+            metadata["publication_date"] = publication_date
+
+    return metadata
+
+
+def read_xmp_publication_date(rdf_root: Any) -> str:
+    """The PRISM publication or cover date of an XMP packet, as an element or an attribute."""
+    for name in PRISM_DATE_FIELDS:
+        for element in rdf_root.getElementsByTagNameNS("*", name):
+            if (element.namespaceURI or "").startswith(PRISM_NAMESPACE_PREFIX):
+                text = "".join(node.data for node in element.childNodes if node.nodeType == node.TEXT_NODE)
+                if text.strip():
+                    return text.strip()
+        for description in rdf_root.getElementsByTagNameNS("*", "Description"):
+            for attribute in description.attributes.values():
+                if attribute.localName == name and (attribute.namespaceURI or "").startswith(PRISM_NAMESPACE_PREFIX):
+                    return attribute.value.strip()
+    return ""
+
+
+def extract_pdf(file_path: str, max_pages: int, max_chars: int, lazy: bool = True) -> PdfExtract:
+    """Extract budgeted page text and embedded metadata with a single reader."""
+    with open_pdf(file_path, lazy) as pdf_reader:
+        text = "\n".join(_iter_reader_pages(pdf_reader, max_pages, max_chars, lazy))
+        return PdfExtract(text=text, metadata=read_pdf_metadata(pdf_reader))
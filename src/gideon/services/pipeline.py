@@ -0,0 +1,284 @@
+"""Rename a directory as a pipeline of stages joined by bounded queues."""
+import asyncio
+import itertools
+import os
+from concurrent.futures import Executor
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable, Collection, Iterable, Iterator, List, Optional, Tuple
+
+from ..core.config import settings
+from ..models.document import DocumentInfo
+from ..utils.concurrency import AdaptiveLimiter
+from ..utils.logging import log_error, log_info
+from ..validators.filename_validator import FilenameValidator
+from .extraction_cache import ExtractionCache
+from .file_service import FileService
+from .journal import RenameJournal
+from .manifest import FAILED, RENAMED, UNCHANGED_NAME, RenameManifest
+from .pdf_extractor import PdfExtract
+from .plan import RenamePlanWriter
+from .rename_service import RenameService
+
+# Tells a stage worker that its upstream stage has finished
+DONE = object()
+
+
+@dataclass
+class PipelineStats:
+    found: int = 0
+    processed: int = 0
+    renamed: int = 0
+    skipped: int = 0
+    errors: int = 0
+    # Skipped files the manifest showed to be unchanged since an earlier run
+    unchanged: int = 0
+    # Skipped files an interrupted run had already finished
+    resumed: int = 0
+    # Renames written to a plan instead of applied
+    planned: int = 0
+
+    @property
+    def finished(self) -> int:
+        return self.processed + self.errors
+
+
+@dataclass
+class Job:
+    """A file on its way through the pipeline and what the stages have found out about it."""
+
+    path: Path
+    content_hash: Optional[str] = None
+    extract: Optional[PdfExtract] = None
+    new_name: Optional[str] = None
+    doc_info: Optional[DocumentInfo] = None
+
+
+class RenamePipeline:
+    """Walk, extract, analyze and rename files as four concurrent stages.
+
+    The walker lists PDFs lazily, `extract_workers` tasks feed the extraction pool, up to
+    `limiter.max_limit` tasks submit batches of extracted documents to the LLM under the adaptive
+    limiter, and one task applies the renames. Stages are joined by queues of `queue_size` items,
+    so a slow stage holds the ones before it back and memory stays flat however many files there are.
+
+    The walker lists and stats files on the loop's default thread pool, a queue's worth at a time,
+    so a directory tree of skipped files does not keep the other stages waiting. Files that
+    already have a well-formed name are skipped by the walker before they are opened.
+    With a manifest, files handled by an earlier run and unchanged since are skipped too, and the
+    outcome of every processed file is recorded in it. With a journal, analysis results are
+    written ahead of their renames, and files in `finished` (by an interrupted run) are skipped.
+    With a plan, renames are written to it instead of applied, and nothing is written to the
+    manifest or the journal.
+    """
+
+    def __init__(
+        self,
+        rename_service: RenameService,
+        file_service: Optional[FileService] = None,
+        executor: Optional[Executor] = None,
+        cache: Optional[ExtractionCache] = None,
+        limiter: Optional[AdaptiveLimiter] = None,
+        batch_size: int = 1,
+        extract_workers: Optional[int] = None,
+        queue_size: Optional[int] = None,
+        on_update: Optional[Callable[[PipelineStats, Optional[str]], None]] = None,
+        manifest: Optional[RenameManifest] = None,
+        journal: Optional[RenameJournal] = None,
+        finished: Collection[Path] = (),
+        plan: Optional[RenamePlanWriter] = None,
+    ):
+        self.rename_service = rename_service
+        self.file_service = file_service or FileService()
+        self.executor = executor
+        self.cache = cache
+        self.limiter = limiter or AdaptiveLimiter(settings.LLM_MAX_CONCURRENCY)
+        self.batch_size = max(1, batch_size)
+        self.extract_workers = extract_workers or settings.EXTRACTION_WORKERS or os.cpu_count() or 1
+        self.queue_size = queue_size or settings.PIPELINE_QUEUE_SIZE
+        # Called with the running totals and, when a batch starts, the name of a file in it
+        self.on_update = on_update
+        self.manifest = manifest
+        self.journal = journal
+        self.finished = finished
+        self.plan = plan
+        self.stats = PipelineStats()
+
+    @staticmethod
+    def walk(directory: Path, extension: str = ".pdf") -> Iterator[Path]:
+        """List the files under a directory with an extension, without following symlinked folders.
+
+        Unlike Path.rglob, this remembers nothing of the files already listed, so memory stays flat
+        however many there are.
+        """
+        for root, _, names in os.walk(directory):
+            for name in names:
+                if name.endswith(extension):
+                    yield Path(root, name)
+
+    async def run(self, files: Iterable[Path]) -> PipelineStats:
+        paths: asyncio.Queue = asyncio.Queue(self.queue_size)
+        extracted: asyncio.Queue = asyncio.Queue(self.queue_size)
+        proposals: asyncio.Queue = asyncio.Queue(self.queue_size)
+        llm_workers = self.limiter.max_limit
+
+        async with asyncio.TaskGroup() as group:
+            group.create_task(self._stage([self._walk(files, paths)], paths, self.extract_workers))
+            group.create_task(
+                self._stage(
+                    [self._extract(paths, extracted) for _ in range(self.extract_workers)], extracted, llm_workers
+                )
+            )
+            group.create_task(
+                self._stage([self._analyze(extracted, proposals) for _ in range(llm_workers)], proposals, 1)
+            )
+            group.create_task(self._apply(proposals))
+        return self.stats
+
+    @staticmethod
+    async def _stage(workers: List, outbox: asyncio.Queue, consumers: int) -> None:
+        """Run a stage's workers, then tell each consumer of the next stage that no more items come."""
+        await asyncio.gather(*workers)
+        for _ in range(consumers):
+            await outbox.put(DONE)
+
+    async def _walk(self, files: Iterable[Path], outbox: asyncio.Queue) -> None:
+        loop = asyncio.get_running_loop()
+        files = iter(files)
+        # Listing directories and stat-ing files block, so they run off the loop
+        while chunk := await loop.run_in_executor(None, self._next_chunk, files, self.manifest is not None):
+            for file_path, stat in chunk:
+                self.stats.found += 1
+                if file_path in self.finished:
+                    self.stats.resumed += 1
+                    self._skip()
+                elif FilenameValidator.is_valid_format(file_path.name):
+                    log_info(f"File {file_path.name} is already correctly formatted, skipping rename")
+                    self._skip()
+                elif self.manifest is not None and self.manifest.is_unchanged(file_path, stat):
+                    self.stats.unchanged += 1
+                    self._skip()
+                else:
+                    self._update()
+                    await outbox.put(Job(file_path))
+
+    def _next_chunk(self, files: Iterator[Path], with_stat: bool) -> List[Tuple[Path, Optional[os.stat_result]]]:
+        chunk = []
+        for file_path in itertools.islice(files, self.queue_size):
+            try:
+                stat = file_path.stat() if with_stat else None
+            except OSError:
+                # Left to the manifest, which treats files it cannot stat as changed
+                stat = None
+            chunk.append((file_path, stat))
+        return chunk
+
+    async def _extract(self, inbox: asyncio.Queue, outbox: asyncio.Queue) -> None:
+        loop = asyncio.get_running_loop()
+        while (job := await inbox.get()) is not DONE:
+            if self.manifest is not None or self.plan is not None:
+                try:
+                    job.content_hash = await loop.run_in_executor(self.executor, FileService.hash_file, job.path)
+                except OSError as e:
+                    log_error(f"Could not read {job.path.name}: {e}")
+                    self._fail(job)
+                    continue
+                # Touched or copied back, but with the contents an earlier run already handled
+                if self.manifest is not None and self.manifest.has_same_content(
+                    job.path, job.content_hash, update=self.plan is None
+                ):
+                    self.stats.unchanged += 1
+                    self._skip()
+                    continue
+            job.extract = await self.file_service.extract_pdf(job.path, self.executor, self.cache, job.content_hash)
+            # Scanned papers have no text but may still carry metadata the probe can name them from
+            if not job.extract or not (job.extract.text or job.extract.metadata):
+                log_error(f"Could not extract content from {job.path.name}")
+                self._fail(job)
+                continue
+            await outbox.put(job)
+
+    async def _analyze(self, inbox: asyncio.Queue, outbox: asyncio.Queue) -> None:
+        finished = False
+        while not finished:
+            # Take whatever is ready up to a full batch, so batches fill up when the LLM is the bottleneck
+            batch: List[Job] = []
+            job = await inbox.get()
+            while job is not DONE:
+                batch.append(job)
+                if len(batch) == self.batch_size or inbox.empty():
+                    break
+                job = inbox.get_nowait()
+            finished = job is DONE
+            if batch:
+                await self._analyze_batch(batch, outbox)
+
+    async def _analyze_batch(self, batch: List[Job], outbox: asyncio.Queue) -> None:
+        try:
+            async with self.limiter.slot(len(batch)) as slot:
+                self._update(batch[0].path.name + (f" and {len(batch) - 1} more" if len(batch) > 1 else ""))
+                proposals = await self.rename_service.propose_batch(
+                    [(job.extract.text, job.path.name, job.extract.metadata) for job in batch]
+                )
+                slot.errors = sum(1 for proposal in proposals if proposal.doc_info is None)
+        except Exception as e:
+            log_error(f"Error processing batch starting with {batch[0].path.name}: {str(e)}")
+            for job in batch:
+                self._fail(job)
+            return
+        for job, proposal in zip(batch, proposals):
+            job.extract = None
+            job.new_name = proposal.new_name
+            job.doc_info = proposal.doc_info
+        if self.journal is not None:
+            self.journal.propose([(job.path, job.new_name, job.doc_info) for job in batch if job.doc_info])
+        for job in batch:
+            await outbox.put(job)
+
+    async def _apply(self, inbox: asyncio.Queue) -> None:
+        while (job := await inbox.get()) is not DONE:
+            if not job.new_name or job.doc_info is None:
+                log_error(f"Could not generate new name for {job.path.name}")
+                self._fail(job)
+                continue
+            if self.plan is not None:
+                self.plan.write(job.path, job.content_hash, job.new_name, job.doc_info)
+                self.stats.planned += 1
+            # Only rename if the new name is different from current name
+            elif job.new_name != job.path.name:
+                new_path = self.file_service.rename_file(job.path, job.new_name)
+                if new_path is None:
+                    self._fail(job)
+                    continue
+                self.stats.renamed += 1
+                self._record(job, RENAMED, new_path)
+            else:
+                self.stats.skipped += 1
+                self._record(job, UNCHANGED_NAME, job.path)
+            self.stats.processed += 1
+            self._update()
+
+    def _skip(self) -> None:
+        self.stats.skipped += 1
+        self.stats.processed += 1
+        self._update()
+
+    def _fail(self, job: Job) -> None:
+        self.stats.errors += 1
+        self._record(job, FAILED, job.path)
+        self._update()
+
+    def _record(self, job: Job, outcome: str, path: Path) -> None:
+        if self.plan is not None:
+            return
+        if self.journal is not None and outcome != FAILED:
+            self.journal.applied(job.path, path)
+        if self.manifest is None:
+            return
+        if path != job.path:
+            self.manifest.forget(job.path)
+        self.manifest.record(path, outcome, job.content_hash)
+
+    def _update(self, current: Optional[str] = None) -> None:
+        if self.on_update is not None:
+            self.on_update(self.stats, current)
@@ -0,0 +1,162 @@
+"""Rename plans: the renames `rename auto` would make, written out for review and applied later."""
+import json
+import zlib
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Dict, Iterable, Optional
+from ..models.document import DocumentInfo
+from ..utils.logging import log_error, log_success, log_warning
+from ..validators.filename_validator import FilenameValidator
+from .file_service import FileService
+from .manifest import RENAMED, RenameManifest
+
+
+@dataclass
+class PlanEntry:
+    # Path relative to the planned directory, so plans made on different machines can be merged
+    path: str
+    content_hash: str
+    new_name: str
+    doc_info: Optional[dict] = None
+
+    @classmethod
+    def from_json(cls, line: str) -> "PlanEntry":
+        entry = json.loads(line)
+        return cls(entry["path"], entry["hash"], entry["new_name"], entry.get("doc_info"))
+
+    def to_json(self) -> str:
+        return json.dumps(
+            {"path": self.path, "hash": self.content_hash, "doc_info": self.doc_info, "new_name": self.new_name}
+        )
+
+
+@dataclass
+class Shard:
+    """One of `count` deterministic, disjoint subsets of a directory, numbered from 1."""
+
+    index: int
+    count: int
+
+    @classmethod
+    def parse(cls, value: str) -> "Shard":
+        try:
+            index, count = (int(part) for part in value.split("/"))
+        except ValueError:
+            raise ValueError(f"Shard must look like i/n, got '{value}'") from None
+        if not 1 <= index <= count:
+            raise ValueError(f"Shard index must be between 1 and {count}, got {index}")
+        return cls(index, count)
+
+    def contains(self, relative_path: Path) -> bool:
+        # Hashing the relative path gives every machine the same split of a shared library
+        return zlib.crc32(relative_path.as_posix().encode("utf-8")) % self.count == self.index - 1
+
+
+class RenamePlanWriter:
+    def __init__(self, path: Path, root: Path):
+        self.path = path
+        self.root = root
+        self.entries = 0
+        self._file = open(path, "w", encoding="utf-8")
+
+    def write(self, file_path: Path, content_hash: str, new_name: str, doc_info: Optional[DocumentInfo]) -> None:
+        entry = PlanEntry(
+            file_path.relative_to(self.root).as_posix(), content_hash, new_name, asdict(doc_info) if doc_info else None
+        )
+        self._file.write(entry.to_json() + "\n")
+        self._file.flush()
+        self.entries += 1
+
+    def close(self) -> None:
+        self._file.close()
+
+
+@dataclass
+class ApplyStats:
+    renamed: int = 0
+    skipped: int = 0
+    errors: int = 0
+
+
+def read_plans(plan_files: Iterable[Path]) -> Dict[str, PlanEntry]:
+    """Merge plans by path; when plans disagree about a file, the one given last wins."""
+    entries: Dict[str, PlanEntry] = {}
+    for plan_file in plan_files:
+        with open(plan_file, encoding="utf-8") as f:
+            for number, line in enumerate(f, start=1):
+                if not line.strip():
+                    continue
+                try:
+                    entry = PlanEntry.from_json(line)
+                except (json.JSONDecodeError, KeyError):
+                    log_error(f"Skipping malformed line {number} of {plan_file}")
+                    continue
+                previous = entries.get(entry.path)
+                if previous is not None and previous.new_name != entry.new_name:
+                    log_warning(f"{entry.path} is planned twice; using {entry.new_name} from {plan_file}")
+                entries[entry.path] = entry
+    return entries
+
+
+def apply_plan(
+    directory: Path,
+    entries: Iterable[PlanEntry],
+    manifest: Optional[RenameManifest] = None,
+    dry_run: bool = False,
+) -> ApplyStats:
+    """Rename the files of a plan, skipping any whose contents changed since it was made.
+
+    Plans may come from other machines, so entries that would rename a file outside the directory,
+    or to anything but a well-formed name in its own folder, are rejected.
+    """
+    stats = ApplyStats()
+    targets = set()
+    root = directory.resolve()
+    for entry in entries:
+        reason = _rejection(root, entry)
+        if reason:
+            log_error(f"Rejecting the plan entry for {entry.path}: {reason}")
+            stats.errors += 1
+            continue
+        source = directory / entry.path
+        target = source.parent / entry.new_name
+        if target == source:
+            stats.skipped += 1
+            continue
+        if not source.exists():
+            log_warning(f"Skipping {entry.path}: the file no longer exists")
+            stats.skipped += 1
+            continue
+        if target.exists() or target in targets:
+            log_warning(f"Skipping {entry.path}: {entry.new_name} already exists")
+            stats.skipped += 1
+            continue
+        if FileService.hash_file(source) != entry.content_hash:
+            log_warning(f"Skipping {entry.path}: the file changed since the plan was made")
+            stats.skipped += 1
+            continue
+        targets.add(target)
+        if dry_run:
+            log_success(f"Would rename: {source.name} -> {entry.new_name}")
+            stats.renamed += 1
+            continue
+        new_path = FileService.rename_file(source, entry.new_name)
+        if new_path is None:
+            stats.errors += 1
+            continue
+        stats.renamed += 1
+        if manifest is not None:
+            manifest.forget(source)
+            manifest.record(new_path, RENAMED, entry.content_hash)
+    return stats
+
+
+def _rejection(root: Path, entry: PlanEntry) -> Optional[str]:
+    if Path(entry.new_name).name != entry.new_name:
+        return f"{entry.new_name} is not a plain file name"
+    if not FilenameValidator.is_valid_format(entry.new_name):
+        return f"{entry.new_name} is not a well-formed name"
+    source = (root / entry.path).resolve()
+    if source == root or not source.is_relative_to(root):
+        return "the path is outside the directory"
+    return None
@@ -1,5 +1,6 @@
-from typing import Optional, Dict, Any, List
-from ..models.document import DocumentInfo
+from dataclasses import dataclass
+from typing import Optional, Callable, Dict, Any, List, Tuple
+from ..models.document import DocumentInfo, UNKNOWN_TOPIC
 from ..formarters.formarters import (
     AuthorFormatter,
     TitleFormatter,
@@ -11,7 +12,10 @@ from ..formarters.formarters import (
 from ..core.config import settings
 from ..llm.factory import LLMServiceType
 from ..agents.renamer import DocumentAnalyzer
+from ..agents.classifier import TopicClassifier
 from ..validators.filename_validator import FilenameValidator
+from ..utils.logging import log_info, log_warning
+from .metadata_probe import MetadataProbe
 
 
 class FileNameGenerator:
@@ -40,6 +44,12 @@ class FileNameGenerator:
         return generator.generate_filename(doc_info)
 
 
+@dataclass
+class RenameProposal:
+    new_name: str
+    doc_info: Optional[DocumentInfo] = None
+
+
 class RenameService:
     def __init__(
         self,
@@ -47,30 +57,101 @@ class RenameService:
         filename_generator: Optional[FileNameGenerator] = None,
         llm_service_type: LLMServiceType = settings.DEFAULT_LLM_SERVICE_TYPE,
         service_config: Optional[Dict[str, Any]] = None,
+        metadata_probe: Optional[MetadataProbe] = None,
+        escalation_config: Optional[Dict[str, Any]] = None,
+        topic_classifier: Optional[TopicClassifier] = None,
+        train_topic_classifier: Optional[Callable[[], Optional[TopicClassifier]]] = None,
     ):
         if document_analyzer is None:
-            document_analyzer = DocumentAnalyzer(llm_service_type, service_config)
+            document_analyzer = DocumentAnalyzer(
+                llm_service_type,
+                service_config,
+                escalation_config=escalation_config,
+                topic_classifier=topic_classifier,
+                train_topic_classifier=train_topic_classifier,
+            )
         self.document_analyzer = document_analyzer
 
         if filename_generator is None:
             filename_generator = FileNameGenerator()
         self.filename_generator = filename_generator
 
-    async def rename_file(self, content: str, file_name: str) -> str:
+        if metadata_probe is None and settings.USE_EMBEDDED_METADATA:
+            metadata_probe = MetadataProbe()
+        self.metadata_probe = metadata_probe
+
+    async def rename_file(self, content: str, file_name: str, metadata: Optional[Dict[str, str]] = None) -> str:
         # Check if file is already correctly named
-        validator = FilenameValidator()
-        if validator.is_valid_format(file_name):
-            from ..utils.logging import log_info
+        if FilenameValidator.is_valid_format(file_name):
             log_info(f"File {file_name} is already correctly formatted, skipping rename")
             return file_name
-        
-        # DocumentAnalyzer now handles both analysis and classification in one call
-        doc_info = await self.document_analyzer.analyze(content, file_name)
+
+        doc_info = await self._from_metadata(metadata, file_name)
+        if not doc_info and content:
+            # DocumentAnalyzer handles both analysis and classification in one call
+            doc_info = await self.document_analyzer.analyze(content, file_name)
         if not doc_info:
             return file_name
 
-        from ..utils.logging import log_info
+        return self._generate_name(doc_info)
+
+    async def rename_batch(self, documents: List[Tuple[str, str, Optional[Dict[str, str]]]]) -> List[str]:
+        """Propose new names for several (content, file_name, metadata) documents at once.
+
+        Documents that need a full analysis are submitted to the LLM together as one batch. Documents
+        that could not be analyzed keep their original name; use propose_batch to tell them apart.
+        """
+        return [proposal.new_name for proposal in await self.propose_batch(documents)]
+
+    async def propose_batch(self, documents: List[Tuple[str, str, Optional[Dict[str, str]]]]) -> List[RenameProposal]:
+        """Like rename_batch, but with the DocumentInfo each name was generated from.
+
+        Documents that are already correctly named or could not be analyzed keep their name and have
+        no DocumentInfo. Documents without text can only be named from their metadata.
+        """
+        proposals = [RenameProposal(file_name) for _, file_name, _ in documents]
+        candidates = []
+        for index, (_, file_name, _) in enumerate(documents):
+            if FilenameValidator.is_valid_format(file_name):
+                log_info(f"File {file_name} is already correctly formatted, skipping rename")
+            else:
+                candidates.append(index)
+
+        probed = [self._probe(documents[i][2], documents[i][1]) for i in candidates]
+        # Titles from embedded metadata only need a topic, and are classified together
+        untopical = [doc_info for doc_info in probed if doc_info and doc_info.topic == UNKNOWN_TOPIC]
+        topics = await self.document_analyzer.classify_batch([doc_info.title for doc_info in untopical])
+        for doc_info, topic in zip(untopical, topics):
+            doc_info.topic = topic["topic"]
+
+        pending = []
+        for index, doc_info in zip(candidates, probed):
+            if doc_info:
+                proposals[index] = RenameProposal(self._generate_name(doc_info), doc_info)
+            elif documents[index][0]:
+                pending.append(index)
+            else:
+                log_warning(f"{documents[index][1]} has no text and no usable metadata")
+
+        doc_infos = await self.document_analyzer.analyze_batch([(documents[i][0], documents[i][1]) for i in pending])
+        for index, doc_info in zip(pending, doc_infos):
+            if doc_info:
+                proposals[index] = RenameProposal(self._generate_name(doc_info), doc_info)
+        return proposals
+
+    async def _from_metadata(self, metadata: Optional[Dict[str, str]], file_name: str) -> Optional[DocumentInfo]:
+        """Trustworthy embedded metadata only needs the topic from the LLM, if that."""
+        doc_info = self._probe(metadata, file_name)
+        if doc_info and doc_info.topic == UNKNOWN_TOPIC:
+            doc_info.topic = (await self.document_analyzer.classify(doc_info.title))["topic"]
+        return doc_info
+
+    def _probe(self, metadata: Optional[Dict[str, str]], file_name: str) -> Optional[DocumentInfo]:
+        doc_info = self.metadata_probe.probe(metadata) if self.metadata_probe and metadata else None
+        if doc_info:
+            log_info(f"Using embedded metadata for {file_name}")
+        return doc_info
+
+    def _generate_name(self, doc_info: DocumentInfo) -> str:
         log_info(f"Extracted info - Title: {doc_info.title}, Topic: {doc_info.topic}")
-        
-        new_name = self.filename_generator.generate_filename(doc_info)
-        return new_name
+        return self.filename_generator.generate_filename(doc_info)
@@ -0,0 +1,55 @@
+import pytest
+from unittest.mock import patch
+from gideon.services.extraction_cache import ExtractionCache
+from gideon.services.file_service import FileService
+from gideon.services.pdf_extractor import PdfExtract
+
+
+@pytest.fixture
+def cache(tmp_path):
+    cache = ExtractionCache(tmp_path / "extraction.sqlite", max_bytes=100)
+    yield cache
+    cache.close()
+
+
+def test_cache_round_trip(cache):
+    key = ExtractionCache.make_key("abc", 5, 1000)
+    assert cache.get(key) is None
+    cache.put(key, "extracted text")
+    assert cache.get(key) == "extracted text"
+
+
+def test_cache_key_depends_on_extractor_settings():
+    assert ExtractionCache.make_key("abc", 5, 1000) != ExtractionCache.make_key("abc", 3, 1000)
+    assert ExtractionCache.make_key("abc", 5, 1000) != ExtractionCache.make_key("abc", 5, 2000)
+
+
+def test_cache_evicts_least_recently_used(cache):
+    cache.put("a", "x" * 40)
+    cache.put("b", "x" * 40)
+    cache.get("a")
+    cache.put("c", "x" * 40)
+    assert cache.get("b") is None
+    assert cache.get("a") is not None
+    assert cache.get("c") is not None
+    assert len(cache) == 2
+
+
+def test_cache_persists_across_instances(tmp_path):
+    first = ExtractionCache(tmp_path / "extraction.sqlite", max_bytes=100)
+    first.put("a", "persisted")
+    first.close()
+    second = ExtractionCache(tmp_path / "extraction.sqlite", max_bytes=100)
+    assert second.get("a") == "persisted"
+    second.close()
+
+
+@pytest.mark.asyncio
+async def test_extract_pdf_content_skips_parser_on_cache_hit(cache, tmp_path):
+    pdf = tmp_path / "paper.pdf"
+    pdf.write_bytes(b"%PDF-1.4 fake")
+    extract = PdfExtract(text="parsed text", metadata={"title": "A Title"})
+    with patch("gideon.services.file_service.extract_pdf", return_value=extract) as parser:
+        assert await FileService.extract_pdf_content(pdf, cache=cache) == "parsed text"
+        assert await FileService.extract_pdf(pdf, cache=cache) == extract
+    assert parser.call_count == 1
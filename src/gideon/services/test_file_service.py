@@ -1,7 +1,17 @@
 import pytest
 import tempfile
 from pathlib import Path
+from xml.dom import minidom
 from gideon.services.file_service import FileService
+from PyPDF2 import PdfReader
+from gideon.services.pdf_extractor import (
+    iter_lazy_pages,
+    iter_pdf_pages,
+    open_pdf,
+    read_pdf_text,
+    read_xmp_publication_date,
+)
+from gideon.utils.synthetic_pdf import build_pdf
 
 
 @pytest.fixture
@@ -30,3 +40,84 @@ def test_remove_duplicates(temp_dir_with_duplicates):
     contents = set(f.read_bytes() for f in remaining_files)
     assert b"duplicate content" in contents
     assert b"unique content" in contents
+
+
+def test_rename_file_never_replaces_an_existing_file(tmp_path):
+    (tmp_path / "scan.pdf").write_bytes(b"scan")
+    (tmp_path / "taken.pdf").write_bytes(b"taken")
+
+    assert FileService.rename_file(tmp_path / "scan.pdf", "taken.pdf") is None
+    assert (tmp_path / "scan.pdf").read_bytes() == b"scan"
+    assert (tmp_path / "taken.pdf").read_bytes() == b"taken"
+
+    assert FileService.rename_file(tmp_path / "scan.pdf", "free.pdf") == tmp_path / "free.pdf"
+    assert sorted(path.name for path in tmp_path.iterdir()) == ["free.pdf", "taken.pdf"]
+
+
+@pytest.fixture
+def sample_pdf():
+    with tempfile.TemporaryDirectory() as tmpdirname:
+        file_path = Path(tmpdirname) / "paper.pdf"
+        file_path.write_bytes(build_pdf(["A Study on Testing", "Second page", "Third page"]))
+        yield file_path
+
+
+@pytest.mark.asyncio
+async def test_extract_pdf_content_in_process_pool(sample_pdf):
+    with FileService.create_extraction_executor(2) as executor:
+        content = await FileService.extract_pdf_content(sample_pdf, executor)
+    assert "A Study on Testing" in content
+    assert "Third page" in content
+
+
+@pytest.mark.asyncio
+async def test_extract_pdf_content_invalid_file(tmp_path):
+    broken = tmp_path / "broken.pdf"
+    broken.write_bytes(b"not a pdf")
+    assert await FileService.extract_pdf_content(broken) == ""
+
+
+def test_iter_pdf_pages_stops_at_page_limit(sample_pdf):
+    assert list(iter_pdf_pages(str(sample_pdf), max_pages=2, max_chars=10000)) == ["A Study on Testing", "Second page"]
+
+
+def test_iter_pdf_pages_stops_at_char_budget(sample_pdf):
+    pages = list(iter_pdf_pages(str(sample_pdf), max_pages=5, max_chars=25))
+    assert pages == ["A Study on Testing", "Second "]
+    assert len(read_pdf_text(str(sample_pdf), max_pages=5, max_chars=7)) == 7
+
+
+def test_lazy_and_eager_open_extract_the_same_text(sample_pdf):
+    lazy = read_pdf_text(str(sample_pdf), max_pages=5, max_chars=10000, lazy=True)
+    eager = read_pdf_text(str(sample_pdf), max_pages=5, max_chars=10000, lazy=False)
+    assert lazy == eager
+
+
+def test_lazy_pages_resolve_only_what_is_read(sample_pdf):
+    with open_pdf(str(sample_pdf), lazy=True) as reader:
+        first_page = next(iter_lazy_pages(reader))
+        assert first_page.extract_text() == "A Study on Testing"
+        assert "/MediaBox" in first_page
+        lazy_resolved = len(reader.resolved_objects)
+
+    eager_reader = PdfReader(str(sample_pdf))
+    eager_reader.pages[0].extract_text()
+    assert lazy_resolved < len(eager_reader.resolved_objects)
+
+
+XMP = """<x:xmpmeta xmlns:x="adobe:ns:meta/"><rdf:RDF xmlns:rdf="http://www.w3.org/1999/02/22-rdf-syntax-ns#">
+<rdf:Description xmlns:xmp="http://ns.adobe.com/xap/1.0/" xmlns:prism="http://prismstandard.org/namespaces/basic/2.0/"
+ xmp:CreateDate="2023-01-15" {attribute}>{element}</rdf:Description></rdf:RDF></x:xmpmeta>"""
+
+
+@pytest.mark.parametrize(
+    "attribute, element, expected",
+    [
+        ("", "<prism:publicationDate>2015-12-10</prism:publicationDate>", "2015-12-10"),
+        ('prism:coverDate="2016-06"', "", "2016-06"),
+        ("", "", ""),
+    ],
+)
+def test_read_xmp_publication_date_ignores_the_creation_date(attribute, element, expected):
+    rdf_root = minidom.parseString(XMP.format(attribute=attribute, element=element))
+    assert read_xmp_publication_date(rdf_root) == expected
@@ -0,0 +1,132 @@
+import multiprocessing
+import time
+from pathlib import Path
+import pytest
+from gideon.services.job_queue import DONE, FAILED, LEASED, PENDING, JobQueue
+
+
+def files(root, count):
+    return [root / f"scan_{i:03d}.pdf" for i in range(count)]
+
+
+@pytest.fixture
+def queue(tmp_path):
+    queue = JobQueue.open(tmp_path, lease_seconds=60, max_attempts=2, clock_skew=0)
+    yield queue
+    queue.close()
+
+
+def test_files_are_queued_once_by_relative_path(queue, tmp_path):
+    assert queue.enqueue(files(tmp_path, 3)) == 3
+    assert queue.enqueue(files(tmp_path, 5)) == 2
+
+    jobs = queue.lease("a", limit=10)
+
+    assert [job.path for job in jobs] == [f"scan_{i:03d}.pdf" for i in range(5)]
+    assert queue.counts() == {PENDING: 0, LEASED: 5, DONE: 0, FAILED: 0}
+
+
+def test_enqueueing_a_slow_listing_lets_other_workers_lease(queue, tmp_path):
+    other = JobQueue.open(tmp_path, clock_skew=0)
+    # Fail at once instead of waiting for the lock
+    other._connection.execute("PRAGMA busy_timeout = 0")
+    leased = []
+
+    def slow_listing():
+        for i, file_path in enumerate(files(tmp_path, 2 * JobQueue.ENQUEUE_CHUNK_SIZE)):
+            if i == JobQueue.ENQUEUE_CHUNK_SIZE + 1:
+                leased.extend(other.lease("running"))
+            yield file_path
+
+    assert queue.enqueue(slow_listing()) == 2 * JobQueue.ENQUEUE_CHUNK_SIZE
+    assert [job.path for job in leased] == ["scan_000.pdf"]
+    other.close()
+
+
+def test_a_leased_job_goes_to_no_other_worker_until_its_lease_expires(queue, tmp_path):
+    queue.enqueue(files(tmp_path, 2))
+    first = queue.lease("a", limit=1)
+
+    assert [job.path for job in queue.lease("b", limit=2)] == ["scan_001.pdf"]
+    assert queue.lease("c") == []
+
+    queue.lease_seconds = -1
+    queue.heartbeat("a", first)
+    retried = queue.lease("c")
+    assert [(job.path, job.attempts) for job in retried] == [("scan_000.pdf", 2)]
+    # The worker that lost the lease can no longer finish the job
+    assert not queue.begin_rename("a", first[0], "new.pdf")
+    assert not queue.complete("a", first[0])
+    assert queue.complete("c", retried[0])
+
+
+def test_a_lease_is_only_taken_over_after_the_clock_skew_margin(tmp_path):
+    queue = JobQueue.open(tmp_path, lease_seconds=-1, clock_skew=30)
+    queue.enqueue(files(tmp_path, 1))
+    queue.lease("a")
+
+    assert queue.lease("b") == []
+    queue.clock_skew = 0
+    assert len(queue.lease("b")) == 1
+    queue.close()
+
+
+def test_the_queue_uses_a_rollback_journal(queue):
+    assert queue._connection.execute("PRAGMA journal_mode").fetchone()[0] == "delete"
+
+
+def test_heartbeats_keep_a_lease_alive(queue, tmp_path):
+    queue.enqueue(files(tmp_path, 1))
+    queue.lease_seconds = 0.2
+    jobs = queue.lease("a")
+    for _ in range(3):
+        time.sleep(0.1)
+        assert queue.heartbeat("a", jobs) == 1
+    assert queue.lease("b") == []
+
+
+def test_failed_jobs_are_retried_until_they_run_out_of_attempts(queue, tmp_path):
+    queue.enqueue(files(tmp_path, 1))
+
+    queue.fail("a", queue.lease("a")[0], "timeout")
+    assert queue.counts()[PENDING] == 1
+    queue.fail("b", queue.lease("b")[0], "timeout")
+
+    assert queue.counts()[FAILED] == 1
+    assert queue.lease("c") == []
+    assert not queue.has_unfinished()
+
+
+def test_released_jobs_do_not_use_up_an_attempt(queue, tmp_path):
+    queue.enqueue(files(tmp_path, 1))
+    queue.release("a", queue.lease("a"))
+    queue.release("a", queue.lease("a"))
+
+    assert queue.lease("b")[0].attempts == 1
+
+
+def lease_all(directory, worker, leased):
+    queue = JobQueue.open(Path(directory))
+    while jobs := queue.lease(worker, limit=3):
+        for job in jobs:
+            leased.put(job.path)
+            queue.complete(worker, job)
+    queue.close()
+
+
+def test_concurrent_processes_lease_each_job_exactly_once(tmp_path):
+    queue = JobQueue.open(tmp_path)
+    queue.enqueue(files(tmp_path, 300))
+    leased = multiprocessing.Queue()
+    workers = [
+        multiprocessing.Process(target=lease_all, args=(str(tmp_path), f"worker-{i}", leased)) for i in range(4)
+    ]
+    for worker in workers:
+        worker.start()
+    paths = [leased.get(timeout=30) for _ in range(300)]
+    for worker in workers:
+        worker.join(timeout=30)
+
+    assert sorted(paths) == [f"scan_{i:03d}.pdf" for i in range(300)]
+    assert queue.counts()[DONE] == 300
+    queue.close()
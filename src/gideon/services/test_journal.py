@@ -0,0 +1,77 @@
+import json
+import pytest
+from gideon.models.document import DocumentInfo
+from gideon.services.journal import RenameJournal
+
+INFO = DocumentInfo(["Alice Smith"], "2022", "A Study", "Mathematics")
+
+
+@pytest.fixture
+def journal(tmp_path):
+    journal = RenameJournal.for_directory(tmp_path)
+    yield journal
+    journal.close()
+
+
+def test_proposals_are_recorded_with_their_analysis(journal, tmp_path):
+    journal.open()
+    journal.propose([(tmp_path / "scan.pdf", "new.pdf", INFO), (tmp_path / "sub" / "other.pdf", "other.pdf", INFO)])
+    journal.close()
+
+    state = journal.load()
+
+    assert state.proposed["scan.pdf"] == ("new.pdf", json.loads(json.dumps(INFO.__dict__)))
+    assert set(state.proposed) == {"scan.pdf", "sub/other.pdf"}
+    assert state.finished == set()
+
+
+def test_replay_finishes_renames_left_undone(journal, tmp_path):
+    for name in ["pending.pdf", "renamed_before_crash_new.pdf", "conflict.pdf", "taken.pdf"]:
+        (tmp_path / name).touch()
+    journal.open()
+    journal.propose(
+        [
+            (tmp_path / "pending.pdf", "pending_new.pdf", INFO),
+            (tmp_path / "renamed_before_crash.pdf", "renamed_before_crash_new.pdf", INFO),
+            (tmp_path / "conflict.pdf", "taken.pdf", INFO),
+            (tmp_path / "done.pdf", "done_new.pdf", INFO),
+        ]
+    )
+    journal.applied(tmp_path / "done.pdf", tmp_path / "done_new.pdf")
+    journal.close()
+
+    state = journal.load()
+    replayed = journal.replay(state)
+
+    assert [(old.name, new.name) for old, new in replayed] == [
+        ("pending.pdf", "pending_new.pdf"),
+        ("renamed_before_crash.pdf", "renamed_before_crash_new.pdf"),
+    ]
+    assert (tmp_path / "pending_new.pdf").exists() and not (tmp_path / "pending.pdf").exists()
+    # The conflicting file is left for analysis
+    assert (tmp_path / "conflict.pdf").exists()
+    assert state.finished == {"done_new.pdf", "pending_new.pdf", "renamed_before_crash_new.pdf"}
+
+
+def test_a_line_cut_off_by_a_crash_is_ignored(journal, tmp_path):
+    journal.open()
+    journal.propose([(tmp_path / "scan.pdf", "new.pdf", INFO)])
+    journal.close()
+    with open(journal.path, "a") as f:
+        f.write('{"event": "appl')
+
+    assert set(journal.load().proposed) == {"scan.pdf"}
+
+
+def test_completed_run_removes_the_journal_and_a_new_run_discards_an_old_one(journal, tmp_path):
+    journal.open()
+    journal.propose([(tmp_path / "scan.pdf", "new.pdf", INFO)])
+    journal.close()
+
+    journal.open(resume=False)
+    journal.close()
+    assert journal.load().proposed == {}
+
+    journal.open(resume=True)
+    journal.close(completed=True)
+    assert not journal.exists()
@@ -0,0 +1,95 @@
+import pytest
+from unittest.mock import AsyncMock, MagicMock
+from gideon.models.document import DocumentInfo, UNKNOWN_TOPIC
+from gideon.services.metadata_probe import MetadataProbe
+from gideon.services.rename_service import RenameService
+
+
+@pytest.fixture
+def probe():
+    return MetadataProbe()
+
+
+def test_probe_uses_trustworthy_metadata(probe):
+    doc = probe.probe({
+        "title": "Deep Residual Learning for Image Recognition",
+        "author": "Kaiming He; Xiangyu Zhang",
+        "publication_date": "2015-12-10",
+        "keywords": "machine learning, computer vision",
+    })
+    assert doc == DocumentInfo(
+        ["Kaiming He", "Xiangyu Zhang"], "2015", "Deep Residual Learning for Image Recognition", "Machine Learning"
+    )
+
+
+def test_probe_leaves_topic_unknown_without_keywords(probe):
+    doc = probe.probe({"title": "A Study on Testing", "author": "Alice Smith", "publication_date": "2022"})
+    assert doc.topic == UNKNOWN_TOPIC
+
+
+@pytest.mark.parametrize(
+    "dates",
+    [{}, {"creation_date": "D:20230115120000Z"}, {"publication_date": "n.d."}, {"publication_date": "1850-01-01"}],
+)
+def test_probe_requires_a_publication_year(probe, dates):
+    # The creation date of a scanned or re-exported paper is when the file was made, not published
+    assert probe.probe({"title": "A Study on Testing", "author": "Alice Smith", **dates}) is None
+
+
+@pytest.mark.parametrize("title", ["Microsoft Word - draft.docx", "untitled", "paper.pdf", "Slide 1", "123-456-789"])
+def test_probe_rejects_junk_titles(probe, title):
+    assert probe.probe({"title": title, "author": "Alice Smith"}) is None
+
+
+@pytest.mark.parametrize("author", ["admin", "John", "LaTeX with hyperref", "jsmith@example.com", "user123"])
+def test_probe_rejects_junk_authors(probe, author):
+    assert probe.probe({"title": "A Study on Testing", "author": author}) is None
+
+
+def test_clean_authors_splits_lists(probe):
+    assert probe.clean_authors("Smith, John") == ["Smith, John"]
+    assert probe.clean_authors("John Smith, Jane Doe") == ["John Smith", "Jane Doe"]
+    assert probe.clean_authors("John Smith and Jane Doe") == ["John Smith", "Jane Doe"]
+
+
+def test_extract_year_rejects_out_of_range(probe):
+    assert probe.extract_year("D:18500101") == ""
+    assert probe.extract_year("") == ""
+
+
+@pytest.mark.asyncio
+async def test_rename_file_classifies_only_topic_for_embedded_metadata():
+    analyzer = MagicMock(analyze=AsyncMock(), classify=AsyncMock(return_value={"topic": "Mathematics"}))
+    service = RenameService(document_analyzer=analyzer, metadata_probe=MetadataProbe())
+    new_name = await service.rename_file(
+        "content", "scan.pdf", {"title": "A Study on Testing", "author": "Alice Smith", "publication_date": "2022"}
+    )
+    assert new_name.startswith("Alice_Smith.2022.A_study_on_testing.Mathematics.")
+    analyzer.analyze.assert_not_called()
+    analyzer.classify.assert_awaited_once_with("A Study on Testing")
+
+
+@pytest.mark.asyncio
+async def test_rename_file_falls_back_to_analysis():
+    doc = DocumentInfo(["Alice Smith"], "2022", "A Study on Testing", "Mathematics")
+    analyzer = MagicMock(analyze=AsyncMock(return_value=doc), classify=AsyncMock())
+    service = RenameService(document_analyzer=analyzer, metadata_probe=MetadataProbe())
+    await service.rename_file("content", "scan.pdf", {"title": "untitled", "author": "admin"})
+    analyzer.analyze.assert_awaited_once()
+    analyzer.classify.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_propose_batch_names_documents_without_text_from_their_metadata():
+    analyzer = MagicMock(
+        analyze_batch=AsyncMock(return_value=[]), classify_batch=AsyncMock(return_value=[{"topic": "Mathematics"}])
+    )
+    service = RenameService(document_analyzer=analyzer, metadata_probe=MetadataProbe())
+    proposals = await service.propose_batch([
+        ("", "scan.pdf", {"title": "A Study on Testing", "author": "Alice Smith", "publication_date": "2022"}),
+        ("", "blank.pdf", {"title": "untitled"}),
+    ])
+    assert proposals[0].new_name.startswith("Alice_Smith.2022.A_study_on_testing.Mathematics.")
+    assert (proposals[1].new_name, proposals[1].doc_info) == ("blank.pdf", None)
+    # Neither document has text worth analyzing
+    analyzer.analyze_batch.assert_awaited_once_with([])
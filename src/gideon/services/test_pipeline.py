@@ -0,0 +1,274 @@
+import asyncio
+import json
+import os
+from pathlib import Path
+from unittest.mock import MagicMock
+import pytest
+from gideon.services.file_service import FileService
+from gideon.services.journal import RenameJournal
+from gideon.services.manifest import RENAMED, RenameManifest
+from gideon.services.pipeline import RenamePipeline
+from gideon.services.plan import RenamePlanWriter
+from gideon.utils.concurrency import AdaptiveLimiter
+
+
+def paths(count, prefix="scan"):
+    return [Path(f"/docs/{prefix}_{i:03d}.pdf") for i in range(count)]
+
+
+@pytest.mark.asyncio
+async def test_every_file_flows_through_all_stages(make_file_service, make_rename_service):
+    file_service = make_file_service(unreadable={"scan_003.pdf"})
+    rename_service = make_rename_service()
+    pipeline = RenamePipeline(
+        rename_service, file_service, limiter=AdaptiveLimiter(4), batch_size=3, extract_workers=2, queue_size=4
+    )
+
+    stats = await pipeline.run(paths(20) + paths(2, prefix="bad"))
+
+    assert (stats.found, stats.renamed, stats.skipped, stats.errors) == (22, 19, 0, 3)
+    assert sorted(old for old, _ in file_service.renamed) == [f"scan_{i:03d}.pdf" for i in range(20) if i != 3]
+    assert all(new == f"new_{old}" for old, new in file_service.renamed)
+    assert all(1 <= len(batch) <= 3 for batch in rename_service.batches)
+
+
+@pytest.mark.asyncio
+async def test_walker_is_held_back_by_a_stalled_llm_stage(make_file_service, make_rename_service):
+    release = asyncio.Event()
+    walked = []
+
+    def files():
+        for path in paths(1000):
+            walked.append(path)
+            yield path
+
+    pipeline = RenamePipeline(
+        make_rename_service(release),
+        make_file_service(),
+        limiter=AdaptiveLimiter(2),
+        batch_size=4,
+        extract_workers=2,
+        queue_size=5,
+    )
+    run = asyncio.create_task(pipeline.run(files()))
+    await asyncio.sleep(0.05)
+
+    # Only the queues, the batches in flight and the walker's current chunk hold files
+    assert len(walked) <= 3 * 5 + 2 + 2 * 4 + 5
+    release.set()
+    stats = await run
+    assert stats.renamed == 1000
+
+
+@pytest.mark.asyncio
+async def test_skipped_files_do_not_starve_the_other_stages(make_file_service, make_rename_service):
+    file_service = make_file_service()
+    extracted_while_walking = []
+
+    def files():
+        yield Path("/docs/scan.pdf")
+        for i in range(1000):
+            yield Path(f"/docs/Alice_Smith.2022.Study.Mathematics.20240101_1200{i % 60:02d}.pdf")
+        extracted_while_walking.extend(file_service.extracted)
+
+    pipeline = RenamePipeline(make_rename_service(), file_service, limiter=AdaptiveLimiter(1), queue_size=8)
+    stats = await pipeline.run(files())
+
+    assert (stats.found, stats.renamed, stats.skipped) == (1001, 1, 1000)
+    assert extracted_while_walking == ["scan.pdf"]
+
+
+def test_walk_lists_nested_files_with_the_extension(tmp_path):
+    (tmp_path / "a" / "b").mkdir(parents=True)
+    for name in ["top.pdf", "a/mid.pdf", "a/b/deep.pdf", "a/notes.txt"]:
+        (tmp_path / name).write_bytes(b"")
+    (tmp_path / "folder.pdf").mkdir()
+
+    assert sorted(RenamePipeline.walk(tmp_path)) == sorted(
+        tmp_path / name for name in ["top.pdf", "a/mid.pdf", "a/b/deep.pdf"]
+    )
+
+
+@pytest.mark.asyncio
+async def test_scanned_files_reach_the_analysis_when_they_have_metadata(make_file_service, make_rename_service):
+    file_service = make_file_service(scanned={"scan_000.pdf": {"title": "A Study"}, "scan_001.pdf": {}})
+    rename_service = make_rename_service()
+    pipeline = RenamePipeline(rename_service, file_service, limiter=AdaptiveLimiter(1), batch_size=4)
+
+    stats = await pipeline.run(paths(3))
+
+    assert (stats.renamed, stats.errors) == (2, 1)
+    assert sorted(sum(rename_service.batches, [])) == ["scan_000.pdf", "scan_002.pdf"]
+
+
+@pytest.mark.asyncio
+async def test_failed_batches_count_as_errors(make_file_service):
+    rename_service = MagicMock()
+    rename_service.propose_batch.side_effect = RuntimeError("LLM down")
+    pipeline = RenamePipeline(rename_service, make_file_service(), limiter=AdaptiveLimiter(1), batch_size=2)
+
+    stats = await pipeline.run(paths(5))
+
+    assert (stats.found, stats.processed, stats.errors) == (5, 0, 5)
+
+
+class RecordingLimiter(AdaptiveLimiter):
+    def __init__(self):
+        super().__init__(1)
+        self.released = []
+
+    async def release(self, latency, requests=1, errors=0):
+        self.released.append((requests, errors))
+        await super().release(latency, requests, errors)
+
+
+@pytest.mark.asyncio
+async def test_failed_proposals_count_as_limiter_errors(make_file_service, make_rename_service):
+    # Failed proposals keep the original name, so only the missing DocumentInfo tells them apart
+    limiter = RecordingLimiter()
+    pipeline = RenamePipeline(make_rename_service(), make_file_service(), limiter=limiter, batch_size=4)
+
+    await pipeline.run(paths(2) + paths(2, prefix="bad"))
+
+    assert sum(requests for requests, _ in limiter.released) == 4
+    assert sum(errors for _, errors in limiter.released) == 2
+
+
+@pytest.mark.asyncio
+async def test_reports_progress(make_file_service, make_rename_service):
+    updates = []
+    pipeline = RenamePipeline(
+        make_rename_service(),
+        make_file_service(),
+        limiter=AdaptiveLimiter(1),
+        on_update=lambda stats, current: updates.append((stats.finished, current)),
+    )
+
+    await pipeline.run(paths(2))
+
+    assert updates[-1] == (2, None)
+    assert any(current == "scan_000.pdf" for _, current in updates)
+
+
+@pytest.mark.asyncio
+async def test_well_formed_names_are_skipped_before_extraction(make_file_service, make_rename_service):
+    file_service = make_file_service()
+    file_service.extract_pdf = MagicMock(side_effect=AssertionError("opened"))
+    named = Path("/docs/Alice_Smith.2022.Study_of_graphs.Mathematics.20240101_120000.pdf")
+
+    stats = await RenamePipeline(make_rename_service(), file_service).run([named])
+
+    assert (stats.found, stats.skipped, stats.errors) == (1, 1, 0)
+
+
+@pytest.mark.asyncio
+async def test_manifest_skips_files_unchanged_since_the_last_run(tmp_path, make_file_service, make_rename_service):
+    for name in ["one.pdf", "two.pdf", "bad.pdf"]:
+        (tmp_path / name).write_bytes(b"%PDF " + name.encode())
+
+    async def run():
+        manifest = RenameManifest.open(tmp_path)
+        rename_service = make_rename_service()
+        pipeline = RenamePipeline(rename_service, make_file_service(on_disk=True), manifest=manifest)
+        stats = await pipeline.run(RenamePipeline.walk(tmp_path))
+        manifest.close()
+        return stats, rename_service
+
+    first, _ = await run()
+    assert (first.renamed, first.errors) == (2, 1)
+
+    # The renamed files are found under their new names, the failure is retried
+    second, rename_service = await run()
+    assert (second.found, second.unchanged, second.errors) == (3, 2, 1)
+    assert rename_service.batches == [["bad.pdf"]]
+
+    (tmp_path / "bad.pdf").write_bytes(b"%PDF edited")
+    (tmp_path / "new_one.pdf").touch()
+    third, rename_service = await run()
+    assert third.unchanged == 2
+    assert rename_service.batches == [["bad.pdf"]]
+
+
+@pytest.mark.asyncio
+async def test_an_unreadable_file_fails_alone_in_incremental_mode(tmp_path, make_file_service, make_rename_service):
+    (tmp_path / "one.pdf").write_bytes(b"%PDF")
+    (tmp_path / "broken.pdf").symlink_to(tmp_path / "missing.pdf")
+    manifest = RenameManifest.open(tmp_path)
+
+    stats = await RenamePipeline(make_rename_service(), make_file_service(on_disk=True), manifest=manifest).run(
+        sorted(RenamePipeline.walk(tmp_path))
+    )
+
+    assert (stats.renamed, stats.errors) == (1, 1)
+    assert (tmp_path / "new_one.pdf").exists()
+    assert manifest.lookup(tmp_path / "broken.pdf") is None
+    manifest.close()
+
+
+def test_the_manifest_uses_a_rollback_journal(tmp_path):
+    manifest = RenameManifest.open(tmp_path)
+    assert manifest._connection.execute("PRAGMA journal_mode").fetchone()[0] == "delete"
+    manifest.close()
+
+
+@pytest.mark.asyncio
+async def test_a_rename_onto_an_existing_file_fails_without_replacing_it(
+    tmp_path, make_file_service, make_rename_service
+):
+    (tmp_path / "scan.pdf").write_bytes(b"%PDF copy")
+    (tmp_path / "new_scan.pdf").write_bytes(b"%PDF original")
+
+    stats = await RenamePipeline(make_rename_service(), make_file_service(on_disk=True)).run([tmp_path / "scan.pdf"])
+
+    assert (stats.renamed, stats.errors) == (0, 1)
+    assert (tmp_path / "scan.pdf").read_bytes() == b"%PDF copy"
+    assert (tmp_path / "new_scan.pdf").read_bytes() == b"%PDF original"
+
+
+@pytest.mark.asyncio
+async def test_journal_records_analyses_before_renames_and_skips_finished_files(
+    tmp_path, make_file_service, make_rename_service
+):
+    for name in ["one.pdf", "two.pdf", "bad.pdf"]:
+        (tmp_path / name).write_bytes(b"%PDF")
+    journal = RenameJournal.for_directory(tmp_path)
+    journal.open()
+    rename_service = make_rename_service()
+    pipeline = RenamePipeline(
+        rename_service, make_file_service(on_disk=True), journal=journal, finished={tmp_path / "two.pdf"}
+    )
+
+    stats = await pipeline.run(sorted(RenamePipeline.walk(tmp_path)))
+    journal.close()
+
+    assert (stats.resumed, stats.renamed, stats.errors) == (1, 1, 1)
+    assert sorted(name for batch in rename_service.batches for name in batch) == ["bad.pdf", "one.pdf"]
+    events = [(entry["event"], entry["path"]) for entry in map(json.loads, journal.path.read_text().splitlines())]
+    assert events == [("proposed", "one.pdf"), ("applied", "one.pdf")]
+
+
+@pytest.mark.asyncio
+async def test_plan_mode_writes_proposals_without_renaming(tmp_path, make_file_service, make_rename_service):
+    for name in ["one.pdf", "bad.pdf", "seen.pdf"]:
+        (tmp_path / name).write_bytes(b"%PDF " + name.encode())
+    manifest = RenameManifest.open(tmp_path)
+    manifest.record(tmp_path / "seen.pdf", RENAMED, FileService.hash_file(tmp_path / "seen.pdf"))
+    seen = manifest.lookup(tmp_path / "seen.pdf")
+    os.utime(tmp_path / "seen.pdf", ns=(0, 0))
+    plan = RenamePlanWriter(tmp_path / "plan.jsonl", tmp_path)
+    file_service = make_file_service(on_disk=True)
+    pipeline = RenamePipeline(make_rename_service(), file_service, manifest=manifest, plan=plan)
+
+    stats = await pipeline.run(sorted(RenamePipeline.walk(tmp_path)))
+    plan.close()
+
+    assert (stats.planned, stats.renamed, stats.errors, stats.unchanged) == (1, 0, 1, 1)
+    assert sorted(path.name for path in tmp_path.glob("*.pdf")) == ["bad.pdf", "one.pdf", "seen.pdf"]
+    # Skipping seen.pdf by its contents did not update its stat in the manifest
+    assert manifest.lookup(tmp_path / "seen.pdf") == seen
+    assert len(manifest) == 1
+    manifest.close()
+    entry = json.loads((tmp_path / "plan.jsonl").read_text())
+    assert entry["path"] == "one.pdf" and entry["new_name"] == "new_one.pdf"
+    assert entry["hash"] == FileService.hash_file(tmp_path / "one.pdf")
+    assert entry["doc_info"]["topic"] == "Mathematics"
@@ -0,0 +1,128 @@
+from pathlib import Path
+import pytest
+from gideon.models.document import DocumentInfo
+from gideon.services.file_service import FileService
+from gideon.services.manifest import RenameManifest
+from gideon.services.plan import PlanEntry, RenamePlanWriter, Shard, apply_plan, read_plans
+
+INFO = DocumentInfo(["Alice Smith"], "2022", "A Study", "Mathematics")
+
+
+def named(second):
+    return f"Alice_Smith.2022.Study_of_graphs.Mathematics.20240101_1200{second:02d}.pdf"
+
+
+def write_plan(path, root, renames):
+    plan = RenamePlanWriter(path, root)
+    for file_path, new_name in renames:
+        plan.write(file_path, FileService.hash_file(file_path), new_name, INFO)
+    plan.close()
+    return path
+
+
+def test_shards_split_files_into_disjoint_subsets():
+    files = [Path(f"papers/scan_{i:03d}.pdf") for i in range(200)]
+    shards = [Shard.parse(f"{i}/3") for i in range(1, 4)]
+
+    owners = [[shard.index for shard in shards if shard.contains(path)] for path in files]
+
+    assert all(len(owner) == 1 for owner in owners)
+    assert all(owners.count([i]) > 30 for i in range(1, 4))
+
+
+@pytest.mark.parametrize("value", ["3", "0/2", "3/2", "a/b", "1/2/3"])
+def test_malformed_shards_are_rejected(value):
+    with pytest.raises(ValueError):
+        Shard.parse(value)
+
+
+def test_plans_from_several_shards_merge_and_apply(tmp_path):
+    (tmp_path / "sub").mkdir()
+    one, two = tmp_path / "one.pdf", tmp_path / "sub" / "two.pdf"
+    one.write_bytes(b"%PDF one")
+    two.write_bytes(b"%PDF two")
+    first = write_plan(tmp_path / "first.jsonl", tmp_path, [(one, named(1))])
+    second = write_plan(tmp_path / "second.jsonl", tmp_path, [(two, named(2))])
+
+    entries = read_plans([first, second])
+    assert sorted(entries) == ["one.pdf", "sub/two.pdf"]
+    assert entries["one.pdf"].doc_info["authors"] == ["Alice Smith"]
+
+    manifest = RenameManifest.open(tmp_path)
+    stats = apply_plan(tmp_path, entries.values(), manifest)
+
+    assert (stats.renamed, stats.skipped, stats.errors) == (2, 0, 0)
+    assert (tmp_path / named(1)).exists() and (tmp_path / "sub" / named(2)).exists()
+    assert manifest.is_unchanged(tmp_path / "sub" / named(2))
+    manifest.close()
+
+
+def test_later_plans_win_and_malformed_lines_are_skipped(tmp_path):
+    (tmp_path / "one.pdf").write_bytes(b"%PDF")
+    first = write_plan(tmp_path / "first.jsonl", tmp_path, [(tmp_path / "one.pdf", named(1))])
+    second = write_plan(tmp_path / "second.jsonl", tmp_path, [(tmp_path / "one.pdf", named(2))])
+    with open(second, "a") as f:
+        f.write('{"path": "cut off\n')
+
+    entries = read_plans([first, second])
+
+    assert [entry.new_name for entry in entries.values()] == [named(2)]
+
+
+def test_apply_skips_files_that_changed_or_would_collide(tmp_path):
+    for name in ["edited.pdf", "gone.pdf", "first.pdf", "second.pdf", "taken.pdf", named(9)]:
+        (tmp_path / name).write_bytes(b"%PDF " + name.encode())
+    entries = [
+        PlanEntry(name, FileService.hash_file(tmp_path / name), new_name)
+        for name, new_name in [
+            ("edited.pdf", named(1)),
+            ("gone.pdf", named(2)),
+            ("first.pdf", named(3)),
+            ("second.pdf", named(3)),
+            ("taken.pdf", named(9)),
+        ]
+    ]
+    (tmp_path / "edited.pdf").write_bytes(b"%PDF changed")
+    (tmp_path / "gone.pdf").unlink()
+
+    stats = apply_plan(tmp_path, entries)
+
+    assert (stats.renamed, stats.skipped) == (1, 4)
+    assert sorted(path.name for path in tmp_path.glob("*.pdf")) == sorted(
+        ["edited.pdf", named(3), "second.pdf", "taken.pdf", named(9)]
+    )
+
+
+def test_dry_run_changes_nothing(tmp_path):
+    (tmp_path / "one.pdf").write_bytes(b"%PDF")
+    entry = PlanEntry("one.pdf", FileService.hash_file(tmp_path / "one.pdf"), named(1))
+
+    stats = apply_plan(tmp_path, [entry], dry_run=True)
+
+    assert stats.renamed == 1
+    assert (tmp_path / "one.pdf").exists() and not (tmp_path / named(1)).exists()
+
+
+@pytest.mark.parametrize(
+    "path, new_name",
+    [
+        ("one.pdf", "../" + named(1)),
+        ("one.pdf", "sub/" + named(1)),
+        ("one.pdf", "renamed.pdf"),
+        ("../outside/one.pdf", named(1)),
+        ("/etc/one.pdf", named(1)),
+        ("", named(1)),
+    ],
+)
+def test_entries_leaving_the_directory_or_with_malformed_names_are_rejected(tmp_path, path, new_name):
+    library = tmp_path / "library"
+    (library / "sub").mkdir(parents=True)
+    (tmp_path / "outside").mkdir()
+    for source in [library / "one.pdf", tmp_path / "outside" / "one.pdf"]:
+        source.write_bytes(b"%PDF")
+    entry = PlanEntry(path, FileService.hash_file(library / "one.pdf"), new_name)
+
+    stats = apply_plan(library, [entry])
+
+    assert (stats.renamed, stats.errors) == (0, 1)
+    assert (library / "one.pdf").exists() and (tmp_path / "outside" / "one.pdf").exists()
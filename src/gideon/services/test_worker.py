@@ -0,0 +1,115 @@
+import asyncio
+import sqlite3
+import pytest
+from gideon.services.job_queue import DONE, FAILED, JobQueue
+from gideon.services.worker import RenameWorker
+
+
+def make_files(directory, names):
+    for name in names:
+        (directory / name).write_bytes(b"%PDF")
+    return [directory / name for name in names]
+
+
+@pytest.fixture
+def make_worker(make_file_service, make_rename_service):
+    def make(directory, name, rename_service=None, **kwargs):
+        queue = JobQueue.open(directory, max_attempts=2, clock_skew=0, **kwargs)
+        return RenameWorker(
+            queue,
+            rename_service or make_rename_service(delay=0.01),
+            make_file_service(on_disk=True),
+            worker_id=name,
+            batch_size=3,
+            poll_interval=0,
+        )
+
+    return make
+
+
+@pytest.mark.asyncio
+async def test_workers_share_the_queue_and_rename_each_file_once(tmp_path, make_worker):
+    names = [f"scan_{i:02d}.pdf" for i in range(30)]
+    JobQueue.open(tmp_path).enqueue(make_files(tmp_path, names))
+    workers = [make_worker(tmp_path, f"worker-{i}") for i in range(3)]
+
+    results = await asyncio.gather(*(worker.run() for worker in workers))
+
+    analyzed = [name for worker in workers for name in worker.rename_service.analyzed]
+    assert sorted(analyzed) == names
+    assert all(stats.renamed > 0 for stats in results)
+    assert sorted(path.name for path in tmp_path.glob("*.pdf")) == [f"new_{name}" for name in names]
+    assert workers[0].queue.counts()[DONE] == 30
+
+
+@pytest.mark.asyncio
+async def test_failures_are_retried_then_given_up_on(tmp_path, make_worker):
+    JobQueue.open(tmp_path).enqueue(make_files(tmp_path, ["bad.pdf", "good.pdf"]))
+    worker = make_worker(tmp_path, "worker")
+
+    stats = await worker.run()
+
+    assert (stats.renamed, stats.errors) == (1, 2)
+    assert worker.rename_service.analyzed.count("bad.pdf") == 2
+    assert worker.queue.counts()[FAILED] == 1
+
+
+@pytest.mark.asyncio
+async def test_an_existing_file_is_never_overwritten(tmp_path, make_worker):
+    JobQueue.open(tmp_path).enqueue(make_files(tmp_path, ["scan.pdf"]))
+    (tmp_path / "new_scan.pdf").write_bytes(b"%PDF other")
+    worker = make_worker(tmp_path, "worker")
+
+    stats = await worker.run()
+
+    assert (stats.renamed, stats.errors) == (0, 2)
+    assert (tmp_path / "new_scan.pdf").read_bytes() == b"%PDF other"
+
+
+@pytest.mark.asyncio
+async def test_a_rename_done_before_a_crash_is_not_repeated(tmp_path, make_worker):
+    queue = JobQueue.open(tmp_path, lease_seconds=-1, clock_skew=0)
+    queue.enqueue(make_files(tmp_path, ["scan.pdf"]))
+    job = queue.lease("crashed")[0]
+    queue.begin_rename("crashed", job, "new_scan.pdf")
+    (tmp_path / "scan.pdf").rename(tmp_path / "new_scan.pdf")
+    worker = make_worker(tmp_path, "worker")
+
+    stats = await worker.run()
+
+    assert stats.renamed == 1
+    assert worker.rename_service.analyzed == []
+    assert queue.counts()[DONE] == 1
+
+
+@pytest.mark.asyncio
+async def test_a_stopped_worker_hands_its_jobs_back(tmp_path, make_worker, make_rename_service):
+    JobQueue.open(tmp_path).enqueue(make_files(tmp_path, ["scan.pdf"]))
+    # Never released, so the first worker stalls on its batch
+    worker = make_worker(tmp_path, "leaving", make_rename_service(asyncio.Event()))
+    run = asyncio.create_task(worker.run())
+    await asyncio.sleep(0.05)
+    run.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await run
+
+    stats = await make_worker(tmp_path, "joining").run()
+    assert stats.renamed == 1
+
+
+@pytest.mark.asyncio
+async def test_a_worker_waits_out_a_locked_queue(tmp_path, make_worker):
+    JobQueue.open(tmp_path).enqueue(make_files(tmp_path, ["scan.pdf"]))
+    worker = make_worker(tmp_path, "worker")
+    worker.queue._connection.execute("PRAGMA busy_timeout = 0")
+    # Another process, such as `gideon worker enqueue`, holds the write lock
+    blocker = sqlite3.connect(str(worker.queue.path), isolation_level=None)
+    blocker.execute("BEGIN IMMEDIATE")
+
+    run = asyncio.create_task(worker.run())
+    await asyncio.sleep(0.05)
+    assert not run.done()
+    blocker.execute("COMMIT")
+    blocker.close()
+
+    assert (await run).renamed == 1
@@ -0,0 +1,153 @@
+"""Rename files taken from a shared job queue, alongside any number of other worker processes."""
+import asyncio
+import os
+import socket
+import sqlite3
+from concurrent.futures import Executor
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Callable, List, Optional
+from ..core.config import settings
+from ..utils.logging import log_error, log_info, log_warning
+from .extraction_cache import ExtractionCache
+from .file_service import FileService
+from .job_queue import JobQueue, QueuedJob, is_busy
+from .rename_service import RenameService
+
+
+@dataclass
+class WorkerStats:
+    processed: int = 0
+    renamed: int = 0
+    skipped: int = 0
+    errors: int = 0
+    # Jobs whose lease ran out before their file was renamed, left to the worker that took them over
+    lost: int = 0
+
+
+class RenameWorker:
+    """Lease batches of jobs from a JobQueue, analyze them with the worker's own RenameService and
+    rename their files, heartbeating the leases meanwhile.
+
+    Workers can join and leave at any time: a worker that stops hands its jobs back, one that dies
+    loses them when their leases expire. Without `wait`, a worker exits once no job is pending or
+    leased; with it, it keeps polling for jobs enqueued later.
+
+    Queue operations run off the event loop, and are retried while another process holds the
+    queue's lock past its busy timeout.
+    """
+
+    def __init__(
+        self,
+        queue: JobQueue,
+        rename_service: RenameService,
+        file_service: Optional[FileService] = None,
+        executor: Optional[Executor] = None,
+        cache: Optional[ExtractionCache] = None,
+        worker_id: Optional[str] = None,
+        batch_size: int = 1,
+        poll_interval: Optional[float] = None,
+    ):
+        self.queue = queue
+        self.rename_service = rename_service
+        self.file_service = file_service or FileService()
+        self.executor = executor
+        self.cache = cache
+        self.worker_id = worker_id or f"{socket.gethostname()}-{os.getpid()}"
+        self.batch_size = max(1, batch_size)
+        self.poll_interval = settings.WORKER_POLL_INTERVAL if poll_interval is None else poll_interval
+        self.stats = WorkerStats()
+
+    async def run(self, wait: bool = False) -> WorkerStats:
+        while True:
+            jobs = await self._queue_call(self.queue.lease, self.worker_id, self.batch_size)
+            if not jobs:
+                # Jobs leased by other workers may still come back if those workers die
+                if not wait and not await self._queue_call(self.queue.has_unfinished):
+                    return self.stats
+                await asyncio.sleep(self.poll_interval)
+                continue
+            heartbeat = asyncio.create_task(self._heartbeat(jobs))
+            try:
+                await self._process(jobs)
+            except asyncio.CancelledError:
+                await self._queue_call(self.queue.release, self.worker_id, jobs)
+                raise
+            finally:
+                heartbeat.cancel()
+
+    async def _heartbeat(self, jobs: List[QueuedJob]) -> None:
+        while True:
+            await asyncio.sleep(self.queue.lease_seconds / 3)
+            await self._queue_call(self.queue.heartbeat, self.worker_id, jobs)
+
+    async def _queue_call(self, operation: Callable[..., Any], *args: Any) -> Any:
+        while True:
+            try:
+                return await asyncio.to_thread(operation, *args)
+            except sqlite3.OperationalError as e:
+                if not is_busy(e):
+                    raise
+                log_warning(f"The job queue is busy ({e}); retrying")
+                await asyncio.sleep(self.poll_interval)
+
+    async def _process(self, jobs: List[QueuedJob]) -> None:
+        ready = []
+        for job in jobs:
+            path = self.queue.root / job.path
+            if job.new_name and not path.exists() and (path.parent / job.new_name).exists():
+                # An earlier attempt renamed the file but did not live to record it
+                await self._complete(job)
+                self.stats.renamed += 1
+            elif not path.exists():
+                await self._fail(job, path, "the file no longer exists")
+            else:
+                ready.append((job, path))
+
+        extracts = await asyncio.gather(
+            *(self.file_service.extract_pdf(path, self.executor, self.cache) for _, path in ready)
+        )
+        extracted, documents = [], []
+        for (job, path), extract in zip(ready, extracts):
+            if not extract or not (extract.text or extract.metadata):
+                await self._fail(job, path, "could not extract content")
+            else:
+                extracted.append((job, path))
+                documents.append((extract.text, path.name, extract.metadata))
+        if not extracted:
+            return
+
+        try:
+            proposals = await self.rename_service.propose_batch(documents)
+        except Exception as e:
+            for job, path in extracted:
+                await self._fail(job, path, str(e))
+            return
+        for (job, path), proposal in zip(extracted, proposals):
+            if proposal.doc_info is None:
+                await self._fail(job, path, "could not generate a new name")
+            elif proposal.new_name == path.name:
+                await self._complete(job)
+                self.stats.skipped += 1
+            elif (path.parent / proposal.new_name).exists():
+                # Another worker may have given a file the same name; a retry gets a new timestamp
+                await self._fail(job, path, f"{proposal.new_name} already exists")
+            elif not await self._queue_call(self.queue.begin_rename, self.worker_id, job, proposal.new_name):
+                log_warning(f"Lost the lease on {job.path}; leaving it to another worker")
+                self.stats.lost += 1
+            elif self.file_service.rename_file(path, proposal.new_name) is None:
+                await self._fail(job, path, "rename failed")
+            else:
+                await self._complete(job)
+                self.stats.renamed += 1
+
+    async def _complete(self, job: QueuedJob) -> None:
+        await self._queue_call(self.queue.complete, self.worker_id, job)
+        self.stats.processed += 1
+
+    async def _fail(self, job: QueuedJob, path: Path, error: str) -> None:
+        log_error(f"Could not rename {path.name}: {error}")
+        await self._queue_call(self.queue.fail, self.worker_id, job, error)
+        self.stats.errors += 1
+        if job.attempts < self.queue.max_attempts:
+            log_info(f"{job.path} will be retried")
@@ -0,0 +1,110 @@
+"""Adaptive concurrency limiting for requests to an inference server."""
+import asyncio
+import math
+import time
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Callable, Optional, Union
+
+
+class Slot:
+    """A held limiter slot. Set `errors` to the number of requests in it that failed."""
+
+    def __init__(self, requests: int):
+        self.requests = requests
+        self.errors = 0
+
+
+class AdaptiveLimiter:
+    """An AIMD concurrency limit driven by request latency and errors.
+
+    While every slot is in use and latency stays within `latency_tolerance` times the best latency
+    seen, the limit grows by one slot per round trip. When latency climbs past that or the error
+    rate exceeds `error_tolerance`, the limit is multiplied by `backoff`, at most once per round trip.
+    The limit always stays between `min_limit` and `max_limit`.
+
+    A slot's requests run `parallel_slots` at a time on the server, so its latency is divided by
+    the number of rounds they took rather than by the number of requests; a short batch then looks
+    as fast as a full one. `parallel_slots` may be a callable for servers whose capacity changes.
+    """
+
+    def __init__(
+        self,
+        max_limit: int,
+        min_limit: int = 1,
+        initial_limit: Optional[int] = None,
+        backoff: float = 0.5,
+        latency_tolerance: float = 2.0,
+        error_tolerance: float = 0.1,
+        smoothing: float = 0.3,
+        clock: Callable[[], float] = time.monotonic,
+        parallel_slots: Union[int, Callable[[], int]] = 1,
+    ):
+        self.max_limit = max(1, max_limit)
+        self.min_limit = max(1, min(min_limit, self.max_limit))
+        self.backoff = backoff
+        self.latency_tolerance = latency_tolerance
+        self.error_tolerance = error_tolerance
+        self.smoothing = smoothing
+        self.clock = clock
+        self.parallel_slots = parallel_slots
+        self._limit = float(min(max(initial_limit or self.min_limit, self.min_limit), self.max_limit))
+        self.in_flight = 0
+        self.latency: Optional[float] = None
+        self.baseline: Optional[float] = None
+        self._last_decrease = float("-inf")
+        self._changed = asyncio.Condition()
+
+    @property
+    def limit(self) -> int:
+        return int(self._limit)
+
+    async def acquire(self) -> None:
+        async with self._changed:
+            await self._changed.wait_for(lambda: self.in_flight < self.limit)
+            self.in_flight += 1
+
+    async def release(self, latency: float, requests: int = 1, errors: int = 0) -> None:
+        """Free a slot and adjust the limit from its per-request latency and error count."""
+        async with self._changed:
+            saturated = self.in_flight >= self.limit
+            self.in_flight -= 1
+            rounds = math.ceil(max(requests, 1) / self._parallel_slots())
+            self.record(latency / rounds, errors / max(requests, 1), saturated)
+            self._changed.notify_all()
+
+    def _parallel_slots(self) -> int:
+        slots = self.parallel_slots() if callable(self.parallel_slots) else self.parallel_slots
+        return max(1, slots)
+
+    def record(self, latency: float, error_rate: float = 0.0, saturated: bool = True) -> None:
+        if self.latency is None:
+            self.latency = latency
+        else:
+            self.latency += self.smoothing * (latency - self.latency)
+        if self.baseline is None or self.latency < self.baseline:
+            self.baseline = self.latency
+        else:
+            # Let the baseline drift up slowly so one unusually fast response does not pin it forever
+            self.baseline += 0.01 * (self.latency - self.baseline)
+
+        now = self.clock()
+        if error_rate > self.error_tolerance or self.latency > self.baseline * self.latency_tolerance:
+            if now - self._last_decrease >= self.latency:
+                self._limit = max(float(self.min_limit), self._limit * self.backoff)
+                self._last_decrease = now
+        elif saturated:
+            self._limit = min(float(self.max_limit), self._limit + 1 / self._limit)
+
+    @asynccontextmanager
+    async def slot(self, requests: int = 1) -> AsyncIterator[Slot]:
+        """Hold a slot for `requests` requests; an exception counts all of them as failed."""
+        await self.acquire()
+        slot = Slot(requests)
+        start = self.clock()
+        try:
+            yield slot
+        except BaseException:
+            slot.errors = requests
+            raise
+        finally:
+            await self.release(self.clock() - start, slot.requests, slot.errors)
@@ -0,0 +1,106 @@
+"""Select the parts of a document that carry its metadata and pack them into a token budget."""
+import math
+import re
+import unicodedata
+from typing import Dict, List, Optional
+
+from ..core.config import settings
+
+ABSTRACT_PATTERN = re.compile(r"^\s*(abstract|summary|résumé)\b[\s.:—-]*", re.IGNORECASE)
+KEYWORDS_PATTERN = re.compile(r"^\s*(keywords|key words|index terms)\b", re.IGNORECASE)
+SECTION_PATTERN = re.compile(
+    r"^\s*((\d+|[IVX]+)\.?\s+[A-Z][A-Za-z ]{2,60}|introduction|background|preliminaries|chapter \d+\b.*)\s*$",
+    re.IGNORECASE,
+)
+AUTHOR_HINT_PATTERN = re.compile(
+    r"@|\b(university|universidad|institute|department|laboratory|school of|college|faculty|"
+    r"research|inc\.|corporation|edited by|by)\b",
+    re.IGNORECASE,
+)
+NAME_PATTERN = re.compile(r"^[A-Z][\w'.-]+(?:\s+[A-Z][\w'.-]*){1,3}\b")
+YEAR_PATTERN = re.compile(r"\b(19|20)\d{2}\b")
+
+
+class ContentSelector:
+    """Build a compact analysis input from raw extracted text.
+
+    Picks the title block, author lines, dated lines, the abstract, the keywords line and the first
+    section heading, then fills whatever budget is left with the remaining text from the top of the
+    document. Token counts are estimated from characters; no tokenizer is required.
+    """
+
+    def __init__(
+        self,
+        max_tokens: Optional[int] = None,
+        chars_per_token: float = 4.0,
+        head_lines: int = 40,
+        title_lines: int = 6,
+        abstract_lines: int = 25,
+    ):
+        self.max_tokens = max_tokens or settings.MAX_PROMPT_TOKENS
+        self.chars_per_token = chars_per_token
+        self.head_lines = head_lines
+        self.title_lines = title_lines
+        self.abstract_lines = abstract_lines
+
+    def estimate_tokens(self, text: str) -> int:
+        return math.ceil(len(text) / self.chars_per_token)
+
+    @staticmethod
+    def normalize(text: str) -> str:
+        """Fold ligatures, rejoin words hyphenated across line breaks and collapse whitespace."""
+        text = unicodedata.normalize("NFKC", text)
+        text = text.replace("\u00ad", "")
+        text = re.sub(r"(\w)-\s*\n\s*([a-z])", r"\1\2", text)
+        lines = [re.sub(r"[ \t\f\v]+", " ", line).strip() for line in text.splitlines()]
+        return "\n".join(line for line in lines if line)
+
+    def select(self, content: str) -> str:
+        lines = self.normalize(content).splitlines()
+        if not lines:
+            return ""
+
+        budget = int(self.max_tokens * self.chars_per_token)
+        selected: Dict[int, str] = {}
+        used = 0
+
+        def take(indexes: List[int]) -> None:
+            nonlocal used
+            for index in indexes:
+                if index in selected:
+                    continue
+                remaining = budget - used
+                if remaining <= 0:
+                    return
+                # Long lines, such as a whole abstract extracted as one paragraph, are cut to fit
+                text = lines[index][:remaining - 1] if len(lines[index]) + 1 > remaining else lines[index]
+                if not text:
+                    return
+                selected[index] = text
+                used += len(text) + 1
+
+        head = range(min(self.head_lines, len(lines)))
+        abstract_start = next((i for i in range(len(lines)) if ABSTRACT_PATTERN.match(lines[i])), None)
+        section_start = next(
+            (i for i in range(1, len(lines)) if i != abstract_start and SECTION_PATTERN.match(lines[i])), None
+        )
+
+        title_end = min(self.title_lines, abstract_start if abstract_start is not None else len(lines))
+        take(list(range(max(title_end, 1))))
+        take([i for i in head if AUTHOR_HINT_PATTERN.search(lines[i]) or NAME_PATTERN.match(lines[i])])
+        take([i for i in head if YEAR_PATTERN.search(lines[i])])
+
+        if abstract_start is not None:
+            abstract_end = abstract_start + self.abstract_lines
+            if section_start is not None and section_start > abstract_start:
+                abstract_end = min(abstract_end, section_start)
+            take(list(range(abstract_start, min(abstract_end, len(lines)))))
+
+        take([i for i in range(len(lines)) if KEYWORDS_PATTERN.match(lines[i])][:1])
+        if section_start is not None:
+            take([section_start])
+
+        # Spend what is left on the rest of the document, from the top
+        take(list(range(len(lines))))
+
+        return "\n".join(selected[i] for i in sorted(selected))
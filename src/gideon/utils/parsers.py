@@ -3,7 +3,7 @@ from langchain_core.output_parsers import JsonOutputParser
 from langchain_core.outputs import Generation
 import json
 import re
-from typing import Any
+from typing import Any, Optional
 
 
 class CleanJsonOutputParser(JsonOutputParser):
@@ -59,4 +59,81 @@ class CleanJsonOutputParser(JsonOutputParser):
             json_str = match.group()
             return json.loads(json_str)
         except json.JSONDecodeError:
-            raise ValueError("Invalid JSON format in response") 
\ No newline at end of file
+            raise ValueError("Invalid JSON format in response") 
+
+class JsonObjectScanner:
+    """Find the first complete JSON object in text that arrives in chunks.
+
+    Text inside `<think>` blocks is skipped, and braces inside JSON strings are ignored. Feed
+    chunks as they stream in; `feed` returns the parsed object as soon as its closing brace arrives,
+    so the rest of the generation can be cancelled.
+    """
+
+    THINK_OPEN = "<think>"
+    THINK_CLOSE = "</think>"
+
+    def __init__(self):
+        self.text = ""
+        self._pos = 0
+        self._in_think = False
+        self._start = -1
+        self._depth = 0
+        self._in_string = False
+        self._escaped = False
+        self.object_text: Optional[str] = None
+
+    def feed(self, chunk: str) -> Optional[Any]:
+        self.text += chunk
+        text = self.text
+        while self._pos < len(text):
+            if self._in_think:
+                end = text.find(self.THINK_CLOSE, self._pos)
+                if end < 0:
+                    # Keep enough text to recognise a closing tag split across chunks
+                    self._pos = max(self._pos, len(text) - len(self.THINK_CLOSE) + 1)
+                    return None
+                self._in_think = False
+                self._pos = end + len(self.THINK_CLOSE)
+                continue
+
+            char = text[self._pos]
+            if self._start < 0:
+                if char == "<":
+                    rest = text[self._pos:self._pos + len(self.THINK_OPEN)]
+                    if rest == self.THINK_OPEN:
+                        self._in_think = True
+                        self._pos += len(self.THINK_OPEN)
+                        continue
+                    if self.THINK_OPEN.startswith(rest):
+                        # Possibly the start of a tag; wait for the next chunk
+                        return None
+                elif char == "{":
+                    self._start, self._depth = self._pos, 1
+                self._pos += 1
+                continue
+
+            self._pos += 1
+            if self._in_string:
+                if self._escaped:
+                    self._escaped = False
+                elif char == "\\":
+                    self._escaped = True
+                elif char == '"':
+                    self._in_string = False
+            elif char == '"':
+                self._in_string = True
+            elif char == "{":
+                self._depth += 1
+            elif char == "}":
+                self._depth -= 1
+                if self._depth == 0:
+                    candidate = text[self._start:self._pos]
+                    self._start = -1
+                    try:
+                        parsed = json.loads(candidate)
+                    except json.JSONDecodeError:
+                        # Not valid JSON after all; keep looking for the next object
+                        continue
+                    self.object_text = candidate
+                    return parsed
+        return None
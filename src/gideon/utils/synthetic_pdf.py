@@ -0,0 +1,56 @@
+"""Minimal PDFs with extractable text, for the tests and benchmarks that need real files to parse."""
+import io
+from typing import BinaryIO, List
+
+
+def write_pdf(output: BinaryIO, pages: List[str], image_payload: bytes = b"") -> None:
+    """Write a PDF with one page per entry, each line of an entry set in Helvetica on a line of its own.
+
+    With an image payload, every page also carries it as an opaque image, like a scanned page.
+    The PDF is written object by object, so large synthetic books need not fit in memory.
+    """
+    start = output.tell()
+    offsets = []
+    objects_per_page = 3 if image_payload else 2
+
+    def write_object(number: int, body: bytes) -> None:
+        offsets.append(output.tell() - start)
+        output.write(f"{number} 0 obj\n".encode() + body + b"\nendobj\n")
+
+    page_refs = " ".join(f"{4 + objects_per_page * i} 0 R" for i in range(len(pages)))
+    output.write(b"%PDF-1.4\n")
+    write_object(1, b"<< /Type /Catalog /Pages 2 0 R >>")
+    write_object(2, f"<< /Type /Pages /Kids [{page_refs}] /Count {len(pages)} >>".encode())
+    write_object(3, b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>")
+    for i, text in enumerate(pages):
+        page = 4 + objects_per_page * i
+        lines = " T* ".join(f"({line}) Tj" for line in text.split("\n"))
+        stream = f"BT /F1 12 Tf 14 TL 72 720 Td {lines} ET".encode()
+        images = f" /XObject << /Im0 {page + 2} 0 R >>" if image_payload else ""
+        write_object(
+            page,
+            f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] /Contents {page + 1} 0 R "
+            f"/Resources << /Font << /F1 3 0 R >>{images} >> >>".encode(),
+        )
+        write_object(page + 1, f"<< /Length {len(stream)} >>\nstream\n".encode() + stream + b"\nendstream")
+        if image_payload:
+            write_object(
+                page + 2,
+                f"<< /Type /XObject /Subtype /Image /Width 1 /Height 1 /ColorSpace /DeviceGray "
+                f"/BitsPerComponent 8 /Length {len(image_payload)} >>\nstream\n".encode()
+                + image_payload
+                + b"\nendstream",
+            )
+
+    xref_offset = output.tell() - start
+    output.write(f"xref\n0 {len(offsets) + 1}\n0000000000 65535 f \n".encode())
+    for offset in offsets:
+        output.write(f"{offset:010d} 00000 n \n".encode())
+    output.write(f"trailer\n<< /Size {len(offsets) + 1} /Root 1 0 R >>\nstartxref\n{xref_offset}\n%%EOF\n".encode())
+
+
+def build_pdf(pages: List[str], image_payload: bytes = b"") -> bytes:
+    """The bytes of the PDF write_pdf writes."""
+    output = io.BytesIO()
+    write_pdf(output, pages, image_payload)
+    return output.getvalue()
@@ -0,0 +1,108 @@
+import asyncio
+import pytest
+from gideon.utils.concurrency import AdaptiveLimiter
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_limit_grows_while_latency_is_flat():
+    limiter = AdaptiveLimiter(max_limit=8, clock=FakeClock())
+
+    for _ in range(60):
+        limiter.record(1.0)
+
+    assert limiter.limit == 8
+
+
+def test_limit_only_grows_when_all_slots_are_used():
+    limiter = AdaptiveLimiter(max_limit=8, clock=FakeClock())
+
+    for _ in range(30):
+        limiter.record(1.0, saturated=False)
+
+    assert limiter.limit == 1
+
+
+def test_limit_backs_off_when_latency_climbs():
+    clock = FakeClock()
+    limiter = AdaptiveLimiter(max_limit=16, initial_limit=16, clock=clock)
+    limiter.record(1.0)
+
+    for _ in range(5):
+        clock.now += 10.0
+        limiter.record(10.0)
+
+    assert limiter.limit < 8
+
+
+def test_limit_backs_off_at_most_once_per_round_trip():
+    clock = FakeClock()
+    limiter = AdaptiveLimiter(max_limit=16, initial_limit=16, clock=clock)
+    limiter.record(1.0)
+
+    for _ in range(5):
+        limiter.record(1.0, error_rate=1.0)
+
+    assert limiter.limit == 8
+
+
+def test_limit_backs_off_on_errors_and_respects_minimum():
+    clock = FakeClock()
+    limiter = AdaptiveLimiter(max_limit=16, min_limit=2, initial_limit=16, clock=clock)
+
+    for _ in range(10):
+        clock.now += 5.0
+        limiter.record(1.0, error_rate=0.5)
+
+    assert limiter.limit == 2
+
+
+@pytest.mark.asyncio
+async def test_short_batches_on_a_parallel_server_do_not_look_slow():
+    clock = FakeClock()
+    limiter = AdaptiveLimiter(max_limit=8, initial_limit=8, clock=clock, parallel_slots=lambda: 8)
+
+    # The server runs up to 8 requests at once, so every batch takes the same second
+    for requests in [8, 8, 8, 8, 1, 1, 8, 1, 8, 1, 1, 1, 8, 8]:
+        await limiter.acquire()
+        clock.now += 1.0
+        await limiter.release(1.0, requests)
+
+    assert limiter.limit == 8
+
+
+@pytest.mark.asyncio
+async def test_slots_never_exceed_the_limit():
+    limiter = AdaptiveLimiter(max_limit=4)
+    peak = 0
+
+    async def request():
+        nonlocal peak
+        async with limiter.slot():
+            peak = max(peak, limiter.in_flight)
+            assert limiter.in_flight <= limiter.limit
+            await asyncio.sleep(0.01)
+
+    await asyncio.gather(*(request() for _ in range(40)))
+
+    assert limiter.in_flight == 0
+    assert 1 < peak <= 4
+
+
+@pytest.mark.asyncio
+async def test_exception_in_slot_counts_as_failure():
+    limiter = AdaptiveLimiter(max_limit=4, initial_limit=4)
+    limiter.record(1.0)
+
+    with pytest.raises(RuntimeError):
+        async with limiter.slot(requests=3):
+            raise RuntimeError("server error")
+
+    assert limiter.in_flight == 0
+    assert limiter.limit == 2
@@ -0,0 +1,44 @@
+from gideon.utils.content_selector import ContentSelector
+
+PAPER = """Deep Residual Learning for
+Image Recognition
+Kaiming He  Xiangyu Zhang  Shaoqing Ren  Jian Sun
+Microsoft Research
+{kahe, v-xiangz}@microsoft.com
+Abstract
+Deeper neural networks are more difficult to train. We present a residual learn-
+ing framework to ease the training of networks.
+1. Introduction
+Deep convolutional neural networks have led to a series of breakthroughs.
+""" + "\n".join(f"Body line {i} with plenty of filler text about experiments." for i in range(500))
+
+
+def test_normalize_rejoins_hyphenation_and_ligatures():
+    text = ContentSelector.normalize("a residual learn-\ning  ﬁrst\n\n\n  next   line ")
+    assert text == "a residual learning first\nnext line"
+
+
+def test_select_keeps_metadata_blocks_within_budget():
+    selector = ContentSelector(max_tokens=100)
+    selected = selector.select(PAPER)
+    assert selector.estimate_tokens(selected) <= 100
+    assert "Deep Residual Learning for" in selected
+    assert "Kaiming He" in selected
+    assert "Microsoft Research" in selected
+    assert "residual learning framework" in selected
+    assert "1. Introduction" in selected
+    assert "Body line 400" not in selected
+
+
+def test_select_cuts_prompt_size():
+    selector = ContentSelector(max_tokens=200)
+    assert len(selector.select(PAPER)) * 10 < len(PAPER)
+
+
+def test_select_truncates_single_long_line():
+    selector = ContentSelector(max_tokens=10)
+    assert len(selector.select("x" * 1000)) < 40
+
+
+def test_select_empty():
+    assert ContentSelector(max_tokens=10).select("  \n\n ") == ""
@@ -0,0 +1,49 @@
+import pytest
+from gideon.utils.parsers import JsonObjectScanner
+
+
+def feed_all(chunks):
+    scanner = JsonObjectScanner()
+    for chunk in chunks:
+        result = scanner.feed(chunk)
+        if result is not None:
+            return result, scanner
+    return None, scanner
+
+
+def test_scanner_returns_object_as_soon_as_it_closes():
+    result, scanner = feed_all(['{"topic": ', '"Mathematics"', "}", " and more text"])
+
+    assert result == {"topic": "Mathematics"}
+    assert scanner.object_text == '{"topic": "Mathematics"}'
+    assert "more text" not in scanner.text
+
+
+def test_scanner_skips_think_blocks_split_across_chunks():
+    chunks = ["<thi", "nk>Maybe {\"topic\": \"Physics\"}? No.</th", "ink>", '{"topic": "Math', 'ematics"}']
+
+    result, _ = feed_all(chunks)
+
+    assert result == {"topic": "Mathematics"}
+
+
+@pytest.mark.parametrize(
+    "text, expected",
+    [
+        ('{"title": "Sets {and} braces", "authors": []}', {"title": "Sets {and} braces", "authors": []}),
+        ('{"title": "A \\"quoted\\" word}"}', {"title": 'A "quoted" word}'}),
+        ('{"meta": {"year": "2022"}, "topic": "Other"}', {"meta": {"year": "2022"}, "topic": "Other"}),
+        ('Here it is: {not json} {"topic": "Other"}', {"topic": "Other"}),
+    ],
+)
+def test_scanner_handles_strings_nesting_and_invalid_candidates(text, expected):
+    result, _ = feed_all(list(text))
+
+    assert result == expected
+
+
+def test_scanner_waits_for_incomplete_object():
+    result, scanner = feed_all(['{"topic": "Mathe'])
+
+    assert result is None
+    assert scanner.object_text is None